@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Measure resident memory of one coordinator snapshot, old layout vs new."""
+import gc
+import sys
+import tracemalloc
+from datetime import datetime
+
+from common import load_module, make_payload
+
+
+def legacy_snapshot(api, ships):
+    """Original coordinator data: every view holds its own parsed dicts."""
+
+    def parse(ship):
+        parsed = api.parse_ship_data(ship)
+        return {name: getattr(parsed, name) for name in parsed.__slots__}
+
+    now = datetime.now()
+    arriving, departing, in_harbor = [], [], []
+    for ship in ships:
+        parsed = parse(ship)
+        if (parsed["arrival_time"] or parsed["eta"] or now) > now:
+            arriving.append(parsed)
+    for ship in ships:
+        parsed = parse(ship)
+        if (parsed["departure_time"] or parsed["etd"] or now) > now:
+            departing.append(parsed)
+    for ship in ships:
+        parsed = parse(ship)
+        if (parsed["status"] or "").lower() in ["moored", "anchored", "at berth", "docked"]:
+            in_harbor.append(parsed)
+    return {
+        "raw_ships": ships,
+        "arriving": arriving,
+        "departing": departing,
+        "in_harbor": in_harbor,
+        "total_count": len(ships),
+    }
+
+
+def measure(build):
+    """Return the bytes still allocated after `build()` returns."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    """Run the measurement."""
+    api_module = load_module("api")
+
+    print("=" * 80)
+    print("Snapshot memory (excluding the raw payload)")
+    print("=" * 80)
+    print(f"{'ships':>8} {'legacy dicts':>14} {'Ship table':>14} {'ratio':>7}")
+
+    for count in (100, 1000, 10000):
+        ships = make_payload(count)
+        api = api_module.HarborLookoutApi(session=None)
+        # Warm the timestamp cache so both layouts share the datetime objects
+        api.classify_ships(ships)
+
+        legacy = measure(lambda: legacy_snapshot(api, ships))
+        current = measure(lambda: api.classify_ships(ships))
+        print(f"{count:>8} {legacy / 1024:>11.0f} KiB {current / 1024:>11.0f} KiB {legacy / current:>6.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
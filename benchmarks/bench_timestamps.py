@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Microbenchmark: cached TimestampParser vs the original strptime loop."""
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from common import load_module
+
+
+def legacy_parse_timestamp(timestamp):
+    """Original HarborLookoutApi._parse_timestamp implementation."""
+    if not timestamp:
+        return None
+
+    if isinstance(timestamp, datetime):
+        return timestamp
+
+    if isinstance(timestamp, (int, float)):
+        return datetime.fromtimestamp(timestamp)
+
+    if isinstance(timestamp, str):
+        for fmt in [
+            "%Y-%m-%dT%H:%M:%S.%fZ",
+            "%Y-%m-%dT%H:%M:%SZ",
+            "%Y-%m-%dT%H:%M:%S",
+            "%Y-%m-%d %H:%M:%S",
+        ]:
+            try:
+                return datetime.strptime(timestamp, fmt)
+            except ValueError:
+                continue
+
+    return None
+
+
+def make_values(count, distinct):
+    """Build `count` timestamps drawn from `distinct` unique ETAs per format."""
+    base = datetime(2026, 5, 1, 6, 0)
+    formats = {
+        "iso_z": lambda dt: dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "iso_naive": lambda dt: dt.strftime("%Y-%m-%dT%H:%M:%S"),
+        "iso_offset": lambda dt: dt.strftime("%Y-%m-%dT%H:%M:%S-05:00"),
+        "space": lambda dt: dt.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    rng = random.Random(42)
+    values = {}
+    for name, render in formats.items():
+        pool = [render(base + timedelta(minutes=7 * i)) for i in range(distinct)]
+        values[name] = [rng.choice(pool) for _ in range(count)]
+    return values
+
+
+def bench(label, func, values, repeat):
+    """Time `func` over `values` and print microseconds per call."""
+    best = min(timeit.repeat(lambda: [func(v) for v in values], number=1, repeat=repeat))
+    per_call = best / len(values) * 1e6
+    print(f"  {label:<28} {per_call:8.3f} us/call")
+    return per_call
+
+
+def main():
+    """Run the benchmark."""
+    timestamps = load_module("timestamps")
+    count, distinct, repeat = 20000, 500, 5
+
+    print("=" * 80)
+    print(f"Timestamp parsing: {count} values, {distinct} distinct per format")
+    print("=" * 80)
+
+    for name, values in make_values(count, distinct).items():
+        print(f"\n{name}:")
+        legacy = bench("legacy strptime loop", legacy_parse_timestamp, values, repeat)
+
+        cold = timestamps.TimestampParser(cache_size=0)
+        uncached = bench("sniffed, no LRU", lambda v: cold.parse(v, name), values, repeat)
+
+        warm = timestamps.TimestampParser()
+        cached = bench("sniffed + LRU", lambda v: warm.parse(v, name), values, repeat)
+
+        print(f"  speedup: {legacy / uncached:5.1f}x uncached, {legacy / cached:5.1f}x cached")
+        print(f"  {warm.cache_info()}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Shared helpers for the benchmark scripts."""
+import importlib
+import random
+import sys
+import types
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PACKAGE_DIR = (
+    Path(__file__).resolve().parent.parent / "custom_components" / "duluth_ship_tracker"
+)
+PACKAGE_NAME = "duluth_ship_tracker_bench"
+
+
+def load_module(name):
+    """Import an integration module without running the package __init__.
+
+    Modules that only need aiohttp (api, timestamps, diff, ...) can then be
+    benchmarked without a Home Assistant install.
+    """
+    if PACKAGE_NAME not in sys.modules:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [str(PACKAGE_DIR)]
+        sys.modules[PACKAGE_NAME] = package
+    return importlib.import_module(f"{PACKAGE_NAME}.{name}")
+
+
+SHIP_TYPES = ["Bulk Carrier", "Tanker", "Tug", "Cargo", "Passenger"]
+CARGOES = ["Iron Ore", "Taconite", "Coal", "Grain", "Limestone", "Cement", "Salt"]
+STATUSES = ["Underway", "Moored", "Anchored", "At Berth", "Docked", "Expected"]
+FLAGS = ["United States", "Canada", "Netherlands", "Liberia"]
+
+
+TIMESTAMP_FORMATS = {
+    "iso": lambda dt: dt.strftime("%Y-%m-%dT%H:%M:%S"),
+    "iso_z": lambda dt: dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+    "iso_offset": lambda dt: dt.strftime("%Y-%m-%dT%H:%M:%S-05:00"),
+    "space": lambda dt: dt.strftime("%Y-%m-%d %H:%M:%S"),
+    "epoch": lambda dt: int(dt.timestamp()),
+    "epoch_ms": lambda dt: int(dt.timestamp() * 1000),
+}
+
+
+def make_payload(count, seed=42, now=None, formats=("iso",)):
+    """Return a synthetic Harbor Lookout payload with `count` ships.
+
+    Each ship uses one timestamp format from `formats` (see
+    TIMESTAMP_FORMATS) for all of its time fields; about one ship in ten has
+    no ETA at all.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    renderers = [TIMESTAMP_FORMATS[name] for name in formats]
+    ships = []
+    for index in range(count):
+        render = renderers[index % len(renderers)]
+        eta = now + timedelta(minutes=rng.randint(-600, 7 * 24 * 60))
+        etd = eta + timedelta(hours=rng.randint(4, 36))
+        ships.append(
+            {
+                "name": f"Vessel {index:06d}",
+                "mmsi": 366000000 + index,
+                "imo": 9000000 + index if index % 3 else None,
+                "type": rng.choice(SHIP_TYPES),
+                "status": rng.choice(STATUSES),
+                "cargo": rng.choice(CARGOES),
+                "destination": "Duluth",
+                "eta": render(eta) if index % 10 else None,
+                "etd": render(etd),
+                "latitude": round(46.0 + rng.random() * 2, 5),
+                "longitude": round(-92.5 + rng.random() * 8, 5),
+                "speed": round(rng.random() * 14, 1),
+                "heading": rng.randint(0, 359),
+                "length": rng.choice([305.0, 225.6, 194.0, 32.0]),
+                "width": rng.choice([32.0, 23.8, 18.0]),
+                "flag": rng.choice(FLAGS),
+                "lastUpdate": render(now - timedelta(minutes=rng.randint(0, 180))),
+            }
+        )
+    return ships
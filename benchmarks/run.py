@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the fetch/parse/classify/render pipeline.
+
+Runs fully offline: payloads are synthetic and get_ships talks to a local
+aiohttp stub.  Results are written as JSON so two commits can be compared:
+
+    python3 benchmarks/run.py --output base.json
+    git checkout other-branch
+    python3 benchmarks/run.py --output head.json
+    python3 benchmarks/run.py --compare base.json head.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import types
+from datetime import datetime
+
+from common import PACKAGE_DIR, TIMESTAMP_FORMATS, load_module, make_payload
+from stub_server import StubServer
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+
+
+def timed(func, repeat):
+    """Call `func` `repeat` times and return timing statistics in ms."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        func()
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+    return _stats(samples)
+
+
+async def timed_async(func, repeat):
+    """Await `func()` `repeat` times and return timing statistics in ms."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        await func()
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+    return _stats(samples)
+
+
+def _stats(samples):
+    """Summarize samples."""
+    return {
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "runs": len(samples),
+    }
+
+
+def _repeat_for(size, repeat):
+    """Use fewer runs for the very large payloads."""
+    return max(1, repeat // 5) if size >= 100000 else repeat
+
+
+async def bench_fetch(api_module, ships, repeat):
+    """Time fetches against the stub: full decode, 304, buffered and streamed."""
+    import aiohttp  # pylint: disable=import-outside-toplevel
+
+    server = StubServer(ships)
+    url = await server.start()
+    results = {}
+    try:
+        async with aiohttp.ClientSession() as session:
+
+            async def full_fetch():
+                await api_module.HarborLookoutApi(session, url).get_ships_if_changed()
+
+            results["fetch_decode"] = await timed_async(full_fetch, repeat)
+
+            api = api_module.HarborLookoutApi(session, url)
+            await api.get_ships_if_changed()
+            results["fetch_not_modified"] = await timed_async(
+                api.get_ships_if_changed, repeat
+            )
+
+            async def snapshot_fetch():
+                await api_module.HarborLookoutApi(session, url).get_snapshot_if_changed()
+
+            threshold = api_module.STREAM_THRESHOLD_BYTES
+            try:
+                api_module.STREAM_THRESHOLD_BYTES = float("inf")
+                results["fetch_snapshot_buffered"] = await timed_async(snapshot_fetch, repeat)
+                api_module.STREAM_THRESHOLD_BYTES = -1
+                results["fetch_snapshot_streamed"] = await timed_async(snapshot_fetch, repeat)
+            finally:
+                api_module.STREAM_THRESHOLD_BYTES = threshold
+            results["payload_bytes"] = len(server.body)
+    finally:
+        await server.stop()
+    return results
+
+
+async def longest_loop_block(func):
+    """Await `func()` and return the longest time the event loop was blocked, in ms.
+
+    A task that yields continuously records the gaps between its turns;
+    the stub server shares the loop, so its own work is included.
+    """
+    longest = 0
+    running = True
+
+    async def ticker():
+        nonlocal longest
+        last = time.perf_counter_ns()
+        while running:
+            await asyncio.sleep(0)
+            now = time.perf_counter_ns()
+            longest = max(longest, now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    try:
+        await func()
+    finally:
+        running = False
+        await task
+    return longest / 1e6
+
+
+async def bench_loop_blocking(api_module, offload_module, ships, repeat):
+    """Compare event loop blocking with parsing inline and in the executor."""
+    import aiohttp  # pylint: disable=import-outside-toplevel
+
+    server = StubServer(ships)
+    url = await server.start()
+    results = {}
+    threshold = api_module.STREAM_THRESHOLD_BYTES
+    try:
+        async with aiohttp.ClientSession() as session:
+            for mode, executor in (
+                ("inline", None),
+                ("executor", offload_module.PipelineExecutor()),
+            ):
+
+                async def snapshot_fetch(executor=executor):
+                    api = api_module.HarborLookoutApi(session, url, executor=executor)
+                    await api.get_snapshot_if_changed()
+
+                for path, limit in (("buffered", float("inf")), ("streamed", -1)):
+                    api_module.STREAM_THRESHOLD_BYTES = limit
+                    samples = [
+                        await longest_loop_block(snapshot_fetch) for _ in range(repeat)
+                    ]
+                    results[f"loop_block_{path}_{mode}"] = _stats(samples)
+    finally:
+        api_module.STREAM_THRESHOLD_BYTES = threshold
+        await server.stop()
+    return results
+
+
+def bench_parse(api_module, ships, repeat):
+    """Time parsing and classification."""
+    results = {}
+
+    def cold_parse():
+        api = api_module.HarborLookoutApi(session=None)
+        for ship in ships:
+            api.parse_ship_data(ship)
+
+    results["parse_cold"] = timed(cold_parse, repeat)
+
+    api = api_module.HarborLookoutApi(session=None)
+    api.classify_ships(ships)
+    results["parse_warm"] = timed(lambda: [api.parse_ship_data(s) for s in ships], repeat)
+    results["classify_ships"] = timed(lambda: api.classify_ships(ships), repeat)
+    results["get_arriving_ships"] = timed(lambda: api.get_arriving_ships(ships), repeat)
+    results["get_departing_ships"] = timed(lambda: api.get_departing_ships(ships), repeat)
+    results["get_ships_in_harbor"] = timed(lambda: api.get_ships_in_harbor(ships), repeat)
+    return results
+
+
+def bench_render(sensor_module, snapshot, repeat):
+    """Time rendering and cached state reads of every sensor class."""
+    # Metrics stay switched off, as they are unless a metrics sensor is enabled
+    coordinator = types.SimpleNamespace(
+        data=snapshot, metrics=load_module("metrics").PipelineMetrics()
+    )
+    sensors = {
+        "DuluthShipCountSensor": sensor_module.DuluthShipCountSensor(
+            coordinator, "arriving", "Arriving Ships"
+        ),
+        "DuluthNextArrivalSensor": sensor_module.DuluthNextArrivalSensor(coordinator),
+        "DuluthNextDepartureSensor": sensor_module.DuluthNextDepartureSensor(coordinator),
+    }
+    for key in ("arriving", "departing", "in_harbor"):
+        sensors[f"DuluthShipListSensor[{key}]"] = sensor_module.DuluthShipListSensor(
+            coordinator, key, key
+        )
+
+    def render(sensor):
+        return sensor._render(sensor._slice(snapshot))  # pylint: disable=protected-access
+
+    def read(sensor):
+        return sensor.native_value, sensor.extra_state_attributes
+
+    results = {}
+    for name, sensor in sensors.items():
+        # Rendering happens once per snapshot generation; reads are cached
+        results[f"render_{name}"] = timed(lambda sensor=sensor: render(sensor), repeat)
+        results[f"read_{name}"] = timed(lambda sensor=sensor: read(sensor), repeat)
+    return results
+
+
+def bench_geo(geo_module, snapshot, repeat, zone_count=50):
+    """Time indexing positions against many zones, and proximity queries."""
+    zones = [
+        geo_module.Zone(
+            f"zone {i}",
+            ((46.0 + i * 0.04, -92.5), (46.0 + i * 0.04, -84.5),
+             (46.02 + i * 0.04, -84.5), (46.02 + i * 0.04, -92.5)),
+        )
+        for i in range(zone_count)
+    ]
+    center = (46.7793, -92.0929)
+
+    def index_all():
+        geo_module.GeoTracker(zones).update(snapshot)
+
+    tracker = geo_module.GeoTracker(zones)
+    tracker.update(snapshot)
+    return {
+        f"geo_index_{zone_count}_zones": timed(index_all, repeat),
+        "geo_within_10nm": timed(lambda: tracker.within(center, 10), repeat),
+        "geo_nearest": timed(lambda: tracker.nearest(center), repeat),
+    }
+
+
+def _load_sensor_module():
+    """Import sensor.py, which needs Home Assistant."""
+    try:
+        return load_module("sensor")
+    except ImportError as err:
+        print(f"Skipping sensor rendering benchmarks: {err}", file=sys.stderr)
+        return None
+
+
+def _git_revision():
+    """Return the current commit, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PACKAGE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_suite(sizes, repeat, formats):
+    """Run every benchmark for every payload size."""
+    api_module = load_module("api")
+    offload_module = load_module("offload")
+    geo_module = load_module("geo")
+    sensor_module = _load_sensor_module()
+    results = {}
+
+    for size in sizes:
+        ships = make_payload(size, formats=formats)
+        runs = _repeat_for(size, repeat)
+        print(f"Benchmarking {size} ships ({runs} runs)...", file=sys.stderr)
+
+        case = await bench_fetch(api_module, ships, runs)
+        case.update(await bench_loop_blocking(api_module, offload_module, ships, runs))
+        case.update(bench_parse(api_module, ships, runs))
+        snapshot = api_module.HarborLookoutApi(session=None).classify_ships(ships)
+        case.update(bench_geo(geo_module, snapshot, runs))
+        if sensor_module is not None:
+            case.update(bench_render(sensor_module, snapshot, runs))
+        results[str(size)] = case
+
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "formats": list(formats),
+        },
+        "results": results,
+    }
+
+
+def compare(base_path, head_path, threshold):
+    """Print median ratios between two result files; return 1 on regressions."""
+    with open(base_path, encoding="utf-8") as file:
+        base = json.load(file)
+    with open(head_path, encoding="utf-8") as file:
+        head = json.load(file)
+
+    print(f"{'size':>7} {'benchmark':<40} {'base ms':>10} {'head ms':>10} {'ratio':>7}")
+    regressions = 0
+    for size, cases in head["results"].items():
+        for name, stats in cases.items():
+            old = base["results"].get(size, {}).get(name)
+            if not isinstance(stats, dict) or not isinstance(old, dict):
+                continue
+            ratio = stats["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+            flag = "  <-- slower" if ratio > threshold else ""
+            regressions += bool(flag)
+            print(
+                f"{size:>7} {name:<40} {old['median_ms']:>10.3f} "
+                f"{stats['median_ms']:>10.3f} {ratio:>6.2f}x{flag}"
+            )
+    return 1 if regressions else 0
+
+
+def main():
+    """Parse arguments and run."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(map(str, DEFAULT_SIZES)),
+        help="comma-separated ship counts",
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--formats",
+        default=",".join(TIMESTAMP_FORMATS),
+        help="timestamp formats to mix: " + ", ".join(TIMESTAMP_FORMATS),
+    )
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"))
+    parser.add_argument(
+        "--threshold", type=float, default=1.2, help="ratio reported as a regression"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = asyncio.run(run_suite(sizes, args.repeat, tuple(args.formats.split(","))))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Local aiohttp stand-in for the Harbor Lookout shipsForDisplay endpoint."""
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+
+from aiohttp import web
+
+from common import make_payload
+
+PATH = "/api/Display/shipsForDisplay"
+
+
+class StubServer:
+    """Serve a fixed payload, optionally with ETag validators.
+
+    With `chunked`, the body is sent with chunked transfer encoding and no
+    Content-Length, in pieces of `chunk_size` bytes.
+    """
+
+    def __init__(self, ships, etag=True, chunked=False, chunk_size=4096):
+        """Initialize the server."""
+        self.body = json.dumps(ships).encode()
+        self.etag = f'"{hashlib.md5(self.body).hexdigest()}"' if etag else None
+        self.chunked = chunked
+        self.chunk_size = chunk_size
+        self.requests = 0
+        self._runner = None
+        self.url = None
+
+    def set_ships(self, ships):
+        """Replace the payload served from now on."""
+        self.body = json.dumps(ships).encode()
+        if self.etag:
+            self.etag = f'"{hashlib.md5(self.body).hexdigest()}"'
+
+    async def _handle(self, request):
+        """Return the payload, or 304 if the client already has it."""
+        self.requests += 1
+        if self.etag and request.headers.get("If-None-Match") == self.etag:
+            return web.Response(status=304)
+        headers = {"ETag": self.etag} if self.etag else {}
+        if not self.chunked:
+            return web.Response(body=self.body, content_type="application/json", headers=headers)
+        response = web.StreamResponse(headers=headers)
+        response.content_type = "application/json"
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for start in range(0, len(self.body), self.chunk_size):
+            await response.write(self.body[start : start + self.chunk_size])
+        await response.write_eof()
+        return response
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start listening and return the endpoint URL."""
+        app = web.Application()
+        app.router.add_get(PATH, self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{port}{PATH}"
+        return self.url
+
+    async def stop(self):
+        """Stop the server."""
+        await self._runner.cleanup()
+
+
+async def _serve(args):
+    """Run the stub until interrupted."""
+    ships = make_payload(args.ships, formats=tuple(args.formats.split(",")))
+    server = StubServer(ships, etag=not args.no_etag, chunked=args.chunked)
+    url = await server.start(port=args.port)
+    print(f"Serving {args.ships} ships at {url}")
+    await asyncio.Event().wait()
+
+
+def main():
+    """Parse arguments and serve."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ships", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--formats", default="iso")
+    parser.add_argument("--no-etag", action="store_true")
+    parser.add_argument("--chunked", action="store_true")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
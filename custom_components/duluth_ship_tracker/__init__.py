@@ -1,48 +1,161 @@
 """The Duluth Ship Tracker integration."""
 from __future__ import annotations
 
+import contextlib
+from functools import partial
 import logging
+import os
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-
-from .api import HarborLookoutApi
-from .const import DOMAIN
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import (
+    CONF_ANNOUNCEMENT_TIME,
+    CONF_ENDPOINTS,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_PARSE_IN_PROCESS,
+    CONF_VESSEL_REGISTRY,
+    CONF_WARNING_MINUTES,
+    CONF_ZONES,
+    DEFAULT_ANNOUNCEMENT_TIME,
+    DEFAULT_ENDPOINTS,
+    DEFAULT_MAX_UPDATE_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    DEFAULT_WARNING_MINUTES,
+    DEFAULT_ZONES,
+    DOMAIN,
+)
 from .coordinator import DuluthShipTrackerCoordinator
+from .geo import zones_from_config
+from .history import VoyageHistory
+from .hub import async_get_hub
+from .services import async_setup_services, async_unload_services
+from .storage import SnapshotStore
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.SENSOR]
+PLATFORMS: list[Platform] = [Platform.GEO_LOCATION, Platform.SENSOR]
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Duluth Ship Tracker from a config entry."""
     hass.data.setdefault(DOMAIN, {})
 
-    # Create API client
-    session = async_get_clientsession(hass)
-    api = HarborLookoutApi(session)
+    # Entries polling the same endpoints share their fetches through the hub;
+    # parsing and sorting run in the executor, very large feeds optionally in
+    # a worker process
+    hub = async_get_hub(hass)
+    registry_path = entry.options.get(CONF_VESSEL_REGISTRY)
+    api = hub.async_subscribe(
+        entry.options.get(CONF_ENDPOINTS, DEFAULT_ENDPOINTS),
+        hass.config.path(registry_path) if registry_path else None,
+        bool(entry.options.get(CONF_PARSE_IN_PROCESS)),
+    )
+    entry.async_on_unload(partial(hub.async_release, api))
 
     # Create coordinator
-    coordinator = DuluthShipTrackerCoordinator(hass, api)
-
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
+    coordinator = DuluthShipTrackerCoordinator(
+        hass,
+        api,
+        warning_minutes=entry.options.get(CONF_WARNING_MINUTES, DEFAULT_WARNING_MINUTES),
+        min_update_interval=entry.options.get(
+            CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL
+        ),
+        max_update_interval=entry.options.get(
+            CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_INTERVAL
+        ),
+        store=SnapshotStore(hass, entry.entry_id),
+        history=VoyageHistory(hass, _history_path(hass, entry)),
+        zones=zones_from_config(entry.options.get(CONF_ZONES, DEFAULT_ZONES)),
+        announcement_time=entry.options.get(
+            CONF_ANNOUNCEMENT_TIME, DEFAULT_ANNOUNCEMENT_TIME
+        ),
+    )
+    entry.async_on_unload(coordinator.warnings.async_stop)
+    entry.async_on_unload(coordinator.announcer.async_stop)
+    entry.async_on_unload(coordinator.history.async_close)
+
+    if await coordinator.async_restore():
+        # Sensors start from the cached snapshot; refresh from the API in the background
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} initial refresh"
+        )
+    else:
+        # Fetch initial data
+        await coordinator.async_config_entry_first_refresh()
 
     # Store coordinator
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    coordinator.announcer.async_start()
 
     # Forward entry setup to platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    async_setup_services(hass)
+
+    # Reload when options change so new settings take effect
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    return True
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an entry from an older version."""
+    if entry.version == 1:
+        # Unique IDs and ship devices were not scoped to the entry, so a
+        # second entry collided with the first.  Sensors keep their entity
+        # IDs and history under the new unique IDs; ship devices are only
+        # detached, and come back under their new identifiers on the next poll.
+        prefix = f"{DOMAIN}_"
+
+        @callback
+        def _migrate(entity: er.RegistryEntry) -> dict[str, Any] | None:
+            """Return the entry-scoped unique ID of a sensor."""
+            if not entity.unique_id.startswith(prefix):
+                return None
+            return {"new_unique_id": f"{entry.entry_id}_{entity.unique_id[len(prefix):]}"}
+
+        devices = dr.async_get(hass)
+        for device in dr.async_entries_for_config_entry(devices, entry.entry_id):
+            devices.async_update_device(device.id, remove_config_entry_id=entry.entry_id)
+        await er.async_migrate_entries(hass, entry.entry_id, _migrate)
+        hass.config_entries.async_update_entry(entry, version=2)
+        _LOGGER.debug("Migrated %s to version 2", entry.title)
 
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
+        async_unload_services(hass)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached snapshot and history when the entry is deleted."""
+    await SnapshotStore(hass, entry.entry_id).async_remove()
+    await hass.async_add_executor_job(_remove_history, _history_path(hass, entry))
+
+
+def _history_path(hass: HomeAssistant, entry: ConfigEntry) -> str:
+    """Return the path of the voyage history database of an entry."""
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entry.entry_id}.history.db")
+
+
+def _remove_history(path: str) -> None:
+    """Delete the history database and its journal files."""
+    for suffix in ("", "-wal", "-shm"):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path + suffix)
@@ -2,45 +2,494 @@
 from __future__ import annotations
 
 import asyncio
+from bisect import bisect_right
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field, replace
+import hashlib
+import json
 import logging
 from datetime import datetime
-from typing import Any
+from operator import attrgetter
+import sys
+from typing import Any, TypeVar
 
 import aiohttp
 import async_timeout
 
-from .const import API_TIMEOUT, API_URL
+from .const import (
+    API_TIMEOUT,
+    API_URL,
+    IN_HARBOR_STATUSES,
+    STREAM_CHUNK_SIZE,
+    STREAM_THRESHOLD_BYTES,
+    TIMESTAMP_CACHE_SIZE,
+)
+from .diff import ship_key
+from .metrics import PipelineMetrics, timer
+from .offload import PipelineExecutor, resident
+from .predict import predict_arrivals
+from .registry import VesselRegistry
+from .schema import SAMPLE_SIZE, Extractor, detect_schema, make_extractor
+from .streaming import ShipStreamDecoder, UnexpectedFormatError
+from .timestamps import TimestampParser
 
 _LOGGER = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
 
 class HarborLookoutApiError(Exception):
     """Exception raised for API errors."""
 
 
+def is_in_harbor_status(status: Any) -> bool:
+    """Return True if a status value means the ship is in the harbor."""
+    # Adjust status checks based on actual API values
+    return isinstance(status, str) and status.lower() in IN_HARBOR_STATUSES
+
+
+def _intern(value: Any) -> Any:
+    """Intern short enum-like strings so equal values share one object."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(frozen=True, slots=True)
+class Ship:
+    """A parsed ship record."""
+
+    ship_name: str = "Unknown"
+    mmsi: Any = None
+    imo: Any = None
+    ship_type: str | None = "Unknown"
+    status: str | None = "Unknown"
+    cargo: str | None = "Unknown"
+    destination: str | None = None
+    eta: datetime | None = None
+    etd: datetime | None = None
+    arrival_time: datetime | None = None
+    departure_time: datetime | None = None
+    latitude: float | None = None
+    longitude: float | None = None
+    speed: float | None = None
+    heading: float | None = None
+    length: float | None = None
+    width: float | None = None
+    nationality: str | None = None
+    last_update: datetime | None = None
+    predicted_eta: datetime | None = None
+    eta_confidence: float | None = None
+
+    @property
+    def arrival(self) -> datetime | None:
+        """Return the best known arrival time.
+
+        A predicted ETA is only set when the feed has no ETA or only a stale
+        one, so it takes precedence over `eta`.
+        """
+        return self.arrival_time or self.predicted_eta or self.eta
+
+    @property
+    def departure(self) -> datetime | None:
+        """Return the best known departure time."""
+        return self.departure_time or self.etd
+
+    @property
+    def in_harbor(self) -> bool:
+        """Return True if the status means the ship is in the harbor."""
+        return is_in_harbor_status(self.status)
+
+
+SHIP_FIELDS: tuple[str, ...] = Ship.__slots__
+
+_ARRIVAL = attrgetter("arrival")
+_DEPARTURE = attrgetter("departure")
+
+
+@dataclass(frozen=True)
+class ShipSnapshot:
+    """Classified view of one API fetch.
+
+    Every parsed ship lives once in `ships`; the arriving, departing and
+    in-harbor views are tuples of references into that table.  `generation`
+    goes up whenever the coordinator publishes different content, so
+    consumers can cache anything derived from a snapshot by generation.
+    """
+
+    arriving: tuple[Ship, ...] = ()
+    departing: tuple[Ship, ...] = ()
+    in_harbor: tuple[Ship, ...] = ()
+    ships: dict[str, Ship] = field(default_factory=dict)
+    total_count: int = 0
+    generated_at: datetime = field(default_factory=datetime.now)
+    generation: int = 0
+
+    def without_past(self, now: datetime | None = None) -> ShipSnapshot:
+        """Drop arrivals/departures whose time has passed, without reparsing."""
+        if now is None:
+            now = datetime.now()
+
+        arriving = _drop_past(self.arriving, _ARRIVAL, now)
+        departing = _drop_past(self.departing, _DEPARTURE, now)
+        if arriving is self.arriving and departing is self.departing:
+            return self
+
+        return replace(
+            self,
+            arriving=arriving,
+            departing=departing,
+            generation=self.generation + 1,
+        )
+
+
+class ShipParser:
+    """Turn raw ship records into Ships.
+
+    Holds the detected field names, their extractor, the timestamp cache
+    and the vessel registry.  It can be pickled for a worker process, once
+    (see process_resident); the extractor and the timestamp cache are
+    rebuilt on the other side.
+    """
+
+    def __init__(
+        self,
+        registry: VesselRegistry | None = None,
+        cache_size: int = TIMESTAMP_CACHE_SIZE,
+    ) -> None:
+        """Initialize the parser."""
+        self.registry = registry
+        self.cache_size = cache_size
+        self.timestamps = TimestampParser(cache_size)
+        self.schema: dict[str, str | None] = {}
+        self.schema_keys: frozenset[Any] | None = None
+        self._extract: Extractor | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Return the picklable state."""
+        return {
+            "registry": self.registry,
+            "cache_size": self.cache_size,
+            "schema": self.schema,
+            "schema_keys": self.schema_keys,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """Restore the state and rebuild the extractor."""
+        self.__init__(state["registry"], state["cache_size"])  # type: ignore[misc]
+        self.adopt(state["schema"], state["schema_keys"])
+
+    def use_schema(self, ships: list[Any]) -> None:
+        """Detect the feed's field names unless the first record's keys are known.
+
+        The field names are picked from a sample of records (see schema.py)
+        and turned into an extractor, which is reused until a payload
+        starts with a record of a different shape.
+        """
+        sample = [ship for ship in ships[:SAMPLE_SIZE] if isinstance(ship, dict)]
+        if not sample or (keys := frozenset(sample[0])) == self.schema_keys:
+            return
+        self.schema_keys = keys
+        if (schema := detect_schema(sample)) == self.schema:
+            return
+
+        _LOGGER.debug("Detected API fields: %s", schema)
+        if missing := [field for field, source in schema.items() if source is None]:
+            _LOGGER.debug("No API field found for: %s", ", ".join(missing))
+        self.adopt(schema, keys)
+
+    def adopt(self, schema: dict[str, str | None], keys: frozenset[Any] | None) -> None:
+        """Use field names detected elsewhere, rebuilding the extractor if they changed."""
+        self.schema_keys = keys
+        if schema == self.schema and self._extract is not None:
+            return
+        self.schema = schema
+        self._extract = make_extractor(schema, Ship, self.timestamps.parse, _intern)
+
+    def parse(self, ship: dict[str, Any]) -> Ship:
+        """Parse raw ship data into structured format."""
+        if self._extract is None:
+            self.use_schema([ship])
+        parsed = self._extract(ship)
+        if self.registry is None:
+            return parsed
+        # Fill in particulars the feed left empty
+        return self.registry.enrich(parsed)
+
+    def parse_all(self, ships: list[Any]) -> list[Ship]:
+        """Parse a list of records, detecting the field names first."""
+        self.use_schema(ships)
+        return self.parse_each(ships)
+
+    def parse_each(self, ships: Iterable[Any]) -> list[Ship]:
+        """Parse records with the current field names, skipping malformed ones.
+
+        A record that is not an object, or has a value of the wrong kind
+        (e.g. a list where a status is expected), is logged and left out
+        instead of failing the whole payload.
+        """
+        parse = self.parse
+        parsed: list[Ship] = []
+        for ship in ships:
+            if not isinstance(ship, dict):
+                _LOGGER.debug("Skipping ship record that is not an object: %r", ship)
+                continue
+            try:
+                parsed.append(parse(ship))
+            except (TypeError, ValueError) as err:
+                _LOGGER.debug("Skipping malformed ship record %r: %s", ship, err)
+        return parsed
+
+    def schema_report(self) -> dict[str, Any]:
+        """Return the detected field names for diagnostics."""
+        used = set(self.schema.values())
+        return {
+            "fields": {field: source for field, source in self.schema.items() if source},
+            "missing": [field for field, source in self.schema.items() if not source],
+            "unused": sorted(
+                str(key) for key in self.schema_keys or () if key not in used
+            ),
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class PayloadResult:
+    """Outcome of processing one response body."""
+
+    body_hash: bytes
+    snapshot: ShipSnapshot | None = None
+    error: str | None = None
+    schema: dict[str, str | None] = field(default_factory=dict)
+    schema_keys: frozenset[Any] | None = None
+    # Nanoseconds per pipeline stage
+    timings: dict[str, int] = field(default_factory=dict)
+
+
+def process_body(
+    parser: ShipParser,
+    body: bytes,
+    previous_hash: bytes | None = None,
+    now: datetime | None = None,
+    predict: bool = True,
+) -> PayloadResult:
+    """Hash, decode, parse and classify a response body.
+
+    Touches nothing but the parser's caches, so it can run in a worker
+    thread, or in a worker process with the parser kept there (see
+    process_resident).  The snapshot is None if the body hashes to
+    `previous_hash`.  Without
+    `predict`, missing ETAs are left for the caller to fill in.
+    """
+    timings: dict[str, int] = {}
+    body_hash = hashlib.blake2b(body, digest_size=16).digest()
+    if body_hash == previous_hash:
+        return PayloadResult(body_hash, timings=timings)
+
+    with timer(timings, "decode"):
+        data = json.loads(body)
+    if isinstance(data, dict) and isinstance(data.get("ships"), list):
+        data = data["ships"]
+    if not isinstance(data, list):
+        return PayloadResult(
+            body_hash, error=f"Unexpected API response format: {type(data)}"
+        )
+
+    with timer(timings, "parse"):
+        parsed = parser.parse_all(data)
+    snapshot, classify_timings = classify(parsed, len(data), now, predict)
+    timings.update(classify_timings)
+    return PayloadResult(
+        body_hash,
+        snapshot,
+        schema=parser.schema,
+        schema_keys=parser.schema_keys,
+        timings=timings,
+    )
+
+
+def process_resident(
+    name: str,
+    body: bytes,
+    previous_hash: bytes | None,
+    now: datetime | None,
+    predict: bool,
+    schema: dict[str, str | None],
+    schema_keys: frozenset[Any] | None,
+) -> PayloadResult:
+    """Run process_body in the worker process with the parser kept there.
+
+    Only the body and the field names detected on the event loop side are
+    sent; the parser, with its vessel registry and caches, stays in the
+    worker between payloads.
+    """
+    parser: ShipParser = resident(name)
+    parser.adopt(schema, schema_keys)
+    return process_body(parser, body, previous_hash, now, predict)
+
+
+def classify(
+    ships: list[Ship],
+    total_count: int,
+    now: datetime | None = None,
+    predict: bool = True,
+) -> tuple[ShipSnapshot, dict[str, int]]:
+    """Build a snapshot and return it with the time it took."""
+    timings: dict[str, int] = {}
+    with timer(timings, "classify"):
+        snapshot = build_snapshot(ships, total_count, now, predict)
+    return snapshot, timings
+
+
 class HarborLookoutApi:
     """API client for Harbor Lookout."""
 
-    def __init__(self, session: aiohttp.ClientSession) -> None:
-        """Initialize the API client."""
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        url: str = API_URL,
+        timeout: float = API_TIMEOUT,
+        registry: VesselRegistry | None = None,
+        metrics: PipelineMetrics | None = None,
+        executor: PipelineExecutor | None = None,
+        predict: bool = True,
+    ) -> None:
+        """Initialize the API client.
+
+        Without an executor, parsing runs inline on the calling thread.
+        Without `predict`, snapshots keep the feed's ETAs only, for callers
+        that predict once over several endpoints (see ports.py).
+        """
         self.session = session
+        self.url = url
+        self.timeout = timeout
+        self.registry = registry
+        self.metrics = PipelineMetrics() if metrics is None else metrics
+        self.executor = executor
+        self.predict = predict
+        self.parser = ShipParser(registry)
+        # Registry state of the parser last sent to the worker process
+        self._resident_loaded: bool | None = None
         self._last_data: list[dict[str, Any]] = []
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        self._body_hash: bytes | None = None
 
     async def get_ships(self) -> list[dict[str, Any]]:
         """Fetch ship data from Harbor Lookout API."""
-        try:
-            async with async_timeout.timeout(API_TIMEOUT):
-                async with self.session.get(API_URL) as response:
-                    response.raise_for_status()
-                    data = await response.json()
+        ships = await self.get_ships_if_changed()
+        return self._last_data if ships is None else ships
+
+    async def get_ships_if_changed(self) -> list[dict[str, Any]] | None:
+        """Fetch ship data, returning None if it has not changed since last time.
+
+        Uses If-None-Match / If-Modified-Since when the server sent validators
+        and falls back to comparing a hash of the raw body, so an unchanged
+        payload is never JSON-decoded twice.
+        """
+        return await self._fetch(self._read_ships, self.metrics)
+
+    async def get_snapshot_if_changed(
+        self, now: datetime | None = None, metrics: PipelineMetrics | None = None
+    ) -> ShipSnapshot | None:
+        """Fetch and classify ship data, returning None if it has not changed.
+
+        Large responses, or ones without a Content-Length, are hashed as they
+        download and, only if the hash changed, decoded chunk by chunk: each
+        ship is parsed as soon as its object is complete, so the raw list
+        never exists in full.  With an executor, all decoding,
+        parsing and sorting happens off the event loop.  Timings go to
+        `metrics`, e.g. those of the entry a shared client fetches for, or
+        to the client's own.
+        """
+        if metrics is None:
+            metrics = self.metrics
+
+        async def handle(response: aiohttp.ClientResponse) -> ShipSnapshot | None:
+            length = response.headers.get(aiohttp.hdrs.CONTENT_LENGTH, "")
+            size = int(length) if length.isdigit() else None
+            if size is not None and (
+                size <= STREAM_THRESHOLD_BYTES
+                or (self.executor is not None and self.executor.uses_process(size))
+            ):
+                return await self._read_snapshot(response, now, metrics)
+            return await self._stream_snapshot(response, now, metrics)
+
+        return await self._fetch(handle, metrics)
+
+    async def _run(self, func: Callable[..., _T], *args: Any, size: int = 0) -> _T:
+        """Run a pipeline step in the executor, or inline without one."""
+        if self.executor is None:
+            return func(*args)
+        return await self.executor.run(func, *args, size=size)
+
+    async def _read_snapshot(
+        self,
+        response: aiohttp.ClientResponse,
+        now: datetime | None,
+        metrics: PipelineMetrics,
+    ) -> ShipSnapshot | None:
+        """Read the whole body and turn it into a snapshot unless it is unchanged."""
+        body = await response.read()
+        metrics.count("payload_bytes", len(body))
+        if (executor := self.executor) is not None and executor.uses_process(len(body)):
+            result = await self._run_resident(executor, body, now)
+        else:
+            result = await self._run(
+                process_body, self.parser, body, self._body_hash, now, self.predict
+            )
+        metrics.add(result.timings)
+        if result.error is not None:
+            _LOGGER.error("%s", result.error)
+            return None
+        if not self._remember(response, result.body_hash):
+            return None
+        # A worker process parsed with a copy of the parser
+        self.parser.adopt(result.schema, result.schema_keys)
+        _LOGGER.debug("Fetched %d ships from API", result.snapshot.total_count)
+        return result.snapshot
+
+    async def _run_resident(
+        self, executor: PipelineExecutor, body: bytes, now: datetime | None
+    ) -> PayloadResult:
+        """Process a body in the worker process, sending the parser there once."""
+        name = f"parser-{id(self)}"
+        loaded = self.registry is None or self.registry.loaded
+        if loaded != self._resident_loaded:
+            # Resent once the registry has loaded
+            executor.keep_in_worker(name, self.parser)
+            self._resident_loaded = loaded
+        return await executor.run(
+            process_resident,
+            name,
+            body,
+            self._body_hash,
+            now,
+            self.predict,
+            self.parser.schema,
+            self.parser.schema_keys,
+            size=len(body),
+        )
 
-                    if not isinstance(data, list):
-                        _LOGGER.error("Unexpected API response format: %s", type(data))
-                        return self._last_data
+    async def _fetch(
+        self,
+        handle: Callable[[aiohttp.ClientResponse], Awaitable[_T | None]],
+        metrics: PipelineMetrics,
+    ) -> _T | None:
+        """Make a conditional request and pass a changed response to `handle`."""
+        headers: dict[str, str] = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
 
-                    self._last_data = data
-                    _LOGGER.debug("Fetched %d ships from API", len(data))
-                    return data
+        try:
+            with metrics.span("fetch"):
+                async with async_timeout.timeout(self.timeout):
+                    async with self.session.get(self.url, headers=headers) as response:
+                        if response.status == 304:
+                            _LOGGER.debug("Ship data not modified")
+                            return None
+
+                        response.raise_for_status()
+                        return await handle(response)
 
         except asyncio.TimeoutError as err:
             _LOGGER.error("Timeout fetching ship data: %s", err)
@@ -52,93 +501,199 @@ class HarborLookoutApi:
             _LOGGER.error("Unexpected error fetching ship data: %s", err)
             raise HarborLookoutApiError(f"Unexpected error: {err}") from err
 
-    def parse_ship_data(self, ship: dict[str, Any]) -> dict[str, Any]:
+    def _remember(self, response: aiohttp.ClientResponse, body_hash: bytes) -> bool:
+        """Store the validators of a response; return False if the body is unchanged."""
+        self._etag = response.headers.get("ETag")
+        self._last_modified = response.headers.get("Last-Modified")
+        if body_hash == self._body_hash:
+            _LOGGER.debug("Ship data unchanged")
+            return False
+        self._body_hash = body_hash
+        return True
+
+    async def _read_ships(
+        self, response: aiohttp.ClientResponse
+    ) -> list[dict[str, Any]] | None:
+        """Read and decode the whole body unless its hash is unchanged."""
+        body = await response.read()
+        self.metrics.count("payload_bytes", len(body))
+        body_hash = hashlib.blake2b(body, digest_size=16).digest()
+        if body_hash == self._body_hash:
+            self._remember(response, body_hash)
+            return None
+
+        with self.metrics.span("decode"):
+            data = json.loads(body)
+        if isinstance(data, dict) and isinstance(data.get("ships"), list):
+            data = data["ships"]
+
+        if not isinstance(data, list):
+            _LOGGER.error("Unexpected API response format: %s", type(data))
+            return None
+
+        # Only remember validators once the body is known to be good
+        self._remember(response, body_hash)
+        self._last_data = data
+        _LOGGER.debug("Fetched %d ships from API", len(data))
+        return data
+
+    async def _stream_snapshot(
+        self,
+        response: aiohttp.ClientResponse,
+        now: datetime | None,
+        metrics: PipelineMetrics,
+    ) -> ShipSnapshot | None:
+        """Decode, parse and classify the body chunk by chunk.
+
+        The chunks are only hashed while they download; an unchanged body is
+        recognized before any of it is decoded.
+        """
+        body_hash = hashlib.blake2b(digest_size=16)
+        decoder = ShipStreamDecoder()
+        parser = self.parser
+        parsed: list[Ship] = []
+        count = 0
+
+        def take(chunk: bytes | None) -> dict[str, int]:
+            """Decode and parse one chunk, or the rest at the end (worker thread)."""
+            nonlocal count
+            timings: dict[str, int] = {}
+            with timer(timings, "decode"):
+                items = decoder.close() if chunk is None else decoder.feed(chunk)
+            with timer(timings, "parse"):
+                if not count:
+                    # The field names are detected from the first complete ships
+                    parser.use_schema(items)
+                count += len(items)
+                parsed.extend(parser.parse_each(items))
+            return timings
+
+        chunks: list[bytes] = []
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            metrics.count("payload_bytes", len(chunk))
+            body_hash.update(chunk)
+            chunks.append(chunk)
+        digest = body_hash.digest()
+        if digest == self._body_hash:
+            self._remember(response, digest)
+            return None
+
+        # Each chunk is let go once it is decoded
+        chunks.reverse()
+        try:
+            while chunks:
+                metrics.add(await self._run(take, chunks.pop()))
+            metrics.add(await self._run(take, None))
+        except UnexpectedFormatError as err:
+            _LOGGER.error("%s", err)
+            return None
+
+        # Only remember validators once the body is known to be good
+        self._remember(response, digest)
+        _LOGGER.debug("Streamed %d ships from API", count)
+        snapshot, timings = await self._run(classify, parsed, count, now, self.predict)
+        metrics.add(timings)
+        return snapshot
+
+    @property
+    def schema(self) -> dict[str, str | None]:
+        """Return the detected source field of every ship field."""
+        return self.parser.schema
+
+    def use_schema(self, ships: list[Any]) -> None:
+        """Detect the feed's field names from a list of records."""
+        self.parser.use_schema(ships)
+
+    def parse_ship_data(self, ship: dict[str, Any]) -> Ship:
         """Parse raw ship data into structured format."""
-        # The actual field names will need to be adjusted based on the API response
-        # This is a template based on typical ship tracking data
-        return {
-            "ship_name": ship.get("name", "Unknown"),
-            "mmsi": ship.get("mmsi"),
-            "imo": ship.get("imo"),
-            "ship_type": ship.get("type", "Unknown"),
-            "status": ship.get("status", "Unknown"),
-            "cargo": ship.get("cargo", "Unknown"),
-            "destination": ship.get("destination"),
-            "eta": self._parse_timestamp(ship.get("eta")),
-            "etd": self._parse_timestamp(ship.get("etd")),
-            "arrival_time": self._parse_timestamp(ship.get("arrivalTime")),
-            "departure_time": self._parse_timestamp(ship.get("departureTime")),
-            "latitude": ship.get("latitude") or ship.get("lat"),
-            "longitude": ship.get("longitude") or ship.get("lon") or ship.get("lng"),
-            "speed": ship.get("speed"),
-            "heading": ship.get("heading") or ship.get("course"),
-            "length": ship.get("length"),
-            "width": ship.get("width") or ship.get("beam"),
-            "nationality": ship.get("nationality") or ship.get("flag"),
-            "last_update": self._parse_timestamp(ship.get("lastUpdate") or ship.get("timestamp")),
-        }
+        return self.parser.parse(ship)
+
+    def schema_report(self) -> dict[str, Any]:
+        """Return the detected field names for diagnostics."""
+        return self.parser.schema_report()
 
-    def _parse_timestamp(self, timestamp: Any) -> datetime | None:
+    def _parse_timestamp(self, timestamp: Any, field: str | None = None) -> datetime | None:
         """Parse various timestamp formats."""
-        if not timestamp:
-            return None
+        return self.parser.timestamps.parse(timestamp, field)
 
-        if isinstance(timestamp, datetime):
-            return timestamp
-
-        if isinstance(timestamp, (int, float)):
-            # Unix timestamp
-            return datetime.fromtimestamp(timestamp)
-
-        if isinstance(timestamp, str):
-            # Try common ISO formats
-            for fmt in [
-                "%Y-%m-%dT%H:%M:%S.%fZ",
-                "%Y-%m-%dT%H:%M:%SZ",
-                "%Y-%m-%dT%H:%M:%S",
-                "%Y-%m-%d %H:%M:%S",
-            ]:
-                try:
-                    return datetime.strptime(timestamp, fmt)
-                except ValueError:
-                    continue
-
-        return None
-
-    def get_arriving_ships(self, ships: list[dict[str, Any]]) -> list[dict[str, Any]]:
-        """Filter ships that are arriving."""
-        arriving = []
-        for ship in ships:
-            parsed = self.parse_ship_data(ship)
-            arrival_time = parsed.get("arrival_time") or parsed.get("eta")
-            if arrival_time and arrival_time > datetime.now():
-                arriving.append(parsed)
+    def timestamp_cache_info(self) -> Any:
+        """Return hit/miss statistics of the timestamp cache."""
+        return self.parser.timestamps.cache_info()
 
-        # Sort by arrival time
-        arriving.sort(key=lambda x: x.get("arrival_time") or x.get("eta") or datetime.max)
-        return arriving
+    def classify_ships(
+        self, ships: list[dict[str, Any]], now: datetime | None = None
+    ) -> ShipSnapshot:
+        """Parse every ship once and sort it into arriving/departing/in-harbor."""
+        with self.metrics.span("parse"):
+            parsed = self.parser.parse_all(ships)
+        with self.metrics.span("classify"):
+            return build_snapshot(parsed, len(ships), now)
 
-    def get_departing_ships(self, ships: list[dict[str, Any]]) -> list[dict[str, Any]]:
-        """Filter ships that are departing."""
-        departing = []
-        for ship in ships:
-            parsed = self.parse_ship_data(ship)
-            departure_time = parsed.get("departure_time") or parsed.get("etd")
-            if departure_time and departure_time > datetime.now():
-                departing.append(parsed)
+    def get_arriving_ships(self, ships: list[dict[str, Any]]) -> tuple[Ship, ...]:
+        """Filter ships that are arriving."""
+        return self.classify_ships(ships).arriving
 
-        # Sort by departure time
-        departing.sort(key=lambda x: x.get("departure_time") or x.get("etd") or datetime.max)
-        return departing
+    def get_departing_ships(self, ships: list[dict[str, Any]]) -> tuple[Ship, ...]:
+        """Filter ships that are departing."""
+        return self.classify_ships(ships).departing
 
-    def get_ships_in_harbor(self, ships: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    def get_ships_in_harbor(self, ships: list[dict[str, Any]]) -> tuple[Ship, ...]:
         """Filter ships currently in harbor."""
-        in_harbor = []
-        for ship in ships:
-            parsed = self.parse_ship_data(ship)
-            status = parsed.get("status", "").lower()
-            # Adjust status checks based on actual API values
-            if status in ["moored", "anchored", "at berth", "docked"]:
-                in_harbor.append(parsed)
+        return self.classify_ships(ships).in_harbor
+
+
+def build_snapshot(
+    ships: Iterable[Ship],
+    total_count: int | None = None,
+    now: datetime | None = None,
+    predict: bool = True,
+) -> ShipSnapshot:
+    """Predict missing ETAs, then sort ships into arriving/departing/in-harbor."""
+    if now is None:
+        now = datetime.now()
+    if predict:
+        ships = predict_arrivals(list(ships), now)
+
+    arriving: list[Ship] = []
+    departing: list[Ship] = []
+    in_harbor: list[Ship] = []
+    by_key: dict[str, Ship] = {}
+    count = 0
+
+    for ship in ships:
+        count += 1
+        by_key[ship_key(ship)] = ship
+
+        arrival_time = ship.arrival
+        if arrival_time and arrival_time > now:
+            arriving.append(ship)
+
+        departure_time = ship.departure
+        if departure_time and departure_time > now:
+            departing.append(ship)
+
+        if ship.in_harbor:
+            in_harbor.append(ship)
+
+    # Sort by arrival/departure time
+    arriving.sort(key=_ARRIVAL)
+    departing.sort(key=_DEPARTURE)
+
+    return ShipSnapshot(
+        arriving=tuple(arriving),
+        departing=tuple(departing),
+        in_harbor=tuple(in_harbor),
+        ships=by_key,
+        total_count=count if total_count is None else total_count,
+        generated_at=now,
+    )
+
 
-        return in_harbor
+def _drop_past(
+    ships: tuple[Ship, ...],
+    time_of: Callable[[Ship], datetime | None],
+    now: datetime,
+) -> tuple[Ship, ...]:
+    """Return a time-sorted ship tuple without the entries at or before now."""
+    index = bisect_right(ships, now, key=time_of)
+    return ships[index:] if index else ships
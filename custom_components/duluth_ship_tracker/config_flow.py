@@ -1,7 +1,9 @@
 """Config flow for Duluth Ship Tracker integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
 from typing import Any
 
 import voluptuous as vol
@@ -9,39 +11,85 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResult
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.selector import (
+    ObjectSelector,
+    TextSelector,
+    TextSelectorConfig,
+    TextSelectorType,
+)
 
-from .api import HarborLookoutApi, HarborLookoutApiError
 from .const import (
     CONF_ANNOUNCEMENT_TIME,
+    CONF_ENDPOINTS,
+    CONF_LIST_LIMIT,
+    CONF_LIST_WINDOW_HOURS,
+    CONF_MAX_MAP_SHIPS,
+    CONF_MAX_SHIP_DEVICES,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_PARSE_IN_PROCESS,
+    CONF_PROXIMITY_RADIUS,
+    CONF_SHIP_DEVICES,
     CONF_TTS_SERVICE,
+    CONF_VESSEL_REGISTRY,
     CONF_WARNING_MINUTES,
+    CONF_ZONES,
     DEFAULT_ANNOUNCEMENT_TIME,
+    DEFAULT_ENDPOINTS,
+    DEFAULT_LIST_LIMIT,
+    DEFAULT_LIST_WINDOW_HOURS,
+    DEFAULT_MAX_MAP_SHIPS,
+    DEFAULT_MAX_SHIP_DEVICES,
+    DEFAULT_MAX_UPDATE_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    DEFAULT_PROXIMITY_RADIUS,
     DEFAULT_TTS_SERVICE,
     DEFAULT_WARNING_MINUTES,
+    DEFAULT_ZONES,
     DOMAIN,
+    MAX_LIST_LIMIT,
+    MAX_MAP_SHIPS,
+    MAX_SHIP_DEVICES,
 )
+from .geo import zones_from_config
+from .hub import async_get_hub
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def validate_api(hass: HomeAssistant) -> bool:
-    """Validate the API connection."""
-    session = async_get_clientsession(hass)
-    api = HarborLookoutApi(session)
+ENDPOINTS_SELECTOR = TextSelector(
+    TextSelectorConfig(type=TextSelectorType.URL, multiple=True)
+)
+
+
+async def validate_api(
+    hass: HomeAssistant,
+    urls: list[str],
+    registry_path: str | None = None,
+    in_process: bool = False,
+) -> bool:
+    """Validate the API connection of every endpoint.
 
-    try:
-        await api.get_ships()
-        return True
-    except HarborLookoutApiError as err:
-        _LOGGER.error("Failed to connect to Harbor Lookout API: %s", err)
-        return False
+    Goes through the fetch hub, so the entry set up next reuses the result.
+    """
+    hub = async_get_hub(hass)
+    results = await asyncio.gather(
+        *(hub.async_validate(url, registry_path, in_process) for url in urls),
+        return_exceptions=True,
+    )
+
+    valid = bool(urls)
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            _LOGGER.error("Failed to connect to Harbor Lookout API at %s: %s", url, result)
+            valid = False
+    return valid
 
 
 class DuluthShipTrackerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Duluth Ship Tracker."""
 
-    VERSION = 1
+    VERSION = 2
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -51,7 +99,7 @@ class DuluthShipTrackerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             # Validate API connection
-            if await validate_api(self.hass):
+            if await validate_api(self.hass, user_input[CONF_ENDPOINTS]):
                 return self.async_create_entry(
                     title="Duluth Ship Tracker",
                     data={},
@@ -62,6 +110,10 @@ class DuluthShipTrackerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         # Show configuration form
         data_schema = vol.Schema(
             {
+                vol.Optional(
+                    CONF_ENDPOINTS,
+                    default=DEFAULT_ENDPOINTS,
+                ): ENDPOINTS_SELECTOR,
                 vol.Optional(
                     CONF_ANNOUNCEMENT_TIME,
                     default=DEFAULT_ANNOUNCEMENT_TIME,
@@ -102,13 +154,37 @@ class DuluthShipTrackerOptionsFlow(config_entries.OptionsFlow):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Manage the options."""
-        if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
-
+        errors: dict[str, str] = {}
         options = self.config_entry.options
 
+        if user_input is not None:
+            endpoints = user_input[CONF_ENDPOINTS]
+            unchanged = endpoints == options.get(CONF_ENDPOINTS, DEFAULT_ENDPOINTS)
+            registry_path = user_input.get(CONF_VESSEL_REGISTRY)
+            try:
+                zones_from_config(user_input[CONF_ZONES])
+            except (AttributeError, TypeError, ValueError):
+                errors[CONF_ZONES] = "invalid_zones"
+            if registry_path and not await self.hass.async_add_executor_job(
+                os.path.isfile, self.hass.config.path(registry_path)
+            ):
+                errors[CONF_VESSEL_REGISTRY] = "registry_not_found"
+            if not errors:
+                if unchanged or await validate_api(
+                    self.hass,
+                    endpoints,
+                    self.hass.config.path(registry_path) if registry_path else None,
+                    bool(user_input.get(CONF_PARSE_IN_PROCESS)),
+                ):
+                    return self.async_create_entry(title="", data=user_input)
+                errors["base"] = "cannot_connect"
+
         data_schema = vol.Schema(
             {
+                vol.Optional(
+                    CONF_ENDPOINTS,
+                    default=options.get(CONF_ENDPOINTS, DEFAULT_ENDPOINTS),
+                ): ENDPOINTS_SELECTOR,
                 vol.Optional(
                     CONF_ANNOUNCEMENT_TIME,
                     default=options.get(CONF_ANNOUNCEMENT_TIME, DEFAULT_ANNOUNCEMENT_TIME),
@@ -121,10 +197,55 @@ class DuluthShipTrackerOptionsFlow(config_entries.OptionsFlow):
                     CONF_TTS_SERVICE,
                     default=options.get(CONF_TTS_SERVICE, DEFAULT_TTS_SERVICE),
                 ): str,
+                vol.Optional(
+                    CONF_MIN_UPDATE_INTERVAL,
+                    default=options.get(CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=15)),
+                vol.Optional(
+                    CONF_MAX_UPDATE_INTERVAL,
+                    default=options.get(CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=15, max=240)),
+                vol.Optional(
+                    CONF_ZONES,
+                    default=options.get(CONF_ZONES, DEFAULT_ZONES),
+                ): ObjectSelector(),
+                vol.Optional(
+                    CONF_PROXIMITY_RADIUS,
+                    default=options.get(CONF_PROXIMITY_RADIUS, DEFAULT_PROXIMITY_RADIUS),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=100)),
+                vol.Optional(
+                    CONF_LIST_LIMIT,
+                    default=options.get(CONF_LIST_LIMIT, DEFAULT_LIST_LIMIT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_LIST_LIMIT)),
+                vol.Optional(
+                    CONF_LIST_WINDOW_HOURS,
+                    default=options.get(CONF_LIST_WINDOW_HOURS, DEFAULT_LIST_WINDOW_HOURS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=720)),
+                vol.Optional(
+                    CONF_SHIP_DEVICES,
+                    default=options.get(CONF_SHIP_DEVICES, False),
+                ): bool,
+                vol.Optional(
+                    CONF_MAX_SHIP_DEVICES,
+                    default=options.get(CONF_MAX_SHIP_DEVICES, DEFAULT_MAX_SHIP_DEVICES),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_SHIP_DEVICES)),
+                vol.Optional(
+                    CONF_MAX_MAP_SHIPS,
+                    default=options.get(CONF_MAX_MAP_SHIPS, DEFAULT_MAX_MAP_SHIPS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_MAP_SHIPS)),
+                vol.Optional(
+                    CONF_VESSEL_REGISTRY,
+                    description={"suggested_value": options.get(CONF_VESSEL_REGISTRY)},
+                ): str,
+                vol.Optional(
+                    CONF_PARSE_IN_PROCESS,
+                    default=options.get(CONF_PARSE_IN_PROCESS, False),
+                ): bool,
             }
         )
 
         return self.async_show_form(
             step_id="init",
             data_schema=data_schema,
+            errors=errors,
         )
@@ -2,23 +2,119 @@
 
 DOMAIN = "duluth_ship_tracker"
 
+# hass.data[DOMAIN] key of the fetch hub shared by all entries
+DATA_HUB = "hub"
+
 # API Configuration
 API_URL = "https://prod-harbor-lookout-api-huckbngcchcfcwb8.centralus-01.azurewebsites.net/api/Display/shipsForDisplay"
 API_TIMEOUT = 30
 
+# Endpoints of one entry fetched at the same time
+MAX_CONCURRENT_FETCHES = 4
+
+# Responses larger than this (or of unknown size) are decoded as a stream
+STREAM_THRESHOLD_BYTES = 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# With the process option, bodies at least this large are parsed in a worker process
+PROCESS_THRESHOLD_BYTES = 4 * 1024 * 1024
+
+# Entries and the config flow share a fetch of the same endpoint this recent
+FETCH_SHARE_SECONDS = 45
+
+# Number of distinct timestamp strings kept in the parse cache
+TIMESTAMP_CACHE_SIZE = 4096
+
+# Status values (lowercase) that mean a ship is in the harbor
+IN_HARBOR_STATUSES = frozenset({"moored", "anchored", "at berth", "docked"})
+
+# Persistent snapshot cache
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10
+
+# Voyage history
+HISTORY_RETENTION_DAYS = 5 * 365
+HISTORY_COMPACT_INTERVAL_HOURS = 24
+
+# Geofences; polygons are [latitude, longitude] vertices
+DULUTH_SHIP_CANAL = (46.7793, -92.0929)
+DEFAULT_ZONES = {
+    "Duluth Ship Canal": [
+        [46.7822, -92.0968],
+        [46.7822, -92.0890],
+        [46.7764, -92.0890],
+        [46.7764, -92.0968],
+    ],
+    "Superior Entry": [
+        [46.7140, -92.0090],
+        [46.7140, -92.0000],
+        [46.7075, -92.0000],
+        [46.7075, -92.0090],
+    ],
+}
+
+# ETA prediction for underway ships without a usable ETA
+SUPERIOR_ENTRY = (46.7107, -92.0045)
+HARBOR_ENTRIES = (DULUTH_SHIP_CANAL, SUPERIOR_ENTRY)
+PREDICTION_MIN_SPEED = 1.0  # knots
+PREDICTION_STALE_HOURS = 2
+PREDICTION_MAX_HOURS = 48
+KM_PER_NM = 1.852
+
+# Position tracks; 720 fixes is a day of polling every 2 minutes
+TRACK_MAX_POINTS = 720
+TRACK_RETENTION_HOURS = 24
+DEFAULT_TRACK_TOLERANCE = 0.05  # nautical miles
+
+# Ships with their own device and sensors, most recently active first
+DEFAULT_MAX_SHIP_DEVICES = 25
+MAX_SHIP_DEVICES = 200
+
+# Ships shown on the map, nearest the Duluth Ship Canal first; 0 shows none
+DEFAULT_MAX_MAP_SHIPS = 50
+MAX_MAP_SHIPS = 500
+
+# Ships named per direction in the spoken daily summary
+DIGEST_SPOKEN_SHIPS = 3
+
+# Ships listed in a list sensor's attributes; HA does not record attributes
+# over 16 KB, and one listed ship takes about 200 bytes
+DEFAULT_LIST_LIMIT = 50
+MAX_LIST_LIMIT = 75
+
+# Per-ship deltas listed by the ship changes sensor; a delta of an added ship
+# takes up to about 250 bytes
+CHANGES_LISTED = 25
+
 # Update intervals
 UPDATE_INTERVAL_MINUTES = 15
-ANNOUNCEMENT_CHECK_INTERVAL_MINUTES = 1
 
 # Configuration keys
 CONF_ANNOUNCEMENT_TIME = "announcement_time"
 CONF_WARNING_MINUTES = "warning_minutes"
 CONF_TTS_SERVICE = "tts_service"
+CONF_MIN_UPDATE_INTERVAL = "min_update_interval"
+CONF_MAX_UPDATE_INTERVAL = "max_update_interval"
+CONF_ENDPOINTS = "endpoints"
+CONF_ZONES = "zones"
+CONF_PROXIMITY_RADIUS = "proximity_radius"
+CONF_VESSEL_REGISTRY = "vessel_registry"
+CONF_PARSE_IN_PROCESS = "parse_in_process"
+CONF_LIST_LIMIT = "list_limit"
+CONF_LIST_WINDOW_HOURS = "list_window_hours"
+CONF_SHIP_DEVICES = "ship_devices"
+CONF_MAX_SHIP_DEVICES = "max_ship_devices"
+CONF_MAX_MAP_SHIPS = "max_map_ships"
 
 # Default values
 DEFAULT_ANNOUNCEMENT_TIME = "08:00"
 DEFAULT_WARNING_MINUTES = 15
 DEFAULT_TTS_SERVICE = "tts.google_translate_say"
+DEFAULT_MIN_UPDATE_INTERVAL = 2
+DEFAULT_MAX_UPDATE_INTERVAL = 60
+DEFAULT_ENDPOINTS = [API_URL]
+DEFAULT_PROXIMITY_RADIUS = 5
+DEFAULT_LIST_WINDOW_HOURS = 0  # no window
 
 # Attributes
 ATTR_SHIP_NAME = "ship_name"
@@ -41,4 +137,13 @@ ATTR_LAST_UPDATE = "last_update"
 # Event types
 EVENT_SHIP_ARRIVING = "duluth_ship_tracker_ship_arriving"
 EVENT_SHIP_DEPARTING = "duluth_ship_tracker_ship_departing"
+EVENT_SHIP_ARRIVAL_WARNING = "duluth_ship_tracker_arrival_warning"
+EVENT_SHIP_DEPARTURE_WARNING = "duluth_ship_tracker_departure_warning"
 EVENT_DAILY_ANNOUNCEMENT = "duluth_ship_tracker_daily_announcement"
+EVENT_ZONE_ENTERED = "duluth_ship_tracker_zone_entered"
+EVENT_ZONE_EXITED = "duluth_ship_tracker_zone_exited"
+
+# Services
+SERVICE_SHIP_VISITS = "ship_visits"
+SERVICE_DWELL_TIMES = "dwell_times"
+SERVICE_SHIP_TRACKS = "ship_tracks"
@@ -1,47 +1,239 @@
 """Data update coordinator for Duluth Ship Tracker."""
 from __future__ import annotations
 
-from datetime import timedelta
+from collections.abc import Iterable
+from dataclasses import replace
+from datetime import datetime, timedelta
 import logging
 from typing import Any
 
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .api import HarborLookoutApi, HarborLookoutApiError
-from .const import DOMAIN, UPDATE_INTERVAL_MINUTES
+from .api import HarborLookoutApiError, Ship, ShipSnapshot, build_snapshot
+from .const import (
+    ATTR_ARRIVAL_TIME,
+    ATTR_CARGO,
+    ATTR_DEPARTURE_TIME,
+    ATTR_DESTINATION,
+    ATTR_LATITUDE,
+    ATTR_LONGITUDE,
+    ATTR_SHIP_NAME,
+    ATTR_SHIP_TYPE,
+    DEFAULT_ANNOUNCEMENT_TIME,
+    DEFAULT_MAX_UPDATE_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    DEFAULT_WARNING_MINUTES,
+    DOMAIN,
+    EVENT_SHIP_ARRIVING,
+    EVENT_SHIP_DEPARTING,
+    EVENT_ZONE_ENTERED,
+    EVENT_ZONE_EXITED,
+    UPDATE_INTERVAL_MINUTES,
+)
+from .diff import SnapshotDiff, diff_snapshots
+from .digest import DailyAnnouncer, DailyDigest, build_digest, local_day
+from .geo import GeoTracker, Zone
+from .history import MovementTally, VoyageHistory, transitions_from_diff
+from .polling import AdaptivePollInterval
+from .ports import MultiPortApi
+from .scheduler import WarningScheduler
+from .storage import SnapshotStore
+from .tracks import ShipTracks
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class DuluthShipTrackerCoordinator(DataUpdateCoordinator):
+class DuluthShipTrackerCoordinator(DataUpdateCoordinator[ShipSnapshot]):
     """Class to manage fetching Duluth ship data."""
 
     def __init__(
         self,
         hass: HomeAssistant,
-        api: HarborLookoutApi,
+        api: MultiPortApi,
+        warning_minutes: int = DEFAULT_WARNING_MINUTES,
+        min_update_interval: int = DEFAULT_MIN_UPDATE_INTERVAL,
+        max_update_interval: int = DEFAULT_MAX_UPDATE_INTERVAL,
+        store: SnapshotStore | None = None,
+        history: VoyageHistory | None = None,
+        zones: Iterable[Zone] = (),
+        announcement_time: str = DEFAULT_ANNOUNCEMENT_TIME,
     ) -> None:
         """Initialize the coordinator."""
+        self.polling = AdaptivePollInterval(
+            floor=timedelta(minutes=min_update_interval),
+            ceiling=timedelta(minutes=max_update_interval),
+            default=timedelta(minutes=UPDATE_INTERVAL_MINUTES),
+        )
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(minutes=UPDATE_INTERVAL_MINUTES),
+            update_interval=self.polling.interval,
         )
         self.api = api
+        self.metrics = api.metrics
+        self.last_diff = SnapshotDiff()
+        self.warnings = WarningScheduler(hass, warning_minutes)
+        self.store = store
+        self.history = history
+        self.geo = GeoTracker(zones)
+        self.tracks = ShipTracks()
+        self.movements = MovementTally()
+        self.announcer = DailyAnnouncer(hass, self.daily_digest, announcement_time)
+        self._digest: DailyDigest | None = None
+        self._digest_generation: int | None = None
+
+    def daily_digest(self, now: datetime | None = None) -> DailyDigest | None:
+        """Return today's digest, built once per snapshot generation and day.
+
+        It is also rebuilt once its next movement is due, so the `passed`
+        marks are current when the announcement fires between polls.
+        """
+        if (data := self.data) is None:
+            return None
+        if now is None:
+            now = datetime.now()
+        digest = self._digest
+        if (
+            digest is None
+            or self._digest_generation != data.generation
+            or digest.day != local_day(now)
+            or (digest.next_movement is not None and digest.next_movement <= now)
+        ):
+            digest = self._digest = build_digest(data, now)
+            self._digest_generation = data.generation
+        return digest
+
+    async def async_restore(self) -> bool:
+        """Publish the cached snapshot, if any, before the first API call."""
+        if self.store is None or (snapshot := await self.store.async_load()) is None:
+            return False
+
+        self.warnings.async_update(snapshot)
+        self.geo.update(snapshot)
+        self.tracks.update(snapshot)
+        self.async_set_updated_data(snapshot)
+        return True
 
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Fetch data from API."""
+    async def _async_update_data(self) -> ShipSnapshot:
+        """Fetch data from API, timing the poll if metrics are enabled."""
+        registry = self.api.registry
+        if registry is not None and not registry.loaded:
+            await self.hass.async_add_executor_job(registry.load)
+
+        metrics = self.metrics
+        metrics.begin()
+        hits, misses = self.api.timestamp_cache_info()
+        snapshot: ShipSnapshot | None = None
+        try:
+            with metrics.span("update"):
+                snapshot = await self._async_poll()
+            return snapshot
+        finally:
+            new_hits, new_misses = self.api.timestamp_cache_info()
+            metrics.count("timestamp_hits", new_hits - hits)
+            metrics.count("timestamp_misses", new_misses - misses)
+            metrics.count("ships", len(snapshot.ships) if snapshot else 0)
+            metrics.count("consecutive_failures", self.polling.failures)
+            metrics.end(snapshot is not None and self.polling.failures == 0)
+
+    async def _async_poll(self) -> ShipSnapshot:
+        """Fetch, classify and diff the ship data."""
         try:
-            ships = await self.api.get_ships()
-
-            return {
-                "raw_ships": ships,
-                "arriving": self.api.get_arriving_ships(ships),
-                "departing": self.api.get_departing_ships(ships),
-                "in_harbor": self.api.get_ships_in_harbor(ships),
-                "total_count": len(ships),
-            }
+            fetched = await self.api.get_snapshot_if_changed()
         except HarborLookoutApiError as err:
-            raise UpdateFailed(f"Error communicating with API: {err}") from err
+            self.update_interval = self.polling.failure()
+            if self.data is None:
+                raise UpdateFailed(f"Error communicating with API: {err}") from err
+            # Keep serving the last good data through an outage; nothing changed,
+            # so listeners must not see the previous poll's diff again
+            _LOGGER.warning("Using previous ship data, API unavailable: %s", err)
+            self.last_diff = SnapshotDiff()
+            return self.data.without_past()
+
+        previous = self.data
+        if fetched is None and previous is not None:
+            # Nothing changed upstream; only let passed ETAs/ETDs expire
+            snapshot = self._process(previous, previous.without_past())
+        else:
+            snapshot = self._process(previous, fetched or build_snapshot(()))
+
+        self.update_interval = self.polling.success(snapshot)
+        _LOGGER.debug(
+            "Next update in %s (%s)", self.update_interval, self.polling.reason
+        )
+        return snapshot
+
+    def _process(self, previous: ShipSnapshot | None, snapshot: ShipSnapshot) -> ShipSnapshot:
+        """Diff the new snapshot against the previous one and fire events."""
+        if previous is not None and snapshot is not previous:
+            # Freshly classified feeds start at 0; keep generations increasing
+            snapshot = replace(
+                snapshot, generation=max(snapshot.generation, previous.generation + 1)
+            )
+
+        if previous is None or previous.ships is not snapshot.ships:
+            if self.store is not None:
+                self.store.async_save(snapshot)
+
+        if previous is None:
+            # First refresh: nothing to compare with, and no event storm on startup
+            self.last_diff = SnapshotDiff()
+            self.warnings.async_update(snapshot)
+            self.geo.update(snapshot)
+            self.tracks.update(snapshot)
+            return snapshot
+
+        self.last_diff = diff = diff_snapshots(previous, snapshot)
+        if diff:
+            _LOGGER.debug(
+                "Ship changes: %d added, %d removed, %d changed",
+                len(diff.added),
+                len(diff.removed),
+                len(diff.changed),
+            )
+            self.warnings.async_update(snapshot, diff)
+            transitions = transitions_from_diff(diff, snapshot)
+            self.movements.add(transitions, snapshot.generated_at)
+            if self.history is not None:
+                self.history.async_record(transitions)
+            self.tracks.update(snapshot, diff)
+            for change in self.geo.update(snapshot, diff):
+                data = _event_data(change.ship)
+                data["zone"] = change.zone.name
+                data[ATTR_LATITUDE] = change.ship.latitude
+                data[ATTR_LONGITUDE] = change.ship.longitude
+                self.hass.bus.async_fire(
+                    EVENT_ZONE_ENTERED if change.entered else EVENT_ZONE_EXITED, data
+                )
+
+        for ship in diff.arriving:
+            self.hass.bus.async_fire(
+                EVENT_SHIP_ARRIVING,
+                _event_data(ship, ATTR_ARRIVAL_TIME, ship.arrival),
+            )
+        for ship in diff.departing:
+            self.hass.bus.async_fire(
+                EVENT_SHIP_DEPARTING,
+                _event_data(ship, ATTR_DEPARTURE_TIME, ship.departure),
+            )
+
+        return snapshot
+
+
+def _event_data(
+    ship: Ship, time_attr: str | None = None, time: datetime | None = None
+) -> dict[str, Any]:
+    """Build the event payload for a ship, with an optional time attribute."""
+    data = {
+        ATTR_SHIP_NAME: ship.ship_name,
+        "mmsi": ship.mmsi,
+        "imo": ship.imo,
+        ATTR_SHIP_TYPE: ship.ship_type,
+        ATTR_CARGO: ship.cargo,
+        ATTR_DESTINATION: ship.destination,
+    }
+    if time_attr is not None and time is not None:
+        data[time_attr] = time.isoformat()
+    return data
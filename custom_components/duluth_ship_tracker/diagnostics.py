@@ -0,0 +1,40 @@
+"""Diagnostics support for Duluth Ship Tracker."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_HUB, DOMAIN
+from .coordinator import DuluthShipTrackerCoordinator
+from .hub import FetchHub
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: DuluthShipTrackerCoordinator = hass.data[DOMAIN][entry.entry_id]
+    snapshot = coordinator.data
+    hub: FetchHub | None = hass.data[DOMAIN].get(DATA_HUB)
+
+    return {
+        "options": dict(entry.options),
+        "last_update_success": coordinator.last_update_success,
+        "polling": coordinator.polling.as_dict(),
+        "endpoints": coordinator.api.as_dict(),
+        "shared_fetches": hub.as_dict() if hub is not None else None,
+        "geo": coordinator.geo.as_dict(),
+        "tracks": coordinator.tracks.as_dict(),
+        "registry": coordinator.api.registry.as_dict(),
+        "metrics": coordinator.metrics.as_dict(),
+        "announcement_time": coordinator.announcer.at.isoformat(),
+        "snapshot": {
+            "generated_at": snapshot.generated_at.isoformat(),
+            "total_count": snapshot.total_count,
+            "arriving": len(snapshot.arriving),
+            "departing": len(snapshot.departing),
+            "in_harbor": len(snapshot.in_harbor),
+        },
+    }
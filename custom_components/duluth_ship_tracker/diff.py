@@ -0,0 +1,137 @@
+"""Change detection between consecutive ship snapshots."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .api import Ship, ShipSnapshot
+
+
+def ship_key(ship: Ship) -> str:
+    """Return a stable identity for a parsed ship: MMSI, then IMO, then name."""
+    if mmsi := ship.mmsi:
+        return f"mmsi:{mmsi}"
+    if imo := ship.imo:
+        return f"imo:{imo}"
+    return f"name:{str(ship.ship_name or 'Unknown').strip().lower()}"
+
+
+@dataclass(frozen=True)
+class ShipChange:
+    """Field-level changes of one ship between two snapshots."""
+
+    key: str
+    ship: Ship
+    changes: dict[str, tuple[Any, Any]]
+
+
+@dataclass(frozen=True)
+class SnapshotDiff:
+    """Ships added, removed and changed between two snapshots."""
+
+    added: list[Ship] = field(default_factory=list)
+    removed: list[Ship] = field(default_factory=list)
+    changed: list[ShipChange] = field(default_factory=list)
+    arriving: list[Ship] = field(default_factory=list)
+    departing: list[Ship] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        """Return True if anything changed."""
+        return bool(self.added or self.removed or self.changed)
+
+
+def diff_ships(
+    old: dict[str, Ship], new: dict[str, Ship]
+) -> tuple[list[Ship], list[Ship], list[ShipChange]]:
+    """Compare two keyed ship tables."""
+    added = [ship for key, ship in new.items() if key not in old]
+    removed = [ship for key, ship in old.items() if key not in new]
+    changed: list[ShipChange] = []
+
+    for key, ship in new.items():
+        previous = old.get(key)
+        if previous is None or previous is ship or previous == ship:
+            continue
+        changes = {
+            name: (getattr(previous, name), getattr(ship, name))
+            for name in ship.__slots__
+            if getattr(previous, name) != getattr(ship, name)
+        }
+        changed.append(ShipChange(key, ship, changes))
+
+    return added, removed, changed
+
+
+def entered(
+    old: tuple[Ship, ...],
+    new: tuple[Ship, ...],
+    time_of: Callable[[Ship], datetime | None],
+) -> list[Ship]:
+    """Return ships of `new` that are not in `old` or whose time changed."""
+    previous = {ship_key(ship): time_of(ship) for ship in old}
+    return [ship for ship in new if previous.get(ship_key(ship)) != time_of(ship)]
+
+
+def diff_snapshots(old: ShipSnapshot, new: ShipSnapshot) -> SnapshotDiff:
+    """Compare two snapshots ship by ship."""
+    if old is new or old.ships is new.ships:
+        # Same feed; at most some arrivals/departures expired
+        return SnapshotDiff()
+
+    added, removed, changed = diff_ships(old.ships, new.ships)
+    return SnapshotDiff(
+        added=added,
+        removed=removed,
+        changed=changed,
+        arriving=entered(old.arriving, new.arriving, attrgetter("arrival")),
+        departing=entered(old.departing, new.departing, attrgetter("departure")),
+    )
+
+
+def _epoch(value: datetime | None) -> int | None:
+    """Return a naive local time as whole seconds since the epoch."""
+    return int(value.timestamp()) if value is not None else None
+
+
+def _compact(ship: Ship) -> dict[str, Any]:
+    """Return the fields of a ship that the change feed reports."""
+    return {
+        "name": ship.ship_name,
+        "status": ship.status,
+        "destination": ship.destination,
+        "arrival": _epoch(ship.arrival),
+        "departure": _epoch(ship.departure),
+    }
+
+
+def compact_changes(diff: SnapshotDiff) -> list[dict[str, Any]]:
+    """Encode a diff as small per-ship deltas for the recorder.
+
+    Added ships come first with the fields they have, then changed ships with
+    only the ones that changed (None if cleared), then removed ships with
+    just `removed`.  Times are epoch seconds, and ships that only moved are
+    left out.
+    """
+    entries: list[dict[str, Any]] = [
+        {
+            "key": ship_key(ship),
+            **{name: value for name, value in _compact(ship).items() if value is not None},
+        }
+        for ship in diff.added
+    ]
+    for change in diff.changed:
+        previous = _compact(
+            replace(change.ship, **{name: old for name, (old, _) in change.changes.items()})
+        )
+        if delta := {
+            name: value
+            for name, value in _compact(change.ship).items()
+            if previous[name] != value
+        }:
+            entries.append({"key": change.key, **delta})
+    entries.extend({"key": ship_key(ship), "removed": True} for ship in diff.removed)
+    return entries
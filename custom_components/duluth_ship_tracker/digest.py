@@ -0,0 +1,243 @@
+"""Daily schedule digest and announcement for Duluth Ship Tracker."""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+import logging
+from operator import attrgetter
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.util import dt as dt_util
+
+from .api import Ship, ShipSnapshot
+from .const import (
+    ATTR_ARRIVAL_TIME,
+    ATTR_DEPARTURE_TIME,
+    DEFAULT_ANNOUNCEMENT_TIME,
+    DIGEST_SPOKEN_SHIPS,
+    EVENT_DAILY_ANNOUNCEMENT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_ARRIVAL = attrgetter("arrival")
+_DEPARTURE = attrgetter("departure")
+
+
+def _local(value: datetime) -> datetime:
+    """Convert a naive local time to Home Assistant's time zone."""
+    return value.astimezone(dt_util.DEFAULT_TIME_ZONE)
+
+
+def local_day(value: datetime) -> date:
+    """Return the calendar day of a naive local time in Home Assistant's zone."""
+    return _local(value).date()
+
+
+def format_time(value: datetime) -> str:
+    """Return a clock time the way it is spoken: "9:05 AM"."""
+    return _local(value).strftime("%I:%M %p").lstrip("0")
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    """Return the naive local start and end of a day in Home Assistant's zone."""
+    zone = dt_util.DEFAULT_TIME_ZONE
+    start = datetime.combine(day, time(), zone)
+    end = datetime.combine(day + timedelta(days=1), time(), zone)
+    return (
+        start.astimezone().replace(tzinfo=None),
+        end.astimezone().replace(tzinfo=None),
+    )
+
+
+def _plural(count: int, noun: str = "ship") -> str:
+    """Return "1 ship" or "3 ships"."""
+    return f"{count} {noun}{'' if count == 1 else 's'}"
+
+
+def _spoken_list(items: list[str]) -> str:
+    """Join phrases as "a, b and c"."""
+    if len(items) < 2:
+        return "".join(items)
+    return f"{', '.join(items[:-1])} and {items[-1]}"
+
+
+@dataclass(frozen=True, slots=True)
+class DailyDigest:
+    """Arrivals and departures of one local day, ready to display or speak."""
+
+    day: date
+    arrivals: tuple[dict[str, Any], ...] = ()
+    departures: tuple[dict[str, Any], ...] = ()
+    in_harbor: int = 0
+    summary: str = ""
+    # Time of the next movement still to come today; the digest is stale then
+    next_movement: datetime | None = None
+
+    @property
+    def movements(self) -> int:
+        """Return the number of arrivals and departures."""
+        return len(self.arrivals) + len(self.departures)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the digest as event data and sensor attributes."""
+        return {
+            "date": self.day.isoformat(),
+            "arrivals": list(self.arrivals),
+            "departures": list(self.departures),
+            "arriving_count": len(self.arrivals),
+            "departing_count": len(self.departures),
+            "arrived_count": sum(entry["passed"] for entry in self.arrivals),
+            "departed_count": sum(entry["passed"] for entry in self.departures),
+            "in_harbor_count": self.in_harbor,
+            "summary": self.summary,
+        }
+
+
+def _entries(
+    ships: Iterable[Ship],
+    time_of: Callable[[Ship], datetime | None],
+    time_attr: str,
+    start: datetime,
+    end: datetime,
+    now: datetime,
+) -> tuple[tuple[dict[str, Any], ...], datetime | None]:
+    """Return the display entries of the ships moving between start and end.
+
+    Entries are in time order; those at or before `now` are marked `passed`.
+    Also returns the time of the first one still to come.
+    """
+    day = sorted(
+        (when, index, ship)
+        for index, ship in enumerate(ships)
+        if (when := time_of(ship)) is not None and start <= when < end
+    )
+    entries = tuple(
+        {
+            "name": ship.ship_name,
+            "type": ship.ship_type,
+            "cargo": ship.cargo,
+            time_attr: when.isoformat(),
+            "time": format_time(when),
+            "passed": when <= now,
+        }
+        for when, _index, ship in day
+    )
+    return entries, next((when for when, _index, _ship in day if when > now), None)
+
+
+def _sentences(
+    entries: tuple[dict[str, Any], ...], verb: str, past_verb: str
+) -> list[str]:
+    """Describe one direction.
+
+    E.g. "1 ship arrived earlier today." and "2 ships arriving today:
+    A at 9:05 AM and B at 1:30 PM."
+    """
+    sentences = []
+    upcoming = [entry for entry in entries if not entry["passed"]]
+    if passed := len(entries) - len(upcoming):
+        sentences.append(f"{_plural(passed)} {past_verb} earlier today.")
+    if upcoming:
+        spoken = [
+            f"{entry['name']} at {entry['time']}"
+            for entry in upcoming[:DIGEST_SPOKEN_SHIPS]
+        ]
+        if (more := len(upcoming) - len(spoken)) > 0:
+            spoken.append(_plural(more, "other"))
+        sentences.append(f"{_plural(len(upcoming))} {verb} today: {_spoken_list(spoken)}.")
+    return sentences
+
+
+def build_digest(snapshot: ShipSnapshot, now: datetime | None = None) -> DailyDigest:
+    """Summarize the arrivals and departures of today in a snapshot.
+
+    The whole local day is covered, from midnight, so movements that have
+    already happened are listed (marked `passed`) next to those to come.
+    The arriving and departing views only hold future movements, so the
+    ships are taken from the full snapshot.
+    """
+    if now is None:
+        now = datetime.now()
+    today = local_day(now)
+
+    start, end = day_bounds(today)
+    ships = snapshot.ships.values()
+    arrivals, next_arrival = _entries(ships, _ARRIVAL, ATTR_ARRIVAL_TIME, start, end, now)
+    departures, next_departure = _entries(
+        ships, _DEPARTURE, ATTR_DEPARTURE_TIME, start, end, now
+    )
+    in_harbor = len(snapshot.in_harbor)
+
+    sentences = _sentences(arrivals, "arriving", "arrived")
+    sentences.extend(_sentences(departures, "departing", "departed"))
+    if in_harbor:
+        sentences.append(f"{_plural(in_harbor)} currently in harbor.")
+    if not arrivals and not departures:
+        sentences.append("No ships scheduled for arrival or departure today.")
+
+    return DailyDigest(
+        day=today,
+        arrivals=arrivals,
+        departures=departures,
+        in_harbor=in_harbor,
+        summary=" ".join(sentences),
+        next_movement=min(
+            (when for when in (next_arrival, next_departure) if when is not None),
+            default=None,
+        ),
+    )
+
+
+class DailyAnnouncer:
+    """Fire the daily announcement event at the configured time of day."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        digest: Callable[[], DailyDigest | None],
+        announcement_time: str = DEFAULT_ANNOUNCEMENT_TIME,
+    ) -> None:
+        """Initialize the announcer."""
+        self.hass = hass
+        self._digest = digest
+        if (at := dt_util.parse_time(str(announcement_time))) is None:
+            _LOGGER.warning(
+                "Invalid announcement time %r, using %s",
+                announcement_time,
+                DEFAULT_ANNOUNCEMENT_TIME,
+            )
+            at = dt_util.parse_time(DEFAULT_ANNOUNCEMENT_TIME)
+        self.at: time = at
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start the daily timer."""
+        self.async_stop()
+        self._unsub = async_track_time_change(
+            self.hass,
+            self._async_announce,
+            hour=self.at.hour,
+            minute=self.at.minute,
+            second=self.at.second,
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the daily timer."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_announce(self, _now: datetime) -> None:
+        """Fire the event with today's digest."""
+        if (digest := self._digest()) is None:
+            _LOGGER.debug("No ship data yet, skipping the daily announcement")
+            return
+        _LOGGER.debug("Daily announcement: %s", digest.summary)
+        self.hass.bus.async_fire(EVENT_DAILY_ANNOUNCEMENT, digest.as_dict())
@@ -0,0 +1,275 @@
+"""Spatial index and geofences for Duluth Ship Tracker."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+import math
+from typing import TYPE_CHECKING, Any
+
+from .diff import ship_key
+
+if TYPE_CHECKING:
+    from .api import Ship, ShipSnapshot
+    from .diff import SnapshotDiff
+
+EARTH_RADIUS_NM = 3440.065
+
+# Grid cell size; 0.1° is about 6 nm north-south
+CELL_DEGREES = 0.1
+
+# Search radii tried by SpatialIndex.nearest before scanning everything
+_NEAREST_RADII_NM = (5.0, 20.0, 80.0, 320.0)
+
+Cell = tuple[int, int]
+Position = tuple[float, float]
+
+
+def distance_nm(a: Position, b: Position) -> float:
+    """Return the great-circle distance between two points in nautical miles."""
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_NM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def ship_position(ship: Ship) -> Position | None:
+    """Return a ship's position, or None if it has no usable one."""
+    try:
+        lat, lon = float(ship.latitude), float(ship.longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or (lat == 0 and lon == 0):
+        return None
+    return lat, lon
+
+
+def _cell(position: Position) -> Cell:
+    """Return the grid cell of a position."""
+    return (
+        math.floor(position[0] / CELL_DEGREES),
+        math.floor(position[1] / CELL_DEGREES),
+    )
+
+
+def _cells(south: float, west: float, north: float, east: float) -> Iterator[Cell]:
+    """Yield every grid cell overlapping a bounding box."""
+    (row0, col0), (row1, col1) = _cell((south, west)), _cell((north, east))
+    for row in range(row0, row1 + 1):
+        for col in range(col0, col1 + 1):
+            yield row, col
+
+
+@dataclass(frozen=True)
+class Zone:
+    """A named polygon, given as (latitude, longitude) vertices."""
+
+    name: str
+    polygon: tuple[Position, ...]
+    bounds: tuple[float, float, float, float] = field(init=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Precompute the bounding box."""
+        lats = [lat for lat, _ in self.polygon]
+        lons = [lon for _, lon in self.polygon]
+        object.__setattr__(self, "bounds", (min(lats), min(lons), max(lats), max(lons)))
+
+    def contains(self, position: Position) -> bool:
+        """Return True if a position lies inside the polygon (ray casting)."""
+        lat, lon = position
+        south, west, north, east = self.bounds
+        if not (south <= lat <= north and west <= lon <= east):
+            return False
+
+        inside = False
+        vertices = self.polygon
+        for (lat1, lon1), (lat2, lon2) in zip(vertices, vertices[1:] + vertices[:1]):
+            if (lat1 > lat) != (lat2 > lat):
+                crossing = lon1 + (lon2 - lon1) * (lat - lat1) / (lat2 - lat1)
+                if lon < crossing:
+                    inside = not inside
+        return inside
+
+
+def zones_from_config(config: Mapping[str, Sequence[Sequence[float]]]) -> list[Zone]:
+    """Build zones from a {name: [[lat, lon], ...]} mapping.
+
+    Raises ValueError if a polygon has fewer than three valid vertices.
+    """
+    zones = []
+    for name, vertices in config.items():
+        polygon = tuple((float(lat), float(lon)) for lat, lon in vertices)
+        if len(polygon) < 3:
+            raise ValueError(f"Zone {name} needs at least three points")
+        zones.append(Zone(str(name), polygon))
+    return zones
+
+
+class SpatialIndex:
+    """Uniform grid of ship positions, keyed by ship key."""
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self.positions: dict[str, Position] = {}
+        self._grid: dict[Cell, set[str]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed ships."""
+        return len(self.positions)
+
+    def move(self, key: str, position: Position | None) -> bool:
+        """Insert, move or (with None) remove a ship; return True if it moved."""
+        old = self.positions.get(key)
+        if old == position:
+            return False
+        if old is not None:
+            cell = _cell(old)
+            members = self._grid[cell]
+            members.discard(key)
+            if not members:
+                del self._grid[cell]
+        if position is None:
+            del self.positions[key]
+        else:
+            self.positions[key] = position
+            self._grid.setdefault(_cell(position), set()).add(key)
+        return True
+
+    def within(self, center: Position, radius_nm: float) -> list[tuple[float, str]]:
+        """Return (distance, key) of ships within a radius, nearest first."""
+        lat, lon = center
+        dlat = radius_nm / 60
+        dlon = radius_nm / (60 * max(math.cos(math.radians(lat)), 0.01))
+        found = []
+        for cell in _cells(lat - dlat, lon - dlon, lat + dlat, lon + dlon):
+            for key in self._grid.get(cell, ()):
+                distance = distance_nm(center, self.positions[key])
+                if distance <= radius_nm:
+                    found.append((distance, key))
+        found.sort()
+        return found
+
+    def nearest(self, center: Position) -> tuple[float, str] | None:
+        """Return (distance, key) of the ship closest to a point."""
+        if not self.positions:
+            return None
+        for radius in _NEAREST_RADII_NM:
+            if found := self.within(center, radius):
+                return found[0]
+        return min(
+            (distance_nm(center, position), key)
+            for key, position in self.positions.items()
+        )
+
+
+@dataclass(frozen=True)
+class ZoneChange:
+    """A ship entering or leaving a zone."""
+
+    zone: Zone
+    ship: Ship
+    entered: bool
+
+
+class GeoTracker:
+    """Keep ship positions indexed and zone membership up to date.
+
+    Zones are indexed by the grid cells their bounding boxes cover, so a ship
+    is only tested against the few zones near it, and only when it moves.
+    """
+
+    def __init__(self, zones: Iterable[Zone] = ()) -> None:
+        """Initialize the tracker."""
+        self.zones = {zone.name: zone for zone in zones}
+        self.index = SpatialIndex()
+        self.ships: dict[str, Ship] = {}
+        self.members: dict[str, set[str]] = {name: set() for name in self.zones}
+        self._inside: dict[str, frozenset[str]] = {}
+        self._zone_grid: dict[Cell, list[Zone]] = {}
+        for zone in self.zones.values():
+            for cell in _cells(*zone.bounds):
+                self._zone_grid.setdefault(cell, []).append(zone)
+
+    def update(
+        self, snapshot: ShipSnapshot, diff: SnapshotDiff | None = None
+    ) -> list[ZoneChange]:
+        """Apply a new snapshot and return the zone entries and exits.
+
+        Without a diff every ship is placed again; with one only the added,
+        removed and changed ships are touched.
+        """
+        changes: list[ZoneChange] = []
+        if diff is None:
+            for key in set(self.ships) - set(snapshot.ships):
+                self._place(key, None, changes)
+            for key, ship in snapshot.ships.items():
+                self._place(key, ship, changes)
+            return changes
+
+        for ship in diff.removed:
+            self._place(ship_key(ship), None, changes)
+        for ship in diff.added:
+            self._place(ship_key(ship), ship, changes)
+        for change in diff.changed:
+            self._place(change.key, change.ship, changes)
+        return changes
+
+    def _place(self, key: str, ship: Ship | None, changes: list[ZoneChange]) -> None:
+        """Move one ship in the index and record zone transitions."""
+        if ship is None:
+            old_ship = self.ships.pop(key, None)
+        else:
+            old_ship, self.ships[key] = self.ships.get(key), ship
+        position = None if ship is None else ship_position(ship)
+        if not self.index.move(key, position):
+            # Zones are fixed, so membership only changes when a ship moves
+            return
+
+        inside: frozenset[str] = frozenset()
+        if position is not None:
+            inside = frozenset(
+                zone.name
+                for zone in self._zone_grid.get(_cell(position), ())
+                if zone.contains(position)
+            )
+        before = self._inside.get(key, frozenset())
+        if inside:
+            self._inside[key] = inside
+        else:
+            self._inside.pop(key, None)
+
+        for name in before - inside:
+            self.members[name].discard(key)
+            changes.append(ZoneChange(self.zones[name], ship or old_ship, False))
+        for name in inside - before:
+            self.members[name].add(key)
+            changes.append(ZoneChange(self.zones[name], ship, True))
+
+    def ships_in(self, zone_name: str) -> list[Ship]:
+        """Return the ships inside a zone, by name."""
+        return sorted(
+            (self.ships[key] for key in self.members.get(zone_name, ())),
+            key=lambda ship: str(ship.ship_name),
+        )
+
+    def within(self, center: Position, radius_nm: float) -> list[tuple[float, Ship]]:
+        """Return (distance, ship) within a radius of a point, nearest first."""
+        return [
+            (distance, self.ships[key])
+            for distance, key in self.index.within(center, radius_nm)
+        ]
+
+    def nearest(self, center: Position) -> tuple[float, Ship] | None:
+        """Return (distance, ship) of the ship closest to a point."""
+        if (found := self.index.nearest(center)) is None:
+            return None
+        return found[0], self.ships[found[1]]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return index statistics for diagnostics."""
+        return {
+            "positioned_ships": len(self.index),
+            "zones": {name: len(keys) for name, keys in self.members.items()},
+        }
@@ -0,0 +1,145 @@
+"""Geolocation platform for Duluth Ship Tracker."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+import heapq
+import logging
+from typing import Any
+
+from homeassistant.components.geo_location import GeolocationEvent
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfLength
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .api import Ship
+from .const import (
+    ATTR_HEADING,
+    ATTR_LAST_UPDATE,
+    ATTR_SHIP_TYPE,
+    ATTR_SPEED,
+    ATTR_STATUS,
+    CONF_MAX_MAP_SHIPS,
+    DEFAULT_MAX_MAP_SHIPS,
+    DOMAIN,
+    DULUTH_SHIP_CANAL,
+    KM_PER_NM,
+)
+from .coordinator import DuluthShipTrackerCoordinator
+from .diff import ship_key
+from .geo import Position, distance_nm
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up map entities for the ships with a position nearest the canal."""
+    coordinator: DuluthShipTrackerCoordinator = hass.data[DOMAIN][entry.entry_id]
+    if not (limit := entry.options.get(CONF_MAX_MAP_SHIPS, DEFAULT_MAX_MAP_SHIPS)):
+        return
+    manager = ShipLocationManager(coordinator, async_add_entities, limit)
+    entry.async_on_unload(coordinator.async_add_listener(manager.async_update))
+    manager.async_update()
+
+
+class ShipLocationManager:
+    """Add, move and remove ship location entities as the feed changes.
+
+    Entities are not coordinator entities: after each poll only the ships in
+    the snapshot diff are written, so state writes follow the change rate.
+    Only the `limit` ships nearest the Duluth Ship Canal are shown; a ship
+    that drops out of them is removed like one that left the feed.
+    """
+
+    def __init__(
+        self,
+        coordinator: DuluthShipTrackerCoordinator,
+        async_add_entities: AddEntitiesCallback,
+        limit: int = DEFAULT_MAX_MAP_SHIPS,
+    ) -> None:
+        """Initialize the manager."""
+        self.coordinator = coordinator
+        self.limit = limit
+        self._async_add_entities = async_add_entities
+        self._entities: dict[str, DuluthShipLocation] = {}
+        self._generation: int | None = None
+
+    @callback
+    def async_update(self) -> None:
+        """Sync the entities with the coordinator's latest snapshot."""
+        data = self.coordinator.data
+        if data is None or data.generation == self._generation:
+            return
+        self._generation = data.generation
+
+        geo = self.coordinator.geo
+        positions = geo.index.positions
+        if len(positions) > self.limit:
+            positions = dict(
+                heapq.nsmallest(
+                    self.limit,
+                    positions.items(),
+                    key=lambda item: distance_nm(DULUTH_SHIP_CANAL, item[1]),
+                )
+            )
+        for key in self._entities.keys() - positions.keys():
+            entity = self._entities.pop(key)
+            self.coordinator.hass.async_create_task(entity.async_remove(force_remove=True))
+
+        for change in self.coordinator.last_diff.changed:
+            if (entity := self._entities.get(change.key)) is not None:
+                entity.async_set_ship(change.ship, positions[change.key])
+
+        if new := [
+            DuluthShipLocation(geo.ships[key], position)
+            for key, position in positions.items()
+            if key not in self._entities
+        ]:
+            for entity in new:
+                self._entities[entity.key] = entity
+            self._async_add_entities(new)
+
+
+class DuluthShipLocation(GeolocationEvent):
+    """A ship on the map, with its distance from the Duluth Ship Canal."""
+
+    _attr_should_poll = False
+    _attr_source = DOMAIN
+    _attr_icon = "mdi:ferry"
+    _attr_unit_of_measurement = UnitOfLength.KILOMETERS
+
+    def __init__(self, ship: Ship, position: Position) -> None:
+        """Initialize the entity."""
+        self.key = ship_key(ship)
+        self._attributes: Mapping[str, Any] = {}
+        self._set_ship(ship, position)
+
+    def _set_ship(self, ship: Ship, position: Position) -> None:
+        """Take over a ship's name, position and details."""
+        self._attr_name = ship.ship_name
+        self._attr_latitude, self._attr_longitude = position
+        self._attr_distance = round(distance_nm(DULUTH_SHIP_CANAL, position) * KM_PER_NM, 1)
+        attrs = {
+            ATTR_SHIP_TYPE: ship.ship_type,
+            ATTR_STATUS: ship.status,
+            ATTR_SPEED: ship.speed,
+            ATTR_HEADING: ship.heading,
+            ATTR_LAST_UPDATE: ship.last_update.isoformat() if ship.last_update else None,
+        }
+        self._attributes = {k: v for k, v in attrs.items() if v is not None}
+
+    @callback
+    def async_set_ship(self, ship: Ship, position: Position) -> None:
+        """Update the entity after the ship changed."""
+        self._set_ship(ship, position)
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the ship details."""
+        return self._attributes
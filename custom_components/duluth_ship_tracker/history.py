@@ -0,0 +1,285 @@
+"""Historical voyage store for Duluth Ship Tracker."""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime, timedelta
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api import Ship, ShipSnapshot, is_in_harbor_status
+from .const import HISTORY_COMPACT_INTERVAL_HOURS, HISTORY_RETENTION_DAYS
+from .diff import SnapshotDiff, ship_key
+from .digest import local_day
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_ARRIVAL = "arrival"
+EVENT_DEPARTURE = "departure"
+EVENT_STATUS = "status"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ships (
+    ship_key TEXT PRIMARY KEY,
+    ship_name TEXT,
+    ship_type TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_ships_name ON ships (ship_name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS transitions (
+    id INTEGER PRIMARY KEY,
+    ship_key TEXT NOT NULL,
+    event TEXT NOT NULL,
+    time REAL NOT NULL,
+    status TEXT,
+    previous_status TEXT,
+    cargo TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transitions_ship_time ON transitions (ship_key, time);
+CREATE INDEX IF NOT EXISTS idx_transitions_time ON transitions (time);
+"""
+
+# (ship_key, ship_name, ship_type, event, time, status, previous_status, cargo)
+Transition = tuple[str, Any, Any, str, float, Any, Any, Any]
+
+
+def transitions_from_diff(
+    diff: SnapshotDiff, snapshot: ShipSnapshot
+) -> list[Transition]:
+    """Turn a snapshot diff into arrival, departure and status rows."""
+    when = snapshot.generated_at.timestamp()
+    rows: list[Transition] = []
+
+    def add(ship: Ship, event: str, previous_status: Any = None) -> None:
+        rows.append(
+            (
+                ship_key(ship),
+                ship.ship_name,
+                ship.ship_type,
+                event,
+                when,
+                ship.status,
+                previous_status,
+                ship.cargo,
+            )
+        )
+
+    for ship in diff.added:
+        if ship.in_harbor:
+            add(ship, EVENT_ARRIVAL)
+    for ship in diff.removed:
+        if ship.in_harbor:
+            add(ship, EVENT_DEPARTURE)
+    for change in diff.changed:
+        if (status := change.changes.get("status")) is None:
+            continue
+        old_status, _ = status
+        add(change.ship, EVENT_STATUS, old_status)
+        was_in_harbor = is_in_harbor_status(old_status)
+        if change.ship.in_harbor and not was_in_harbor:
+            add(change.ship, EVENT_ARRIVAL, old_status)
+        elif was_in_harbor and not change.ship.in_harbor:
+            add(change.ship, EVENT_DEPARTURE, old_status)
+
+    return rows
+
+
+class MovementTally:
+    """Arrivals and departures of the current local day.
+
+    Counted from the same transitions as the history, so total sensors can
+    hand daily counts to Home Assistant's long-term statistics.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the tally."""
+        self.day: date | None = None
+        self.counts = {EVENT_ARRIVAL: 0, EVENT_DEPARTURE: 0}
+
+    def _roll(self, now: datetime | None) -> date:
+        """Start from zero when the local day changed; return the day."""
+        day = local_day(now or datetime.now())
+        if day != self.day:
+            self.day = day
+            self.counts = dict.fromkeys(self.counts, 0)
+        return day
+
+    def add(self, rows: list[Transition], now: datetime | None = None) -> None:
+        """Count the arrivals and departures of one poll."""
+        self._roll(now)
+        counts = self.counts
+        for row in rows:
+            if (event := row[3]) in counts:
+                counts[event] += 1
+
+    def today(self, event: str, now: datetime | None = None) -> tuple[date, int]:
+        """Return today and the number of `event` transitions so far."""
+        day = self._roll(now)
+        return day, self.counts[event]
+
+    def restore(self, event: str, day: date, count: int) -> None:
+        """Add a count saved before a restart if it is from today."""
+        if day == self._roll(None):
+            self.counts[event] += count
+
+
+class VoyageHistory:
+    """SQLite store of ship state transitions.
+
+    All database work runs in the executor.  Each poll is written as one
+    batch, and old rows are purged at most once per compaction interval.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize the store."""
+        self.hass = hass
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._last_compact = 0.0
+        self._writes: set[asyncio.Task[None]] = set()
+        self._closing = False
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (executor)."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Voyage history is closed")
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @callback
+    def async_record(self, rows: list[Transition]) -> None:
+        """Queue the transitions of one poll for writing."""
+        if not rows or self._closing:
+            return
+        task = self.hass.async_create_task(self._async_write(rows))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _async_write(self, rows: list[Transition]) -> None:
+        """Write a batch in the executor, logging instead of raising."""
+        try:
+            await self.hass.async_add_executor_job(self._write, rows)
+        except sqlite3.Error as err:
+            _LOGGER.error("Failed to record ship history: %s", err)
+
+    def _write(self, rows: list[Transition]) -> None:
+        """Insert one batch and compact if it is due (executor)."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO ships (ship_key, ship_name, ship_type) VALUES (?, ?, ?)"
+                    " ON CONFLICT(ship_key) DO UPDATE SET"
+                    " ship_name = excluded.ship_name, ship_type = excluded.ship_type",
+                    {(row[0], row[1], row[2]) for row in rows},
+                )
+                conn.executemany(
+                    "INSERT INTO transitions"
+                    " (ship_key, event, time, status, previous_status, cargo)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(row[0], *row[3:]) for row in rows],
+                )
+
+            if time.time() - self._last_compact > HISTORY_COMPACT_INTERVAL_HOURS * 3600:
+                self._compact(conn)
+
+    def _compact(self, conn: sqlite3.Connection) -> None:
+        """Apply the retention policy (executor, lock held)."""
+        self._last_compact = time.time()
+        cutoff = (datetime.now() - timedelta(days=HISTORY_RETENTION_DAYS)).timestamp()
+        with conn:
+            deleted = conn.execute(
+                "DELETE FROM transitions WHERE time < ?", (cutoff,)
+            ).rowcount
+            conn.execute(
+                "DELETE FROM ships WHERE ship_key NOT IN"
+                " (SELECT DISTINCT ship_key FROM transitions)"
+            )
+        if deleted:
+            _LOGGER.debug(
+                "Purged %d history rows older than %s days", deleted, HISTORY_RETENTION_DAYS
+            )
+            conn.execute("PRAGMA optimize")
+
+    async def async_visits(
+        self, ship_name: str, since: datetime | None = None
+    ) -> list[dict[str, Any]]:
+        """Return arrivals of ships whose name contains `ship_name`."""
+        return await self.hass.async_add_executor_job(self._visits, ship_name, since)
+
+    def _visits(self, ship_name: str, since: datetime | None) -> list[dict[str, Any]]:
+        """Query visits (executor)."""
+        start = since.timestamp() if since else 0.0
+        # Match the name literally: %, _ and the escape character itself
+        pattern = "".join("\\" + char if char in "\\%_" else char for char in ship_name)
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT s.ship_name, t.time, t.cargo, t.status FROM ships s"
+                " JOIN transitions t ON t.ship_key = s.ship_key"
+                " WHERE s.ship_name LIKE ? ESCAPE '\\' AND t.event = ? AND t.time >= ?"
+                " ORDER BY t.time",
+                (f"%{pattern}%", EVENT_ARRIVAL, start),
+            ).fetchall()
+
+        return [
+            {
+                "ship_name": name,
+                "arrival_time": datetime.fromtimestamp(when).isoformat(),
+                "cargo": cargo,
+                "status": status,
+            }
+            for name, when, cargo, status in rows
+        ]
+
+    async def async_dwell_times(
+        self, since: datetime | None = None
+    ) -> dict[str, dict[str, Any]]:
+        """Return average port dwell time in hours, grouped by cargo."""
+        return await self.hass.async_add_executor_job(self._dwell_times, since)
+
+    def _dwell_times(self, since: datetime | None) -> dict[str, dict[str, Any]]:
+        """Query dwell times (executor)."""
+        start = since.timestamp() if since else 0.0
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT cargo, AVG(next_time - time) / 3600.0, COUNT(*) FROM ("
+                "  SELECT cargo, event, time,"
+                "   LEAD(event) OVER w AS next_event, LEAD(time) OVER w AS next_time"
+                "  FROM transitions WHERE event IN (?, ?) AND time >= ?"
+                "  WINDOW w AS (PARTITION BY ship_key ORDER BY time)"
+                ") WHERE event = ? AND next_event = ?"
+                " GROUP BY cargo ORDER BY cargo",
+                (EVENT_ARRIVAL, EVENT_DEPARTURE, start, EVENT_ARRIVAL, EVENT_DEPARTURE),
+            ).fetchall()
+
+        return {
+            str(cargo): {"average_hours": round(hours, 2), "visits": visits}
+            for cargo, hours, visits in rows
+        }
+
+    async def async_close(self) -> None:
+        """Finish queued writes, then close the database for good."""
+        self._closing = True
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        await self.hass.async_add_executor_job(self._close)
+
+    def _close(self) -> None:
+        """Close the connection (executor)."""
+        with self._lock:
+            self._closed = True
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,277 @@
+"""Fetches of the same endpoint shared between config entries."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from datetime import datetime
+import logging
+from time import monotonic
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+
+from .api import HarborLookoutApi, ShipSnapshot
+from .const import DATA_HUB, DOMAIN, FETCH_SHARE_SECONDS, PROCESS_THRESHOLD_BYTES
+from .metrics import PipelineMetrics
+from .offload import PipelineExecutor
+from .ports import MultiPortApi
+from .registry import VesselRegistry
+
+_LOGGER = logging.getLogger(__name__)
+
+# (url, vessel registry path, parse in a worker process)
+EndpointKey = tuple[str, str | None, bool]
+
+
+class _Endpoint:
+    """One endpoint client, its latest snapshot and the fetch in flight."""
+
+    def __init__(self, hass: HomeAssistant, api: HarborLookoutApi) -> None:
+        """Initialize the endpoint."""
+        self.hass = hass
+        self.api = api
+        self.subscribers = 0
+        self.version = 0
+        self.snapshot: ShipSnapshot | None = None
+        self.fetched_at: float | None = None
+        self.fetches = 0
+        self.completed = 0
+        self.shared = 0
+        self._task: asyncio.Task[None] | None = None
+        self.unsub_expire: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_cancel_expire(self) -> None:
+        """Cancel the pending drop of an unsubscribed endpoint."""
+        if self.unsub_expire is not None:
+            self.unsub_expire()
+            self.unsub_expire = None
+
+    async def async_fetch(
+        self, max_age: float, metrics: PipelineMetrics, seen: int = 0
+    ) -> int:
+        """Fetch unless a fetch is running or a recent one is new to the caller.
+
+        `seen` is the number of the last completed fetch the caller used; a
+        caller that already has the latest result fetches again.  Callers
+        arriving while a fetch is in flight wait for that fetch instead of
+        starting their own.  Errors reach every waiting caller.  Returns the
+        number of the completed fetch the caller now has.
+        """
+        if self._task is None:
+            if (
+                self.completed > seen
+                and self.fetched_at is not None
+                and monotonic() - self.fetched_at < max_age
+            ):
+                self.shared += 1
+                return self.completed
+            # The caller that starts the fetch gets its timings
+            self._task = self.hass.async_create_background_task(
+                self._async_refresh(metrics), f"{DOMAIN} fetch {self.api.url}"
+            )
+        else:
+            self.shared += 1
+        await asyncio.shield(self._task)
+        return self.completed
+
+    async def _async_refresh(self, metrics: PipelineMetrics) -> None:
+        """Fetch and remember a changed snapshot."""
+        try:
+            self.fetches += 1
+            snapshot = await self.api.get_snapshot_if_changed(metrics=metrics)
+            if snapshot is not None:
+                self.snapshot = snapshot
+                self.version += 1
+            self.fetched_at = monotonic()
+            self.completed += 1
+        finally:
+            self._task = None
+
+
+class SharedPort:
+    """An entry's view of a shared endpoint.
+
+    Has the methods of HarborLookoutApi that MultiPortApi uses, and returns
+    a snapshot only when the endpoint has one this subscriber has not seen.
+    """
+
+    def __init__(
+        self, hub: FetchHub, key: EndpointKey, endpoint: _Endpoint, metrics: PipelineMetrics
+    ) -> None:
+        """Initialize the subscription."""
+        self.hub = hub
+        self.key = key
+        self.endpoint = endpoint
+        self.metrics = metrics
+        self.version = 0
+        self.seen = 0
+
+    async def get_snapshot_if_changed(
+        self, now: datetime | None = None
+    ) -> ShipSnapshot | None:
+        """Return the endpoint's snapshot if it is newer than the last one returned."""
+        endpoint = self.endpoint
+        self.seen = await endpoint.async_fetch(self.hub.max_age, self.metrics, self.seen)
+        if endpoint.version == self.version:
+            return None
+        self.version = endpoint.version
+        return endpoint.snapshot
+
+    def timestamp_cache_info(self) -> Any:
+        """Return hit/miss statistics of the endpoint's timestamp cache."""
+        return self.endpoint.api.timestamp_cache_info()
+
+    def schema_report(self) -> dict[str, Any]:
+        """Return the endpoint's detected field names."""
+        return self.endpoint.api.schema_report()
+
+
+class FetchHub:
+    """Share endpoint fetches between config entries and the config flow.
+
+    Entries polling the same URL with the same registry and parse settings
+    share one client.  A fetch in flight is joined rather than repeated, and
+    a fetch completed less than `max_age` seconds ago is handed to every
+    subscriber that has not had it yet without a new request, so the
+    endpoint is polled about once per interval however many entries use it.
+    Endpoints are reference counted; the hub removes itself from hass.data
+    once nothing uses it.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_age: float = FETCH_SHARE_SECONDS) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self.max_age = max_age
+        self._endpoints: dict[EndpointKey, _Endpoint] = {}
+        self._registries: dict[str | None, VesselRegistry] = {}
+
+    def _endpoint(self, key: EndpointKey) -> _Endpoint:
+        """Return the endpoint of a key, creating its client if needed."""
+        if (endpoint := self._endpoints.get(key)) is None:
+            url, registry_path, in_process = key
+            executor = PipelineExecutor(
+                self.hass.async_add_executor_job,
+                PROCESS_THRESHOLD_BYTES if in_process else None,
+            )
+            endpoint = self._endpoints[key] = _Endpoint(
+                self.hass,
+                HarborLookoutApi(
+                    async_get_clientsession(self.hass),
+                    url,
+                    registry=self._registry(registry_path),
+                    executor=executor,
+                    predict=False,
+                )
+            )
+        return endpoint
+
+    def _registry(self, path: str | None) -> VesselRegistry:
+        """Return the vessel registry of a path, shared by all its endpoints."""
+        if (registry := self._registries.get(path)) is None:
+            registry = self._registries[path] = VesselRegistry(path)
+        return registry
+
+    @callback
+    def async_subscribe(
+        self,
+        urls: Iterable[str],
+        registry_path: str | None = None,
+        in_process: bool = False,
+    ) -> MultiPortApi:
+        """Return a multi-port client whose ports are shared with other entries."""
+        metrics = PipelineMetrics()
+        ports: dict[str, SharedPort] = {}
+        for url in dict.fromkeys(urls):
+            key = (url, registry_path, in_process)
+            endpoint = self._endpoint(key)
+            endpoint.subscribers += 1
+            endpoint.async_cancel_expire()
+            ports[url] = SharedPort(self, key, endpoint, metrics)
+        return MultiPortApi(
+            async_get_clientsession(self.hass),
+            (),
+            registry=self._registry(registry_path),
+            metrics=metrics,
+            executor=PipelineExecutor(self.hass.async_add_executor_job),
+            ports=ports,
+        )
+
+    @callback
+    def async_release(self, api: MultiPortApi) -> None:
+        """Drop an entry's subscriptions."""
+        for port in api.ports.values():
+            if isinstance(port, SharedPort):
+                port.endpoint.subscribers -= 1
+                self._async_drop_if_idle(port.key)
+
+    async def async_validate(
+        self, url: str, registry_path: str | None = None, in_process: bool = False
+    ) -> ShipSnapshot | None:
+        """Check that an endpoint answers, sharing the result with entries.
+
+        Raises HarborLookoutApiError if it does not.  The snapshot is kept
+        for `max_age` seconds, so an entry set up right after the config
+        flow starts from it instead of fetching again.  The vessel registry
+        is loaded first, so that snapshot is enriched like an entry's own.
+        """
+        key = (url, registry_path, in_process)
+        endpoint = self._endpoint(key)
+        try:
+            if (registry := endpoint.api.registry) is not None and not registry.loaded:
+                await self.hass.async_add_executor_job(registry.load)
+            await endpoint.async_fetch(self.max_age, endpoint.api.metrics)
+        finally:
+            if not endpoint.subscribers and endpoint.unsub_expire is None:
+
+                @callback
+                def _async_expire(_now: datetime) -> None:
+                    endpoint.unsub_expire = None
+                    self._async_drop_if_idle(key)
+
+                endpoint.unsub_expire = async_call_later(
+                    self.hass, self.max_age, _async_expire
+                )
+        return endpoint.snapshot
+
+    @callback
+    def _async_drop_if_idle(self, key: EndpointKey) -> None:
+        """Forget an endpoint nobody subscribes to, and the hub once it is empty."""
+        if (endpoint := self._endpoints.get(key)) is None or endpoint.subscribers:
+            return
+        del self._endpoints[key]
+        endpoint.async_cancel_expire()
+        if endpoint.api.executor is not None:
+            endpoint.api.executor.shutdown()
+        if all(other[1] != key[1] for other in self._endpoints):
+            self._registries.pop(key[1], None)
+        if not self._endpoints and self.hass.data.get(DOMAIN, {}).get(DATA_HUB) is self:
+            del self.hass.data[DOMAIN][DATA_HUB]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return shared endpoint statistics for diagnostics."""
+        return {
+            "max_age": self.max_age,
+            "endpoints": [
+                {
+                    "url": url,
+                    "registry": registry_path,
+                    "in_process": in_process,
+                    "subscribers": endpoint.subscribers,
+                    "fetches": endpoint.fetches,
+                    "shared": endpoint.shared,
+                }
+                for (url, registry_path, in_process), endpoint in self._endpoints.items()
+            ],
+        }
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> FetchHub:
+    """Return the fetch hub, creating it on first use."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if (hub := data.get(DATA_HUB)) is None:
+        hub = data[DATA_HUB] = FetchHub(hass)
+    return hub
@@ -0,0 +1,169 @@
+"""Pipeline timings and counters for Duluth Ship Tracker."""
+from __future__ import annotations
+
+from collections import deque
+import logging
+from time import monotonic, perf_counter_ns
+from types import TracebackType
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Stages timed within one poll; fetch includes whatever runs while downloading
+STAGES = ("update", "fetch", "decode", "parse", "classify", "render")
+
+# Polls kept for the averages in diagnostics
+CYCLES_KEPT = 20
+
+
+class _Span:
+    """Add the time spent inside a `with` block to a stage."""
+
+    __slots__ = ("_cycle", "_stage", "_start")
+
+    def __init__(self, cycle: dict[str, int], stage: str) -> None:
+        """Initialize the span."""
+        self._cycle = cycle
+        self._stage = stage
+        self._start = 0
+
+    def __enter__(self) -> None:
+        """Start timing."""
+        self._start = perf_counter_ns()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop timing and add the elapsed time."""
+        elapsed = perf_counter_ns() - self._start
+        self._cycle[self._stage] = self._cycle.get(self._stage, 0) + elapsed
+
+
+class _NullSpan:
+    """Span used while instrumentation is off; does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        """Do nothing."""
+
+    def __exit__(self, *args: Any) -> None:
+        """Do nothing."""
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def timer(timings: dict[str, int], stage: str) -> _Span:
+    """Return a span that adds to a plain dict of stage times.
+
+    Used by code running in worker threads or processes, which hands the
+    times back for `PipelineMetrics.add` instead of touching the metrics.
+    """
+    return _Span(timings, stage)
+
+
+class PipelineMetrics:
+    """Time each stage of a poll with perf_counter_ns.
+
+    Collection is off unless a metrics sensor is enabled or debug logging is
+    turned on for the integration, which can be done at runtime from the
+    integration page.  The switch is checked once per poll; while it is off
+    every span is a shared no-op object.
+    """
+
+    def __init__(self, keep: int = CYCLES_KEPT) -> None:
+        """Initialize the metrics."""
+        self.subscribers = 0
+        self.active = False
+        self.cycles: deque[dict[str, int]] = deque(maxlen=keep)
+        self._cycle: dict[str, int] = {}
+        self._last_success: float | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if metrics should be collected."""
+        return self.subscribers > 0 or _LOGGER.isEnabledFor(logging.DEBUG)
+
+    def begin(self) -> None:
+        """Start a new poll."""
+        self.active = self.enabled
+        if self.active:
+            self._cycle = {}
+
+    def span(self, stage: str) -> _Span | _NullSpan:
+        """Return a context manager that times a stage of the current poll."""
+        if not self.active:
+            return _NULL_SPAN
+        return _Span(self._cycle, stage)
+
+    def count(self, name: str, value: int) -> None:
+        """Add to a counter of the current poll."""
+        if self.active:
+            self._cycle[name] = self._cycle.get(name, 0) + value
+
+    def add(self, timings: dict[str, int]) -> None:
+        """Add stage times measured away from the event loop to the current poll."""
+        if self.active:
+            for stage, elapsed in timings.items():
+                self._cycle[stage] = self._cycle.get(stage, 0) + elapsed
+
+    def end(self, success: bool) -> None:
+        """Finish a poll and record it.
+
+        Sensors render after the poll has ended; their time is still added
+        to this poll's record.
+        """
+        if success:
+            self._last_success = monotonic()
+        if not self.active:
+            return
+        self.cycles.append(self._cycle)
+        _LOGGER.debug("Poll timings: %s", self.last)
+
+    @property
+    def seconds_since_success(self) -> float | None:
+        """Return the time since the last successful poll."""
+        if self._last_success is None:
+            return None
+        return round(monotonic() - self._last_success, 1)
+
+    @property
+    def last(self) -> dict[str, Any]:
+        """Return the values of the last recorded poll, times in milliseconds."""
+        return _summarize(self.cycles[-1]) if self.cycles else {}
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the last poll and averages for diagnostics."""
+        averages: dict[str, Any] = {}
+        if self.cycles:
+            for stage in STAGES:
+                total = sum(cycle.get(stage, 0) for cycle in self.cycles)
+                averages[f"{stage}_ms"] = round(total / len(self.cycles) / 1e6, 3)
+        return {
+            "enabled": self.enabled,
+            "seconds_since_success": self.seconds_since_success,
+            "last_poll": self.last,
+            "average": averages,
+            "polls": len(self.cycles),
+        }
+
+
+def _summarize(cycle: dict[str, int]) -> dict[str, Any]:
+    """Convert a poll record to milliseconds and ratios."""
+    summary: dict[str, Any] = {
+        f"{stage}_ms": round(cycle.get(stage, 0) / 1e6, 3) for stage in STAGES
+    }
+    # Roughly: what the CPU stages do not explain was spent on the network
+    cpu = sum(cycle.get(stage, 0) for stage in ("decode", "parse", "classify"))
+    summary["network_ms"] = round(max(cycle.get("fetch", 0) - cpu, 0) / 1e6, 3)
+    for name, value in cycle.items():
+        if name not in STAGES:
+            summary[name] = value
+    hits, misses = cycle.get("timestamp_hits", 0), cycle.get("timestamp_misses", 0)
+    if hits + misses:
+        summary["timestamp_hit_rate"] = round(hits / (hits + misses), 3)
+    return summary
@@ -0,0 +1,89 @@
+"""Run CPU-bound pipeline steps away from the event loop."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import multiprocessing
+from typing import Any, TypeVar
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Objects kept in the worker process between calls (worker side only)
+_RESIDENT: dict[str, Any] = {}
+
+
+def _init_worker(resident: dict[str, Any]) -> None:
+    """Receive the resident objects when the worker process starts."""
+    _RESIDENT.update(resident)
+
+
+def resident(name: str) -> Any:
+    """Return an object kept in the worker process by keep_in_worker."""
+    return _RESIDENT[name]
+
+
+class PipelineExecutor:
+    """Run parsing and classification in worker threads or a worker process.
+
+    Steps go to `add_executor_job` (Home Assistant's executor in the
+    integration) or the loop's default executor.  With a process threshold,
+    whole payloads at least that large are handled by one worker process
+    instead, so a huge parse does not compete with the event loop for the
+    GIL; the function and its arguments must then be picklable, and only the
+    result comes back.  State that is costly to pickle, like a parser with
+    its vessel registry, is sent once with keep_in_worker and stays in the
+    worker, caches included, between calls.
+    """
+
+    def __init__(
+        self,
+        add_executor_job: Callable[..., Awaitable[Any]] | None = None,
+        process_threshold: int | None = None,
+    ) -> None:
+        """Initialize the executor."""
+        self._add_executor_job = add_executor_job
+        self.process_threshold = process_threshold
+        self._pool: ProcessPoolExecutor | None = None
+        self._resident: dict[str, Any] = {}
+
+    def uses_process(self, size: int) -> bool:
+        """Return True if a payload of this size is handled in the worker process."""
+        return self.process_threshold is not None and size >= self.process_threshold
+
+    def keep_in_worker(self, name: str, value: Any) -> None:
+        """Make `value` available to functions in the worker as resident(name).
+
+        It is pickled once, when the worker process starts; a running worker
+        is stopped so that the next call starts one with the new value.
+        """
+        self._resident[name] = value
+        self.shutdown()
+
+    async def run(self, func: Callable[..., _T], *args: Any, size: int = 0) -> _T:
+        """Run `func(*args)` off the event loop and return its result."""
+        if self.uses_process(size):
+            if self._pool is None:
+                # Spawn rather than fork a process that runs threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(dict(self._resident),),
+                )
+                _LOGGER.debug("Started worker process for large payloads")
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool, func, *args
+            )
+        if self._add_executor_job is not None:
+            return await self._add_executor_job(func, *args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def shutdown(self) -> None:
+        """Stop the worker process, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,91 @@
+"""Adaptive polling interval for Duluth Ship Tracker."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from .api import ShipSnapshot
+
+# Activity closer than this shortens the interval
+NEAR_ACTIVITY = timedelta(hours=2)
+# Nothing happening within this window counts as idle
+IDLE_ACTIVITY = timedelta(hours=12)
+
+
+class AdaptivePollInterval:
+    """Work out how long to wait before the next poll.
+
+    Polls quickly when a ship is about to arrive or depart, slowly when the
+    harbor is idle, and backs off exponentially while the API is failing.
+    The result always stays between the configured floor and ceiling.
+    """
+
+    def __init__(
+        self,
+        floor: timedelta,
+        ceiling: timedelta,
+        default: timedelta,
+    ) -> None:
+        """Initialize the interval."""
+        self.floor = floor
+        self.ceiling = max(ceiling, floor)
+        self.default = self._clamp(default)
+        self.interval = self.default
+        self.reason = "startup"
+        self.failures = 0
+
+    def _clamp(self, value: timedelta) -> timedelta:
+        """Keep a value between floor and ceiling."""
+        return min(max(value, self.floor), self.ceiling)
+
+    def success(self, snapshot: ShipSnapshot, now: datetime | None = None) -> timedelta:
+        """Return the interval after a successful poll."""
+        if now is None:
+            now = datetime.now()
+        self.failures = 0
+
+        upcoming = [
+            (ship.arrival, "arrival", ship) for ship in snapshot.arriving[:1]
+        ] + [
+            (ship.departure, "departure", ship) for ship in snapshot.departing[:1]
+        ]
+        upcoming = [item for item in upcoming if item[0] > now]
+
+        if not upcoming:
+            self.interval = self.ceiling
+            self.reason = "idle: no arrivals or departures scheduled"
+            return self.interval
+
+        when, kind, ship = min(upcoming, key=lambda item: item[0])
+        lead = when - now
+        minutes = int(lead.total_seconds() // 60)
+
+        if lead <= NEAR_ACTIVITY:
+            # Poll about four times before the ship gets there
+            self.interval = self._clamp(min(lead / 4, self.default))
+            self.reason = f"{kind} of {ship.ship_name} in {minutes} min"
+        elif lead <= IDLE_ACTIVITY:
+            self.interval = self.default
+            self.reason = f"next {kind} in {minutes} min"
+        else:
+            self.interval = self._clamp(max(lead / 4, self.default))
+            self.reason = f"idle: next {kind} in {minutes // 60} h"
+
+        return self.interval
+
+    def failure(self) -> timedelta:
+        """Return the interval after a failed poll, backing off exponentially."""
+        self.failures += 1
+        backoff = max(self.default, self.floor) * 2 ** min(self.failures - 1, 10)
+        self.interval = self._clamp(backoff)
+        self.reason = f"backoff after {self.failures} failure(s)"
+        return self.interval
+
+    def as_dict(self) -> dict[str, object]:
+        """Return the current state for diagnostics."""
+        return {
+            "interval_seconds": self.interval.total_seconds(),
+            "reason": self.reason,
+            "consecutive_failures": self.failures,
+            "floor_seconds": self.floor.total_seconds(),
+            "ceiling_seconds": self.ceiling.total_seconds(),
+        }
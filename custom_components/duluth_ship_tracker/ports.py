@@ -0,0 +1,187 @@
+"""Concurrent polling of several Harbor Lookout endpoints."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+import logging
+from typing import Any
+
+import aiohttp
+
+from .api import (
+    HarborLookoutApi,
+    HarborLookoutApiError,
+    Ship,
+    ShipSnapshot,
+    build_snapshot,
+)
+from .const import API_TIMEOUT, MAX_CONCURRENT_FETCHES
+from .diff import ship_key
+from .metrics import PipelineMetrics, timer
+from .offload import PipelineExecutor
+from .predict import predict_arrivals
+from .registry import VesselRegistry
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def merge_ships(groups: Iterable[Iterable[Ship]]) -> list[Ship]:
+    """Combine the ships of several ports, keeping one record per ship.
+
+    Ships are matched by MMSI (then IMO, then name); the record with the
+    latest position report wins.
+    """
+    merged: dict[str, Ship] = {}
+    for ships in groups:
+        for ship in ships:
+            key = ship_key(ship)
+            current = merged.get(key)
+            if current is None or (
+                ship.last_update is not None
+                and (current.last_update is None or ship.last_update > current.last_update)
+            ):
+                merged[key] = ship
+    return list(merged.values())
+
+
+def merge_snapshot(
+    groups: list[tuple[Ship, ...]], now: datetime | None = None
+) -> tuple[ShipSnapshot, dict[str, int]]:
+    """Merge the ships of several ports into one snapshot; also return its time.
+
+    The ports' own snapshots carry no predicted ETAs; they are predicted
+    here, once, over the merged ships.
+    """
+    timings: dict[str, int] = {}
+    with timer(timings, "classify"):
+        snapshot = build_snapshot(merge_ships(groups), now=now)
+    return snapshot, timings
+
+
+def predict_snapshot(
+    snapshot: ShipSnapshot, now: datetime | None = None
+) -> tuple[ShipSnapshot, dict[str, int]]:
+    """Add predicted ETAs to a single port's snapshot; also return the time.
+
+    The ships are only sorted again if a prediction changed one of them.
+    """
+    timings: dict[str, int] = {}
+    with timer(timings, "classify"):
+        ships = list(snapshot.ships.values())
+        predicted = predict_arrivals(ships, now or datetime.now())
+        if any(new is not old for new, old in zip(predicted, ships)):
+            snapshot = build_snapshot(predicted, snapshot.total_count, now, predict=False)
+    return snapshot, timings
+
+
+class MultiPortApi:
+    """Poll several port endpoints at once and merge their ships.
+
+    Every endpoint has its own client, with its own validators, body hash and
+    timeout, on one shared session.  Endpoints are fetched concurrently; one
+    that fails or times out keeps contributing its last good ships, so a slow
+    port never holds back or blanks out the others.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        urls: Iterable[str],
+        timeout: float = API_TIMEOUT,
+        max_concurrent: int = MAX_CONCURRENT_FETCHES,
+        registry: VesselRegistry | None = None,
+        metrics: PipelineMetrics | None = None,
+        executor: PipelineExecutor | None = None,
+        ports: Mapping[str, Any] | None = None,
+    ) -> None:
+        """Initialize the endpoints.
+
+        `ports` replaces the per-URL clients, e.g. with ones shared between
+        entries (see hub.py); they need the get_snapshot_if_changed,
+        timestamp_cache_info and schema_report methods of HarborLookoutApi,
+        and should not predict ETAs, which is done here after merging.
+        """
+        self.registry = registry
+        self.metrics = PipelineMetrics() if metrics is None else metrics
+        self.executor = executor
+        self.ports: dict[str, Any] = (
+            dict(ports)
+            if ports is not None
+            else {
+                url: HarborLookoutApi(
+                    session, url, timeout, registry, self.metrics, executor, predict=False
+                )
+                for url in dict.fromkeys(urls)
+            }
+        )
+        self._ships: dict[str, tuple[Ship, ...]] = {}
+        self._errors: dict[str, str] = {}
+        self._limit = asyncio.Semaphore(max_concurrent)
+
+    async def _fetch(
+        self, api: HarborLookoutApi, now: datetime | None
+    ) -> ShipSnapshot | None:
+        """Fetch one endpoint, waiting for a free slot first."""
+        async with self._limit:
+            return await api.get_snapshot_if_changed(now)
+
+    async def get_snapshot_if_changed(
+        self, now: datetime | None = None
+    ) -> ShipSnapshot | None:
+        """Fetch every endpoint, returning None if none of them changed."""
+        results = await asyncio.gather(
+            *(self._fetch(api, now) for api in self.ports.values()),
+            return_exceptions=True,
+        )
+
+        changed = False
+        for url, result in zip(self.ports, results):
+            if isinstance(result, HarborLookoutApiError):
+                self._errors[url] = str(result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                self._errors.pop(url, None)
+                if result is not None:
+                    self._ships[url] = tuple(result.ships.values())
+                    changed = True
+
+        if len(self._errors) == len(self.ports):
+            raise HarborLookoutApiError("; ".join(self._errors.values()))
+        if self._errors:
+            _LOGGER.warning(
+                "Using previous ship data for %d of %d ports",
+                len(self._errors),
+                len(self.ports),
+            )
+
+        if not changed:
+            return None
+        if len(self.ports) == 1:
+            # Nothing to merge
+            step, args = predict_snapshot, (results[0], now)
+        else:
+            step, args = merge_snapshot, (list(self._ships.values()), now)
+        if self.executor is None:
+            snapshot, timings = step(*args)
+        else:
+            snapshot, timings = await self.executor.run(step, *args)
+        self.metrics.add(timings)
+        return snapshot
+
+    def timestamp_cache_info(self) -> tuple[int, int]:
+        """Return the timestamp cache hits and misses of all endpoints."""
+        infos = [api.timestamp_cache_info() for api in self.ports.values()]
+        return sum(info.hits for info in infos), sum(info.misses for info in infos)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return per-endpoint state for diagnostics."""
+        return {
+            url: {
+                "ships": len(self._ships.get(url, ())),
+                "error": self._errors.get(url),
+                "schema": api.schema_report(),
+            }
+            for url, api in self.ports.items()
+        }
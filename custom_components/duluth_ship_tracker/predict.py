@@ -0,0 +1,170 @@
+"""Dead-reckoning arrival predictions for Duluth Ship Tracker."""
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import replace
+from datetime import datetime, timedelta
+import math
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+
+from .const import (
+    HARBOR_ENTRIES,
+    PREDICTION_MAX_HOURS,
+    PREDICTION_MIN_SPEED,
+    PREDICTION_STALE_HOURS,
+)
+from .geo import EARTH_RADIUS_NM, Position, ship_position
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with Home Assistant
+    np = None
+
+if TYPE_CHECKING:
+    from .api import Ship
+
+# Course must be within 60° of the bearing to the harbor entry
+MIN_ALIGNMENT = 0.5
+_STALE = timedelta(hours=PREDICTION_STALE_HOURS)
+# Below this many ships the pure Python loop beats NumPy's call overhead
+_NUMPY_MIN_ROWS = 32
+
+# The subset of NumPy's API used by _solve, for scalar math
+_SCALAR_MATH = SimpleNamespace(
+    radians=math.radians,
+    sin=math.sin,
+    cos=math.cos,
+    arcsin=math.asin,
+    arccos=math.acos,
+    arctan2=math.atan2,
+    sqrt=math.sqrt,
+    abs=abs,
+    clip=lambda value, low, high: min(max(value, low), high),
+)
+
+
+def _solve(
+    xp: Any, lat: Any, lon: Any, heading: Any, entry: Position
+) -> tuple[Any, Any]:
+    """Return (distance to go in nm, course alignment) towards an entry.
+
+    The ship keeps its course until abeam of the entry (along-track
+    distance) and then turns in (cross-track distance).  Works on scalars
+    with _SCALAR_MATH or on arrays with NumPy.
+    """
+    lat1, lon1 = xp.radians(lat), xp.radians(lon)
+    lat2, lon2 = math.radians(entry[0]), math.radians(entry[1])
+    dlon = lon2 - lon1
+
+    # Angular distance and initial bearing to the entry
+    h = (
+        xp.sin((lat2 - lat1) / 2) ** 2
+        + xp.cos(lat1) * math.cos(lat2) * xp.sin(dlon / 2) ** 2
+    )
+    delta = 2 * xp.arcsin(xp.sqrt(xp.clip(h, 0.0, 1.0)))
+    bearing = xp.arctan2(
+        xp.sin(dlon) * math.cos(lat2),
+        xp.cos(lat1) * math.sin(lat2) - xp.sin(lat1) * math.cos(lat2) * xp.cos(dlon),
+    )
+
+    offset = bearing - xp.radians(heading)
+    cross = xp.arcsin(xp.clip(xp.sin(delta) * xp.sin(offset), -1.0, 1.0))
+    along = xp.arccos(xp.clip(xp.cos(delta) / xp.cos(cross), -1.0, 1.0))
+    return (along + xp.abs(cross)) * EARTH_RADIUS_NM, xp.cos(offset)
+
+
+def _project(
+    rows: Sequence[tuple[float, float, float]], entries: Sequence[Position]
+) -> list[tuple[float, float]]:
+    """Return the best (distance to go, alignment) of each (lat, lon, heading)."""
+    if np is not None and len(rows) >= _NUMPY_MIN_ROWS:
+        lat, lon, heading = np.array(rows, dtype=float).T
+        results = [_solve(np, lat, lon, heading, entry) for entry in entries]
+        distance = np.stack([result[0] for result in results])
+        alignment = np.stack([result[1] for result in results])
+        # Only entries the ship is heading for count; pick the nearest of those
+        distance = np.where(alignment >= MIN_ALIGNMENT, distance, np.inf)
+        best = distance.argmin(axis=0)
+        columns = np.arange(len(rows))
+        return list(
+            zip(distance[best, columns].tolist(), alignment[best, columns].tolist())
+        )
+
+    projected = []
+    for lat, lon, heading in rows:
+        options = [_solve(_SCALAR_MATH, lat, lon, heading, entry) for entry in entries]
+        projected.append(
+            min(
+                (
+                    (distance if alignment >= MIN_ALIGNMENT else math.inf, alignment)
+                    for distance, alignment in options
+                ),
+                key=lambda option: option[0],
+            )
+        )
+    return projected
+
+
+def _candidate(ship: Ship, now: datetime) -> tuple[float, float, float] | None:
+    """Return (lat, lon, heading) if the ship needs and allows a prediction."""
+    if ship.arrival_time is not None or ship.in_harbor or ship.last_update is None:
+        return None
+    if ship.eta is not None and now - ship.last_update < _STALE:
+        # The feed's own ETA is recent enough
+        return None
+    try:
+        speed, heading = float(ship.speed), float(ship.heading)
+    except (TypeError, ValueError):
+        return None
+    if speed < PREDICTION_MIN_SPEED or not 0 <= heading < 360:
+        # Stopped, or AIS "heading not available" (511)
+        return None
+    if (position := ship_position(ship)) is None:
+        return None
+    return position[0], position[1], heading
+
+
+def predict_arrivals(
+    ships: list[Ship],
+    now: datetime,
+    entries: Sequence[Position] = HARBOR_ENTRIES,
+) -> list[Ship]:
+    """Fill in predicted ETAs of underway ships without a usable ETA.
+
+    Each ship's last fix is dead-reckoned along its heading at its reported
+    speed.  Predictions count from the fix time, so they stay put between
+    polls; the confidence falls with course offset, fix age and distance.
+    Returns a new list; ships that are not predicted are passed through.
+    """
+    indexes: list[int] = []
+    rows: list[tuple[float, float, float]] = []
+    result = list(ships)
+    for index, ship in enumerate(ships):
+        if (row := _candidate(ship, now)) is not None:
+            indexes.append(index)
+            rows.append(row)
+        elif ship.predicted_eta is not None:
+            result[index] = replace(ship, predicted_eta=None, eta_confidence=None)
+
+    for index, (distance, alignment) in zip(indexes, _project(rows, entries)):
+        ship = ships[index]
+        hours = distance / float(ship.speed)
+        eta = None
+        if hours <= PREDICTION_MAX_HOURS:
+            eta = ship.last_update + timedelta(hours=hours)
+        if eta is None or eta <= now:
+            # Not heading for the harbor, too far out, or should be there by now
+            if ship.predicted_eta is not None:
+                result[index] = replace(ship, predicted_eta=None, eta_confidence=None)
+            continue
+
+        age_hours = (now - ship.last_update).total_seconds() / 3600
+        confidence = alignment * math.exp(-max(age_hours, 0) / 6) / (1 + distance / 200)
+        result[index] = replace(
+            ship,
+            predicted_eta=eta.replace(microsecond=0),
+            eta_confidence=round(confidence, 1),
+        )
+
+    return result
@@ -0,0 +1,58 @@
+"""Windowed and top-K views of a snapshot without sorting it again."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+from datetime import datetime, timedelta
+import heapq
+from typing import Any
+
+from .api import Ship
+
+
+def window(
+    ships: Sequence[Ship],
+    time_of: Callable[[Ship], datetime | None],
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Sequence[Ship]:
+    """Return the ships of a time-sorted view with start <= time < end.
+
+    `ships` must be sorted by `time_of` and have a time for every ship, like
+    the arriving and departing views of a snapshot; both ends are found by
+    bisection, so only the ships inside the window are touched.
+    """
+    low = 0 if start is None else bisect_left(ships, start, key=time_of)
+    high = len(ships) if end is None else bisect_left(ships, end, lo=low, key=time_of)
+    return ships[low:high]
+
+
+def upcoming(
+    ships: Sequence[Ship],
+    time_of: Callable[[Ship], datetime | None],
+    hours: float | None,
+    now: datetime | None = None,
+) -> Sequence[Ship]:
+    """Return the ships of a time-sorted view due within the next `hours`."""
+    if not hours:
+        return ships
+    if now is None:
+        now = datetime.now()
+    return window(ships, time_of, now, now + timedelta(hours=hours))
+
+
+def top_k(
+    ships: Sequence[Ship],
+    k: int | None,
+    key: Callable[[Ship], Any] | None = None,
+) -> tuple[Ship, ...]:
+    """Return the first `k` ships by `key`, or in view order without a key.
+
+    With a key only a heap of `k` ships is kept instead of sorting the whole
+    view; ties keep view order, as with a stable sort.
+    """
+    if key is None:
+        return tuple(ships if k is None else ships[:k])
+    if k is None:
+        return tuple(sorted(ships, key=key))
+    return tuple(heapq.nsmallest(k, ships, key=key))
@@ -0,0 +1,211 @@
+"""Vessel registry used to fill in static ship particulars."""
+from __future__ import annotations
+
+from collections import OrderedDict
+import csv
+from dataclasses import dataclass, replace
+import difflib
+import json
+import logging
+import os
+import re
+import threading
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .api import Ship
+
+_LOGGER = logging.getLogger(__name__)
+
+BUNDLED_REGISTRY = os.path.join(os.path.dirname(__file__), "vessels.json")
+
+# How similar an unknown name must be to a registry name to match it
+FUZZY_CUTOFF = 0.88
+
+# Resolved (IMO, MMSI, name) keys remembered, least recently seen dropped first
+RESOLVED_CACHE_SIZE = 4096
+
+_NOT_NAME = re.compile(r"[^a-z0-9]+")
+_MISSING = (None, "", "Unknown")
+
+# Ship field: registry column
+_PARTICULARS = {
+    "ship_type": "type",
+    "length": "length",
+    "width": "width",
+    "nationality": "nationality",
+}
+
+
+def normalize_name(name: Any) -> str:
+    """Return a ship name as lowercase words: "Paul R. Tregurtha" -> "paul r tregurtha"."""
+    return _NOT_NAME.sub(" ", str(name).lower()).strip()
+
+
+def _identifier(value: Any) -> str | None:
+    """Return an IMO/MMSI number as a string without padding, or None."""
+    if value in (None, ""):
+        return None
+    text = str(value).strip()
+    if text.upper().startswith("IMO"):
+        text = text[3:].strip()
+    try:
+        return str(int(float(text)))
+    except (OverflowError, ValueError):
+        return None
+
+
+def _number(value: Any) -> float | None:
+    """Return a dimension as a float, or None."""
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class Vessel:
+    """Static particulars of a vessel; lengths in feet."""
+
+    name: str
+    type: str | None = None
+    length: float | None = None
+    width: float | None = None
+    nationality: str | None = None
+
+
+def _read_rows(path: str) -> list[dict[str, Any]]:
+    """Read registry rows from a JSON list or a CSV file with a header row."""
+    with open(path, encoding="utf-8", newline="") as file:
+        if path.lower().endswith(".csv"):
+            return list(csv.DictReader(file))
+        rows = json.load(file)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a list of vessels")
+    return rows
+
+
+class VesselRegistry:
+    """Lookup table of vessel particulars by IMO, MMSI or name.
+
+    The bundled Great Lakes fleet list and an optional user file are read
+    once, in the executor, on the first poll; user rows override bundled
+    ones.  Ships without an IMO/MMSI match are matched by name, fuzzily if
+    need be.  Each (IMO, MMSI, name) is resolved once and remembered, so
+    later polls cost one dict lookup per ship; the least recently seen are
+    forgotten beyond RESOLVED_CACHE_SIZE keys.  One registry is shared by
+    the clients of every endpoint, whose parsing runs in executor threads,
+    so the memo is guarded by a lock.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        """Initialize an empty registry."""
+        self.path = path
+        self.loaded = False
+        self._by_id: dict[str, Vessel] = {}
+        self._by_name: dict[str, Vessel] = {}
+        self._resolved: OrderedDict[tuple[Any, Any, Any], Vessel | None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Return the picklable state, without the lock."""
+        state = self.__dict__.copy()
+        del state["_lock"]
+        with self._lock:
+            state["_resolved"] = self._resolved.copy()
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """Restore the state with a new lock."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of vessels by name."""
+        return len(self._by_name)
+
+    def load(self) -> None:
+        """Read the registry files (executor)."""
+        for path in (BUNDLED_REGISTRY, self.path):
+            if not path:
+                continue
+            try:
+                rows = _read_rows(path)
+            except (OSError, ValueError) as err:
+                _LOGGER.error("Failed to read vessel registry %s: %s", path, err)
+                continue
+            for row in rows:
+                if isinstance(row, dict) and row.get("name"):
+                    self._add(row)
+        self.loaded = True
+        _LOGGER.debug("Loaded %d vessels into the registry", len(self._by_name))
+
+    def _add(self, row: dict[str, Any]) -> None:
+        """Index one registry row."""
+        vessel = Vessel(
+            name=str(row["name"]),
+            type=row.get("type") or None,
+            length=_number(row.get("length")),
+            width=_number(row.get("width")),
+            nationality=row.get("nationality") or None,
+        )
+        for column in ("imo", "mmsi"):
+            if (number := _identifier(row.get(column))) is not None:
+                self._by_id[f"{column}:{number}"] = vessel
+        self._by_name[normalize_name(vessel.name)] = vessel
+
+    def lookup(self, ship: Ship) -> Vessel | None:
+        """Return the registry entry of a ship, if there is one."""
+        key = (ship.imo, ship.mmsi, ship.ship_name)
+        resolved = self._resolved
+        with self._lock:
+            if key in resolved:
+                resolved.move_to_end(key)
+                return resolved[key]
+
+        # Resolved without the lock; a fuzzy match can take a while
+        vessel = self._resolve(ship)
+        with self._lock:
+            resolved[key] = vessel
+            if len(resolved) > RESOLVED_CACHE_SIZE:
+                resolved.popitem(last=False)
+        return vessel
+
+    def _resolve(self, ship: Ship) -> Vessel | None:
+        """Match a ship by IMO, MMSI, exact name and then fuzzy name."""
+        for column, value in (("imo", ship.imo), ("mmsi", ship.mmsi)):
+            if (number := _identifier(value)) is not None and (
+                vessel := self._by_id.get(f"{column}:{number}")
+            ) is not None:
+                return vessel
+
+        name = normalize_name(ship.ship_name)
+        if (vessel := self._by_name.get(name)) is not None:
+            return vessel
+        matches = difflib.get_close_matches(name, self._by_name, 1, FUZZY_CUTOFF)
+        return self._by_name[matches[0]] if matches else None
+
+    def enrich(self, ship: Ship) -> Ship:
+        """Fill in the particulars the feed left empty."""
+        if not self._by_name or (vessel := self.lookup(ship)) is None:
+            return ship
+        updates = {
+            name: value
+            for name, column in _PARTICULARS.items()
+            if getattr(ship, name) in _MISSING
+            and (value := getattr(vessel, column)) is not None
+        }
+        return replace(ship, **updates) if updates else ship
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return registry statistics for diagnostics."""
+        with self._lock:
+            resolved = list(self._resolved.values())
+        matched = sum(vessel is not None for vessel in resolved)
+        return {
+            "path": self.path,
+            "loaded": self.loaded,
+            "vessels": len(self._by_name),
+            "matched_ships": matched,
+            "unmatched_ships": len(resolved) - matched,
+        }
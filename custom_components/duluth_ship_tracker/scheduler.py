@@ -0,0 +1,172 @@
+"""Timer-based arrival/departure warnings for Duluth Ship Tracker."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import heapq
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+
+from .api import Ship, ShipSnapshot
+from .const import (
+    ATTR_ARRIVAL_TIME,
+    ATTR_CARGO,
+    ATTR_DEPARTURE_TIME,
+    ATTR_DESTINATION,
+    ATTR_SHIP_NAME,
+    ATTR_SHIP_TYPE,
+    EVENT_SHIP_ARRIVAL_WARNING,
+    EVENT_SHIP_DEPARTURE_WARNING,
+)
+from .diff import SnapshotDiff, ship_key
+
+_LOGGER = logging.getLogger(__name__)
+
+ARRIVAL = "arrival"
+DEPARTURE = "departure"
+
+# kind -> (ship property, event, time attribute)
+_KINDS: dict[str, tuple[str, str, str]] = {
+    ARRIVAL: ("arrival", EVENT_SHIP_ARRIVAL_WARNING, ATTR_ARRIVAL_TIME),
+    DEPARTURE: ("departure", EVENT_SHIP_DEPARTURE_WARNING, ATTR_DEPARTURE_TIME),
+}
+
+
+class WarningScheduler:
+    """Fire a warning event a fixed time before each ETA/ETD.
+
+    Deadlines live in a heap with lazy deletion: rescheduling a ship pushes a
+    new entry and leaves the old one to be discarded when it surfaces.  Only
+    a single Home Assistant timer is armed, for the earliest deadline.
+    """
+
+    def __init__(self, hass: HomeAssistant, warning_minutes: int) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self.warning = timedelta(minutes=warning_minutes)
+        self._heap: list[tuple[datetime, str, str]] = []
+        self._scheduled: dict[tuple[str, str], tuple[datetime, Ship]] = {}
+        self._warned: dict[tuple[str, str], datetime] = {}
+        self._armed_for: datetime | None = None
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    @property
+    def next_deadline(self) -> datetime | None:
+        """Return when the next warning is due."""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    @callback
+    def async_update(
+        self,
+        snapshot: ShipSnapshot,
+        diff: SnapshotDiff | None = None,
+    ) -> None:
+        """Bring the schedule in line with a new snapshot.
+
+        Without a diff every ship is (re)scheduled; with one only the added,
+        removed and changed ships are touched.
+        """
+        if diff is None:
+            self._scheduled.clear()
+            self._heap.clear()
+            for ship in snapshot.ships.values():
+                self._schedule_ship(ship)
+        else:
+            for ship in diff.removed:
+                key = ship_key(ship)
+                for kind in _KINDS:
+                    self._scheduled.pop((kind, key), None)
+                    self._warned.pop((kind, key), None)
+            for ship in diff.added:
+                self._schedule_ship(ship)
+            for change in diff.changed:
+                self._schedule_ship(change.ship)
+
+        self._arm()
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the pending timer."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._armed_for = None
+
+    def _schedule_ship(self, ship: Ship) -> None:
+        """Add, move or drop the warnings of one ship."""
+        key = ship_key(ship)
+        now = datetime.now()
+        for kind in _KINDS:
+            when: datetime | None = getattr(ship, _KINDS[kind][0])
+            if when is None or when <= now:
+                self._scheduled.pop((kind, key), None)
+                self._warned.pop((kind, key), None)
+                continue
+            if self._warned.get((kind, key)) == when:
+                # Already announced this exact time
+                continue
+
+            deadline = when - self.warning
+            current = self._scheduled.get((kind, key))
+            self._scheduled[(kind, key)] = (when, ship)
+            if current is None or current[0] != when:
+                heapq.heappush(self._heap, (deadline, kind, key))
+
+    def _discard_stale(self) -> None:
+        """Pop heap entries that no longer match the scheduled time."""
+        heap = self._heap
+        while heap:
+            deadline, kind, key = heap[0]
+            entry = self._scheduled.get((kind, key))
+            if entry is not None and entry[0] - self.warning == deadline:
+                return
+            heapq.heappop(heap)
+
+    def _arm(self) -> None:
+        """Arm the timer for the earliest deadline, if it changed."""
+        deadline = self.next_deadline
+        if deadline == self._armed_for:
+            return
+
+        self.async_stop()
+        if deadline is None:
+            return
+
+        self._armed_for = deadline
+        self._unsub_timer = async_track_point_in_time(
+            self.hass, self._async_fire_due, deadline.astimezone()
+        )
+
+    @callback
+    def _async_fire_due(self, _now: datetime) -> None:
+        """Fire every warning whose deadline has passed and re-arm."""
+        self._unsub_timer = None
+        self._armed_for = None
+        now = datetime.now()
+
+        while (deadline := self.next_deadline) is not None and deadline <= now:
+            _, kind, key = heapq.heappop(self._heap)
+            when, ship = self._scheduled.pop((kind, key))
+            if when <= now:
+                continue
+            self._warned[(kind, key)] = when
+
+            _, event, time_attr = _KINDS[kind]
+            _LOGGER.debug("Firing %s warning for %s", kind, ship.ship_name)
+            self.hass.bus.async_fire(
+                event,
+                {
+                    ATTR_SHIP_NAME: ship.ship_name,
+                    "mmsi": ship.mmsi,
+                    "imo": ship.imo,
+                    ATTR_SHIP_TYPE: ship.ship_type,
+                    ATTR_CARGO: ship.cargo,
+                    ATTR_DESTINATION: ship.destination,
+                    time_attr: when.isoformat(),
+                    "minutes_until": round((when - now).total_seconds() / 60),
+                },
+            )
+
+        self._arm()
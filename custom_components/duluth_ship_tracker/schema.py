@@ -0,0 +1,124 @@
+"""Field name detection for the Harbor Lookout feed."""
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping, Sequence
+from typing import Any
+
+# Source field names tried for each ship field, most likely first.  Matching
+# ignores case, underscores and dashes.
+ALIASES: dict[str, tuple[str, ...]] = {
+    "ship_name": ("name", "shipName", "vesselName"),
+    "mmsi": ("mmsi",),
+    "imo": ("imo", "imoNumber"),
+    "ship_type": ("type", "shipType", "vesselType"),
+    "status": ("status", "shipStatus", "navigationStatus", "navStatus"),
+    "cargo": ("cargo", "cargoType", "commodity", "commoditySummary"),
+    "destination": ("destination", "destinationPort", "nextPort"),
+    "eta": ("eta", "estimatedArrival", "expectedArrival"),
+    "etd": ("etd", "estimatedDeparture", "expectedDeparture"),
+    "arrival_time": ("arrivalTime", "actualArrival", "arrivedAt"),
+    "departure_time": ("departureTime", "actualDeparture", "departedAt"),
+    "latitude": ("latitude", "lat"),
+    "longitude": ("longitude", "lon", "lng", "long"),
+    "speed": ("speed", "speedOverGround", "sog"),
+    "heading": ("heading", "course", "cog", "courseOverGround"),
+    "length": ("length", "shipLength", "loa"),
+    "width": ("width", "beam", "shipWidth"),
+    "nationality": ("nationality", "flag", "country"),
+    "last_update": ("lastUpdate", "timestamp", "lastSeen", "positionTime"),
+}
+
+# Value used when a record lacks the field (the Ship default otherwise)
+DEFAULTS = {
+    "ship_name": "Unknown",
+    "ship_type": "Unknown",
+    "status": "Unknown",
+    "cargo": "Unknown",
+}
+TIMESTAMP_FIELDS = frozenset(
+    {"eta", "etd", "arrival_time", "departure_time", "last_update"}
+)
+INTERNED_FIELDS = frozenset(
+    {"ship_type", "status", "cargo", "destination", "nationality"}
+)
+
+# Records inspected when detecting the schema
+SAMPLE_SIZE = 50
+
+Extractor = Callable[[Mapping[str, Any]], Any]
+
+
+def _normalize(key: str) -> str:
+    """Return a field name in the form aliases are compared in."""
+    return key.lower().replace("_", "").replace("-", "")
+
+
+def detect_schema(records: Sequence[Mapping[str, Any]]) -> dict[str, str | None]:
+    """Pick the source field of every ship field from a sample of records.
+
+    When several aliases of a field are present, the one that most often
+    has a value wins, then the one listed first.  Each source field is used
+    for at most one ship field.
+    """
+    filled: dict[str, int] = {}
+    for record in records[:SAMPLE_SIZE]:
+        for key, value in record.items():
+            if isinstance(key, str):
+                filled[key] = filled.get(key, 0) + (value not in (None, ""))
+
+    by_alias: dict[str, list[str]] = {}
+    for key in filled:
+        by_alias.setdefault(_normalize(key), []).append(key)
+
+    schema: dict[str, str | None] = {}
+    used: set[str] = set()
+    for field, aliases in ALIASES.items():
+        best: tuple[int, int] | None = None
+        schema[field] = None
+        for rank, alias in enumerate(aliases):
+            for key in by_alias.get(_normalize(alias), ()):
+                score = (filled[key], -rank)
+                if key not in used and (best is None or score > best):
+                    best, schema[field] = score, key
+        if schema[field] is not None:
+            used.add(schema[field])
+    return schema
+
+
+def make_extractor(
+    schema: Mapping[str, str | None],
+    build: Callable[..., Any],
+    parse_timestamp: Callable[[Any, str | None], Any],
+    intern: Callable[[Any], Any],
+) -> Extractor:
+    """Return a function that reads a record with a fixed schema.
+
+    The source field, default and post-processing of every mapped field are
+    worked out once here, so reading a record is one dict lookup per field.
+    Fields without a source are left to the defaults of `build`.
+    """
+    plain: list[tuple[str, str, Any]] = []
+    timestamps: list[tuple[str, str, Any]] = []
+    interned: list[tuple[str, str, Any]] = []
+    for field, source in schema.items():
+        if source is None or field not in ALIASES:
+            continue
+        if field in TIMESTAMP_FIELDS:
+            group = timestamps
+        elif field in INTERNED_FIELDS:
+            group = interned
+        else:
+            group = plain
+        group.append((field, source, DEFAULTS.get(field)))
+
+    def extract(record: Mapping[str, Any]) -> Any:
+        """Build a ship from one record."""
+        get = record.get
+        values = {field: get(source, default) for field, source, default in plain}
+        for field, source, default in timestamps:
+            values[field] = parse_timestamp(get(source, default), source)
+        for field, source, default in interned:
+            values[field] = intern(get(source, default))
+        return build(**values)
+
+    return extract
@@ -1,16 +1,38 @@
 """Sensor platform for Duluth Ship Tracker."""
 from __future__ import annotations
 
-from datetime import datetime
+from collections import OrderedDict
+from collections.abc import Callable, Collection, Mapping
+import contextlib
+from datetime import date, datetime
+import heapq
 import logging
+from operator import attrgetter
+from types import MappingProxyType
 from typing import Any
 
-from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfLength,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import slugify
 
+from .api import Ship, ShipSnapshot
 from .const import (
     ATTR_ARRIVAL_TIME,
     ATTR_CARGO,
@@ -25,9 +47,26 @@ from .const import (
     ATTR_SHIP_TYPE,
     ATTR_SPEED,
     ATTR_STATUS,
+    CHANGES_LISTED,
+    CONF_LIST_LIMIT,
+    CONF_LIST_WINDOW_HOURS,
+    CONF_MAX_SHIP_DEVICES,
+    CONF_PROXIMITY_RADIUS,
+    CONF_SHIP_DEVICES,
+    DEFAULT_LIST_LIMIT,
+    DEFAULT_LIST_WINDOW_HOURS,
+    DEFAULT_MAX_SHIP_DEVICES,
+    DEFAULT_PROXIMITY_RADIUS,
     DOMAIN,
+    DULUTH_SHIP_CANAL,
+    KM_PER_NM,
 )
 from .coordinator import DuluthShipTrackerCoordinator
+from .diff import SnapshotDiff, compact_changes, ship_key
+from .digest import DailyDigest
+from .geo import distance_nm
+from .history import EVENT_ARRIVAL, EVENT_DEPARTURE
+from .query import top_k, upcoming
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,6 +78,8 @@ async def async_setup_entry(
 ) -> None:
     """Set up Duluth Ship Tracker sensors."""
     coordinator: DuluthShipTrackerCoordinator = hass.data[DOMAIN][entry.entry_id]
+    list_limit = entry.options.get(CONF_LIST_LIMIT, DEFAULT_LIST_LIMIT)
+    window_hours = entry.options.get(CONF_LIST_WINDOW_HOURS, DEFAULT_LIST_WINDOW_HOURS)
 
     entities = [
         DuluthShipCountSensor(coordinator, "arriving", "Arriving Ships"),
@@ -47,17 +88,158 @@ async def async_setup_entry(
         DuluthShipCountSensor(coordinator, "total_count", "Total Ships"),
         DuluthNextArrivalSensor(coordinator),
         DuluthNextDepartureSensor(coordinator),
-        DuluthShipListSensor(coordinator, "arriving", "Arriving Ships List"),
-        DuluthShipListSensor(coordinator, "departing", "Departing Ships List"),
-        DuluthShipListSensor(coordinator, "in_harbor", "Ships in Harbor List"),
+        DuluthShipListSensor(
+            coordinator, "arriving", "Arriving Ships List", list_limit, window_hours
+        ),
+        DuluthShipListSensor(
+            coordinator, "departing", "Departing Ships List", list_limit, window_hours
+        ),
+        DuluthShipListSensor(coordinator, "in_harbor", "Ships in Harbor List", list_limit),
+        DuluthNearestShipSensor(coordinator),
+        DuluthNearbyShipsSensor(
+            coordinator,
+            entry.options.get(CONF_PROXIMITY_RADIUS, DEFAULT_PROXIMITY_RADIUS),
+        ),
+        DuluthDailyScheduleSensor(coordinator),
+        DuluthShipChangesSensor(coordinator),
+        DuluthMovementCountSensor(coordinator, EVENT_ARRIVAL, "Arrivals Today"),
+        DuluthMovementCountSensor(coordinator, EVENT_DEPARTURE, "Departures Today"),
     ]
+    entities.extend(
+        DuluthZoneSensor(coordinator, zone_name) for zone_name in coordinator.geo.zones
+    )
+    entities.extend(
+        DuluthPipelineSensor(coordinator, *description)
+        for description in PIPELINE_SENSORS
+    )
 
     async_add_entities(entities)
 
+    if entry.options.get(CONF_SHIP_DEVICES):
+        manager = ShipDeviceManager(
+            coordinator,
+            entry.entry_id,
+            async_add_entities,
+            entry.options.get(CONF_MAX_SHIP_DEVICES, DEFAULT_MAX_SHIP_DEVICES),
+        )
+        entry.async_on_unload(coordinator.async_add_listener(manager.async_update))
+        manager.async_update()
+    else:
+        async_remove_ship_devices(hass, entry.entry_id)
+
+
+_NOT_RENDERED = object()
+
+
+# Time of the views sorted by time
+_TIME_OF: dict[str, Callable[[Ship], datetime | None]] = {
+    "arriving": attrgetter("arrival"),
+    "departing": attrgetter("departure"),
+}
+
+
+def _departure_or_last(ship: Ship) -> datetime:
+    """Sort key putting ships without a departure time last."""
+    return ship.departure or datetime.max
+
+
+class DuluthShipSensor(CoordinatorEntity, SensorEntity):
+    """Base sensor that renders its slice of the snapshot once per generation.
+
+    Subclasses pick the part of the snapshot they display (`_slice`) and turn
+    it into a state and attributes (`_render`).  Nothing is rebuilt until the
+    coordinator publishes a new generation, and the state is only written
+    when the rendered output actually changed.
+    """
+
+    # Add the time the rendered output last changed as ATTR_LAST_UPDATE
+    _stamp_last_update = False
+    # Re-slice on every update, not only a new generation, because the slice
+    # depends on the current time
+    _slides = False
+    # Re-render at local midnight, without waiting for the next poll
+    _rolls_at_midnight = False
+
+    def __init__(self, coordinator: DuluthShipTrackerCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._generation: int | None = None
+        self._slice_data: Any = _NOT_RENDERED
+        self._attributes: Mapping[str, Any] = MappingProxyType({})
+        self._was_available = True
+        self._refresh()
+
+    def _slice(self, data: ShipSnapshot) -> Any:
+        """Return the part of the snapshot this sensor displays."""
+        raise NotImplementedError
+
+    def _render(self, current: Any) -> tuple[Any, dict[str, Any]]:
+        """Return the state and attributes for a slice."""
+        raise NotImplementedError
+
+    def _refresh(self) -> bool:
+        """Re-render after a new generation; return True if the output changed."""
+        data = self.coordinator.data
+        if data.generation == self._generation and not self._slides:
+            return False
+        self._generation = data.generation
+
+        current = self._slice(data)
+        if current == self._slice_data:
+            return False
+        self._slice_data = current
+
+        with self.coordinator.metrics.span("render"):
+            value, attributes = self._render(current)
+        if self._stamp_last_update:
+            previous = dict(self._attributes)
+            previous.pop(ATTR_LAST_UPDATE, None)
+            if value == self._attr_native_value and attributes == previous:
+                return False
+            attributes[ATTR_LAST_UPDATE] = data.generated_at.isoformat()
+        elif value == self._attr_native_value and attributes == self._attributes:
+            return False
+
+        self._attr_native_value = value
+        self._attributes = MappingProxyType(attributes)
+        return True
+
+    async def async_added_to_hass(self) -> None:
+        """Roll over to the new day at midnight if the sensor needs it."""
+        await super().async_added_to_hass()
+        if self._rolls_at_midnight:
+            self.async_on_remove(
+                async_track_time_change(
+                    self.hass, self._async_new_day, hour=0, minute=0, second=0
+                )
+            )
+
+    @callback
+    def _async_new_day(self, _now: datetime) -> None:
+        """Re-render for the new day."""
+        self._generation = None
+        self._handle_coordinator_update()
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the cached attributes."""
+        return self._attributes
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if this sensor's output or availability changed."""
+        changed = self._refresh()
+        available = self.available
+        if changed or available != self._was_available:
+            self._was_available = available
+            self.async_write_ha_state()
+
 
-class DuluthShipCountSensor(CoordinatorEntity, SensorEntity):
+class DuluthShipCountSensor(DuluthShipSensor):
     """Sensor showing count of ships."""
 
+    _stamp_last_update = True
+
     def __init__(
         self,
         coordinator: DuluthShipTrackerCoordinator,
@@ -65,183 +247,720 @@ class DuluthShipCountSensor(CoordinatorEntity, SensorEntity):
         name: str,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
         self._data_key = data_key
+        super().__init__(coordinator)
         self._attr_name = f"Duluth {name}"
-        self._attr_unique_id = f"{DOMAIN}_{data_key}_count"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{data_key}_count"
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_native_unit_of_measurement = "ships"
         self._attr_icon = "mdi:ferry"
 
-    @property
-    def native_value(self) -> int:
-        """Return the state of the sensor."""
+    def _slice(self, data: ShipSnapshot) -> int:
+        """Return the count."""
         if self._data_key == "total_count":
-            return self.coordinator.data.get(self._data_key, 0)
-        return len(self.coordinator.data.get(self._data_key, []))
+            return data.total_count
+        return len(getattr(data, self._data_key))
+
+    def _render(self, current: int) -> tuple[int, dict[str, Any]]:
+        """Return the count with no extra attributes."""
+        return current, {}
+
+
+def _next_ship_attributes(ship: Ship, time_attr: str, when: Any) -> dict[str, Any]:
+    """Return the attributes of a next arriving/departing ship sensor."""
+    attrs = {
+        ATTR_SHIP_NAME: ship.ship_name,
+        ATTR_CARGO: ship.cargo,
+        ATTR_DESTINATION: ship.destination,
+        ATTR_SHIP_TYPE: ship.ship_type,
+        ATTR_NATIONALITY: ship.nationality,
+        ATTR_STATUS: ship.status,
+    }
+
+    if when:
+        attrs[time_attr] = when.isoformat()
+        if when == ship.predicted_eta:
+            # Dead-reckoned because the feed had no current ETA
+            attrs["eta_predicted"] = True
+            attrs["eta_confidence"] = ship.eta_confidence
+
+    if ship.latitude and ship.longitude:
+        attrs[ATTR_LATITUDE] = ship.latitude
+        attrs[ATTR_LONGITUDE] = ship.longitude
+        attrs[ATTR_SPEED] = ship.speed
+        attrs[ATTR_HEADING] = ship.heading
+
+    return {k: v for k, v in attrs.items() if v is not None}
+
+
+class DuluthNextArrivalSensor(DuluthShipSensor):
+    """Sensor showing next arriving ship."""
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return additional attributes."""
-        return {
-            "last_update": datetime.now().isoformat(),
-        }
+    def __init__(self, coordinator: DuluthShipTrackerCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = "Duluth Next Arriving Ship"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_next_arrival"
+        self._attr_icon = "mdi:ferry"
 
+    def _slice(self, data: ShipSnapshot) -> Ship | None:
+        """Return the next arriving ship."""
+        return data.arriving[0] if data.arriving else None
+
+    def _render(self, current: Ship | None) -> tuple[str, dict[str, Any]]:
+        """Return the ship name and details."""
+        if current is None:
+            return "No arrivals scheduled", {}
+        return current.ship_name, _next_ship_attributes(
+            current, ATTR_ARRIVAL_TIME, current.arrival
+        )
 
-class DuluthNextArrivalSensor(CoordinatorEntity, SensorEntity):
-    """Sensor showing next arriving ship."""
+
+class DuluthNextDepartureSensor(DuluthShipSensor):
+    """Sensor showing next departing ship."""
 
     def __init__(self, coordinator: DuluthShipTrackerCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._attr_name = "Duluth Next Arriving Ship"
-        self._attr_unique_id = f"{DOMAIN}_next_arrival"
+        self._attr_name = "Duluth Next Departing Ship"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_next_departure"
         self._attr_icon = "mdi:ferry"
 
-    @property
-    def native_value(self) -> str:
-        """Return the state of the sensor."""
-        arriving = self.coordinator.data.get("arriving", [])
-        if not arriving:
-            return "No arrivals scheduled"
+    def _slice(self, data: ShipSnapshot) -> Ship | None:
+        """Return the next departing ship."""
+        return data.departing[0] if data.departing else None
 
-        next_ship = arriving[0]
-        return next_ship.get("ship_name", "Unknown")
+    def _render(self, current: Ship | None) -> tuple[str, dict[str, Any]]:
+        """Return the ship name and details."""
+        if current is None:
+            return "No departures scheduled", {}
+        return current.ship_name, _next_ship_attributes(
+            current, ATTR_DEPARTURE_TIME, current.departure
+        )
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return additional attributes."""
-        arriving = self.coordinator.data.get("arriving", [])
-        if not arriving:
-            return {}
 
-        next_ship = arriving[0]
-        arrival_time = next_ship.get("arrival_time") or next_ship.get("eta")
+class DuluthShipListSensor(DuluthShipSensor):
+    """Sensor showing list of ships.
+
+    The state counts every ship in the view, or for arrivals and departures
+    every ship due within the window; the attributes list only the first
+    `limit`, so large feeds stay under the recorder's attribute size limit.
+    Arrivals and departures come in time order from the sorted views; ships
+    in harbor are listed by departure time.  The list is not recorded; the
+    change feed sensor keeps its history instead.
+    """
+
+    _stamp_last_update = True
+    _unrecorded_attributes = frozenset({"ships"})
+
+    def __init__(
+        self,
+        coordinator: DuluthShipTrackerCoordinator,
+        data_key: str,
+        name: str,
+        limit: int = DEFAULT_LIST_LIMIT,
+        window_hours: float = DEFAULT_LIST_WINDOW_HOURS,
+    ) -> None:
+        """Initialize the sensor."""
+        self._data_key = data_key
+        self._limit = limit
+        self._time_of = _TIME_OF.get(data_key)
+        self._window_hours = window_hours if self._time_of is not None else 0
+        self._slides = bool(self._window_hours)
+        super().__init__(coordinator)
+        self._attr_name = f"Duluth {name}"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{data_key}_list"
+        self._attr_icon = "mdi:format-list-bulleted"
+
+    def _slice(self, data: ShipSnapshot) -> tuple[int, tuple[Ship, ...]]:
+        """Return the number of ships in the view and the ones listed."""
+        ships = getattr(data, self._data_key)
+        if self._time_of is None:
+            return len(ships), top_k(ships, self._limit, _departure_or_last)
+        ships = upcoming(ships, self._time_of, self._window_hours)
+        return len(ships), top_k(ships, self._limit)
+
+    def _render(
+        self, current: tuple[int, tuple[Ship, ...]]
+    ) -> tuple[int, dict[str, Any]]:
+        """Return the count and the ship list."""
+        count, listed = current
+        ship_list = []
+        for ship in listed:
+            ship_info = {
+                "name": ship.ship_name,
+                "type": ship.ship_type,
+                "cargo": ship.cargo,
+                "destination": ship.destination,
+                "status": ship.status,
+            }
 
+            # Add timing information
+            if self._data_key == "arriving":
+                arrival = ship.arrival
+                if arrival:
+                    ship_info["arrival_time"] = arrival.isoformat()
+                    if arrival == ship.predicted_eta:
+                        ship_info["eta_confidence"] = ship.eta_confidence
+            elif self._data_key == "departing":
+                departure = ship.departure
+                if departure:
+                    ship_info["departure_time"] = departure.isoformat()
+
+            # Clean up None values
+            ship_info = {k: v for k, v in ship_info.items() if v is not None}
+            ship_list.append(ship_info)
+
+        attributes: dict[str, Any] = {"ships": ship_list, "count": count}
+        if count > len(ship_list):
+            attributes["not_listed"] = count - len(ship_list)
+        if self._window_hours:
+            attributes["window_hours"] = self._window_hours
+        return count, attributes
+
+
+class DuluthZoneSensor(DuluthShipSensor):
+    """Sensor showing the ships inside a geofence zone."""
+
+    _unrecorded_attributes = frozenset({"ships"})
+
+    def __init__(
+        self, coordinator: DuluthShipTrackerCoordinator, zone_name: str
+    ) -> None:
+        """Initialize the sensor."""
+        self._zone_name = zone_name
+        super().__init__(coordinator)
+        self._attr_name = f"Duluth {zone_name}"
+        self._attr_unique_id = (
+            f"{coordinator.config_entry.entry_id}_zone_{slugify(zone_name)}"
+        )
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = "ships"
+        self._attr_icon = "mdi:map-marker-radius"
+
+    def _slice(self, data: ShipSnapshot) -> tuple[Ship, ...]:
+        """Return the ships in the zone."""
+        return tuple(self.coordinator.geo.ships_in(self._zone_name))
+
+    def _render(self, current: tuple[Ship, ...]) -> tuple[int, dict[str, Any]]:
+        """Return the count and ship names."""
+        return len(current), {"ships": [ship.ship_name for ship in current]}
+
+
+class DuluthNearestShipSensor(DuluthShipSensor):
+    """Sensor showing the ship closest to the Duluth Ship Canal."""
+
+    def __init__(self, coordinator: DuluthShipTrackerCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = "Duluth Nearest Ship"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_nearest_ship"
+        self._attr_icon = "mdi:radar"
+
+    def _slice(self, data: ShipSnapshot) -> tuple[float, Ship] | None:
+        """Return the distance to and the nearest ship."""
+        if (found := self.coordinator.geo.nearest(DULUTH_SHIP_CANAL)) is None:
+            return None
+        distance, ship = found
+        return round(distance, 1), ship
+
+    def _render(
+        self, current: tuple[float, Ship] | None
+    ) -> tuple[str, dict[str, Any]]:
+        """Return the ship name and position."""
+        if current is None:
+            return "No ship positions", {}
+        distance, ship = current
         attrs = {
-            ATTR_SHIP_NAME: next_ship.get("ship_name"),
-            ATTR_CARGO: next_ship.get("cargo"),
-            ATTR_DESTINATION: next_ship.get("destination"),
-            ATTR_SHIP_TYPE: next_ship.get("ship_type"),
-            ATTR_NATIONALITY: next_ship.get("nationality"),
-            ATTR_STATUS: next_ship.get("status"),
+            "distance_nm": distance,
+            ATTR_SHIP_TYPE: ship.ship_type,
+            ATTR_STATUS: ship.status,
+            ATTR_LATITUDE: ship.latitude,
+            ATTR_LONGITUDE: ship.longitude,
+            ATTR_SPEED: ship.speed,
+            ATTR_HEADING: ship.heading,
         }
+        return ship.ship_name, {k: v for k, v in attrs.items() if v is not None}
+
 
-        if arrival_time:
-            attrs[ATTR_ARRIVAL_TIME] = arrival_time.isoformat() if isinstance(arrival_time, datetime) else arrival_time
+class DuluthNearbyShipsSensor(DuluthShipSensor):
+    """Sensor counting ships within a radius of the Duluth Ship Canal."""
 
-        if next_ship.get("latitude") and next_ship.get("longitude"):
-            attrs[ATTR_LATITUDE] = next_ship.get("latitude")
-            attrs[ATTR_LONGITUDE] = next_ship.get("longitude")
-            attrs[ATTR_SPEED] = next_ship.get("speed")
-            attrs[ATTR_HEADING] = next_ship.get("heading")
+    _unrecorded_attributes = frozenset({"ships"})
 
-        return {k: v for k, v in attrs.items() if v is not None}
+    def __init__(
+        self, coordinator: DuluthShipTrackerCoordinator, radius_nm: float
+    ) -> None:
+        """Initialize the sensor."""
+        self._radius_nm = radius_nm
+        super().__init__(coordinator)
+        self._attr_name = "Duluth Ships Near Canal"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_nearby_count"
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = "ships"
+        self._attr_icon = "mdi:radar"
+
+    def _slice(self, data: ShipSnapshot) -> tuple[tuple[float, Any], ...]:
+        """Return (distance, name) of every ship within the radius."""
+        return tuple(
+            (round(distance, 1), ship.ship_name)
+            for distance, ship in self.coordinator.geo.within(
+                DULUTH_SHIP_CANAL, self._radius_nm
+            )
+        )
+
+    def _render(
+        self, current: tuple[tuple[float, Any], ...]
+    ) -> tuple[int, dict[str, Any]]:
+        """Return the count and the ships by distance."""
+        return len(current), {
+            "radius_nm": self._radius_nm,
+            "ships": [
+                {"name": name, "distance_nm": distance} for distance, name in current
+            ],
+        }
 
 
-class DuluthNextDepartureSensor(CoordinatorEntity, SensorEntity):
-    """Sensor showing next departing ship."""
+class DuluthDailyScheduleSensor(DuluthShipSensor):
+    """Sensor showing today's arrivals and departures and a spoken summary.
+
+    The digest is rebuilt for a new snapshot generation and at midnight, so
+    scripts can speak the `summary` attribute without template loops.
+    """
+
+    _rolls_at_midnight = True
+    _unrecorded_attributes = frozenset({"arrivals", "departures"})
 
     def __init__(self, coordinator: DuluthShipTrackerCoordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._attr_name = "Duluth Next Departing Ship"
-        self._attr_unique_id = f"{DOMAIN}_next_departure"
-        self._attr_icon = "mdi:ferry"
+        self._attr_name = "Duluth Daily Schedule"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_daily_schedule"
+        self._attr_native_unit_of_measurement = "ships"
+        self._attr_icon = "mdi:calendar-clock"
 
-    @property
-    def native_value(self) -> str:
-        """Return the state of the sensor."""
-        departing = self.coordinator.data.get("departing", [])
-        if not departing:
-            return "No departures scheduled"
+    def _slice(self, data: ShipSnapshot) -> DailyDigest | None:
+        """Return today's digest."""
+        return self.coordinator.daily_digest()
 
-        next_ship = departing[0]
-        return next_ship.get("ship_name", "Unknown")
+    def _render(self, current: DailyDigest | None) -> tuple[int, dict[str, Any]]:
+        """Return the number of movements today and the digest."""
+        if current is None:
+            return 0, {}
+        return current.movements, current.as_dict()
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return additional attributes."""
-        departing = self.coordinator.data.get("departing", [])
-        if not departing:
-            return {}
 
-        next_ship = departing[0]
-        departure_time = next_ship.get("departure_time") or next_ship.get("etd")
+class DuluthShipChangesSensor(DuluthShipSensor):
+    """Sensor recording what changed in the feed, one compact delta per ship.
 
-        attrs = {
-            ATTR_SHIP_NAME: next_ship.get("ship_name"),
-            ATTR_CARGO: next_ship.get("cargo"),
-            ATTR_DESTINATION: next_ship.get("destination"),
-            ATTR_SHIP_TYPE: next_ship.get("ship_type"),
-            ATTR_NATIONALITY: next_ship.get("nationality"),
-            ATTR_STATUS: next_ship.get("status"),
+    This is the history of the ship lists without their size: the recorder
+    stores only the ships that were added, changed or removed by a poll,
+    with times as epoch seconds.  Polls that change nothing are not written.
+    A poll that changes the whole feed is summarized as counts and the
+    first CHANGES_LISTED deltas.
+    """
+
+    def __init__(self, coordinator: DuluthShipTrackerCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_name = "Duluth Ship Changes"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_ship_changes"
+        self._attr_native_unit_of_measurement = "ships"
+        self._attr_icon = "mdi:swap-horizontal"
+
+    def _slice(self, data: ShipSnapshot) -> SnapshotDiff:
+        """Return the diff of the last poll, or keep the last one if it is empty."""
+        diff = self.coordinator.last_diff
+        if not diff and self._slice_data is not _NOT_RENDERED:
+            return self._slice_data
+        return diff
+
+    def _render(self, current: SnapshotDiff) -> tuple[int, dict[str, Any]]:
+        """Return the number of ships that changed, by kind, and their deltas."""
+        changes = compact_changes(current)
+        added, removed = len(current.added), len(current.removed)
+        return len(changes), {
+            "added": added,
+            "changed": len(changes) - added - removed,
+            "removed": removed,
+            "changes": changes[:CHANGES_LISTED],
         }
 
-        if departure_time:
-            attrs[ATTR_DEPARTURE_TIME] = departure_time.isoformat() if isinstance(departure_time, datetime) else departure_time
 
-        if next_ship.get("latitude") and next_ship.get("longitude"):
-            attrs[ATTR_LATITUDE] = next_ship.get("latitude")
-            attrs[ATTR_LONGITUDE] = next_ship.get("longitude")
-            attrs[ATTR_SPEED] = next_ship.get("speed")
-            attrs[ATTR_HEADING] = next_ship.get("heading")
+class DuluthMovementCountSensor(DuluthShipSensor, RestoreEntity):
+    """Sensor counting today's arrivals or departures for long-term statistics.
+
+    A total that restarts at midnight; the recorder turns it into daily
+    statistics that outlive the purge of state history.  The count of the
+    day survives a restart.
+    """
 
-        return {k: v for k, v in attrs.items() if v is not None}
+    _rolls_at_midnight = True
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
 
+    def __init__(
+        self, coordinator: DuluthShipTrackerCoordinator, event: str, name: str
+    ) -> None:
+        """Initialize the sensor."""
+        self._event = event
+        super().__init__(coordinator)
+        self._attr_name = f"Duluth {name}"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{event}s_today"
+        self._attr_native_unit_of_measurement = "ships"
+        self._attr_icon = "mdi:counter"
+
+    async def async_added_to_hass(self) -> None:
+        """Add the count saved before a restart, if it is from today."""
+        await super().async_added_to_hass()
+        if (last := await self.async_get_last_state()) is None:
+            return
+        with contextlib.suppress(KeyError, TypeError, ValueError):
+            self.coordinator.movements.restore(
+                self._event,
+                date.fromisoformat(last.attributes["date"]),
+                int(last.state),
+            )
+            self._generation = None
+            self._refresh()
+
+    def _slice(self, data: ShipSnapshot) -> tuple[date, int]:
+        """Return today and the count so far."""
+        return self.coordinator.movements.today(self._event)
+
+    def _render(self, current: tuple[date, int]) -> tuple[int, dict[str, Any]]:
+        """Return the count and its day."""
+        day, count = current
+        return count, {"date": day.isoformat()}
+
+
+# key, name, value, unit, device class
+PIPELINE_SENSORS: tuple[
+    tuple[
+        str,
+        str,
+        Callable[[DuluthShipTrackerCoordinator], Any],
+        str | None,
+        SensorDeviceClass | None,
+    ],
+    ...,
+] = (
+    (
+        "poll_duration",
+        "Poll Duration",
+        lambda coordinator: coordinator.metrics.last.get("update_ms"),
+        UnitOfTime.MILLISECONDS,
+        SensorDeviceClass.DURATION,
+    ),
+    (
+        "payload_size",
+        "Payload Size",
+        lambda coordinator: coordinator.metrics.last.get("payload_bytes", 0),
+        UnitOfInformation.BYTES,
+        SensorDeviceClass.DATA_SIZE,
+    ),
+    (
+        "consecutive_failures",
+        "Consecutive Failures",
+        lambda coordinator: coordinator.polling.failures,
+        None,
+        None,
+    ),
+    (
+        "data_age",
+        "Data Age",
+        lambda coordinator: coordinator.metrics.seconds_since_success,
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+    ),
+)
 
-class DuluthShipListSensor(CoordinatorEntity, SensorEntity):
-    """Sensor showing list of ships."""
+
+class DuluthPipelineSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor showing one measurement of the last poll.
+
+    These are disabled by default; while any of them is enabled the
+    coordinator times every poll.  The poll duration sensor carries the
+    per-stage breakdown as attributes.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:timer-outline"
 
     def __init__(
         self,
         coordinator: DuluthShipTrackerCoordinator,
-        data_key: str,
+        key: str,
         name: str,
+        value: Callable[[DuluthShipTrackerCoordinator], Any],
+        unit: str | None,
+        device_class: SensorDeviceClass | None,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._data_key = data_key
+        self._key = key
+        self._value = value
         self._attr_name = f"Duluth {name}"
-        self._attr_unique_id = f"{DOMAIN}_{data_key}_list"
-        self._attr_icon = "mdi:format-list-bulleted"
+        self._attr_unique_id = f"{coordinator.config_entry.entry_id}_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+
+    async def async_added_to_hass(self) -> None:
+        """Switch metric collection on while this sensor exists."""
+        await super().async_added_to_hass()
+        metrics = self.coordinator.metrics
+        metrics.subscribers += 1
+
+        @callback
+        def unsubscribe() -> None:
+            metrics.subscribers -= 1
+
+        self.async_on_remove(unsubscribe)
 
     @property
-    def native_value(self) -> int:
-        """Return the count."""
-        return len(self.coordinator.data.get(self._data_key, []))
+    def native_value(self) -> Any:
+        """Return the measurement."""
+        return self._value(self.coordinator)
 
     @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return ship list as attributes."""
-        ships = self.coordinator.data.get(self._data_key, [])
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the stage timings of the last poll."""
+        if self._key != "poll_duration":
+            return None
+        return self.coordinator.metrics.last
 
-        ship_list = []
-        for ship in ships:
-            ship_info = {
-                "name": ship.get("ship_name", "Unknown"),
-                "type": ship.get("ship_type"),
-                "cargo": ship.get("cargo"),
-                "destination": ship.get("destination"),
-                "status": ship.get("status"),
-            }
 
-            # Add timing information
-            if self._data_key == "arriving":
-                arrival = ship.get("arrival_time") or ship.get("eta")
-                if arrival:
-                    ship_info["arrival_time"] = arrival.isoformat() if isinstance(arrival, datetime) else arrival
-            elif self._data_key == "departing":
-                departure = ship.get("departure_time") or ship.get("etd")
-                if departure:
-                    ship_info["departure_time"] = departure.isoformat() if isinstance(departure, datetime) else departure
+def _aware(value: datetime | None) -> datetime | None:
+    """Return a naive local feed time as an aware time for timestamp sensors."""
+    return value.astimezone() if value is not None else None
 
-            # Clean up None values
-            ship_info = {k: v for k, v in ship_info.items() if v is not None}
-            ship_list.append(ship_info)
 
-        return {
-            "ships": ship_list,
-            "count": len(ship_list),
-            ATTR_LAST_UPDATE: datetime.now().isoformat(),
+def _vessel_arrival(ship: Ship) -> tuple[Any, dict[str, Any]]:
+    """Return the arrival time and whether it was predicted."""
+    arrival = ship.arrival
+    if arrival is not None and arrival == ship.predicted_eta:
+        return _aware(arrival), {
+            "eta_predicted": True,
+            "eta_confidence": ship.eta_confidence,
         }
+    return _aware(arrival), {}
+
+
+def _vessel_distance(ship: Ship) -> tuple[Any, dict[str, Any]]:
+    """Return the distance from the Duluth Ship Canal and the position."""
+    if ship.latitude is None or ship.longitude is None:
+        return None, {}
+    position = (ship.latitude, ship.longitude)
+    attrs = {
+        ATTR_LATITUDE: ship.latitude,
+        ATTR_LONGITUDE: ship.longitude,
+        ATTR_SPEED: ship.speed,
+        ATTR_HEADING: ship.heading,
+    }
+    return round(distance_nm(DULUTH_SHIP_CANAL, position) * KM_PER_NM, 1), {
+        k: v for k, v in attrs.items() if v is not None
+    }
+
+
+# key, name, value and attributes, unit, device class, icon
+VESSEL_SENSORS: tuple[
+    tuple[
+        str,
+        str,
+        Callable[[Ship], tuple[Any, dict[str, Any]]],
+        str | None,
+        SensorDeviceClass | None,
+        str,
+    ],
+    ...,
+] = (
+    (
+        "arrival",
+        "Arrival",
+        _vessel_arrival,
+        None,
+        SensorDeviceClass.TIMESTAMP,
+        "mdi:ferry",
+    ),
+    (
+        "departure",
+        "Departure",
+        lambda ship: (_aware(ship.departure), {}),
+        None,
+        SensorDeviceClass.TIMESTAMP,
+        "mdi:ferry",
+    ),
+    (
+        "status",
+        "Status",
+        lambda ship: (ship.status, {ATTR_DESTINATION: ship.destination}),
+        None,
+        None,
+        "mdi:anchor",
+    ),
+    (
+        "distance",
+        "Distance",
+        _vessel_distance,
+        UnitOfLength.KILOMETERS,
+        SensorDeviceClass.DISTANCE,
+        "mdi:map-marker-distance",
+    ),
+)
+
+
+def ship_device_key(entry_id: str, key: str) -> str:
+    """Return the device identifier of a ship, which is per entry."""
+    return f"{entry_id}_{key}"
+
+
+@callback
+def async_remove_ship_devices(
+    hass: HomeAssistant, entry_id: str, keep: Collection[str] = ()
+) -> None:
+    """Detach the ship devices of an entry, except those of the `keep` ships.
+
+    Removing the entry from a device removes its sensors from the entity
+    registry and from Home Assistant.
+    """
+    keep_ids = {ship_device_key(entry_id, key) for key in keep}
+    registry = dr.async_get(hass)
+    for device in dr.async_entries_for_config_entry(registry, entry_id):
+        if not any(
+            domain == DOMAIN and key in keep_ids for domain, key in device.identifiers
+        ):
+            registry.async_update_device(device.id, remove_config_entry_id=entry_id)
+
+
+class ShipDeviceManager:
+    """Keep a device with sensors for each of the most recently active ships.
+
+    Like the map entities, these only follow the snapshot diff: after a poll
+    the sensors of the ships that changed are written, new ships are added
+    in one async_add_entities call and ships that left the feed are removed.
+    At most `limit` ships have devices; when a new one would exceed it, the
+    ship that changed least recently is removed.
+    """
+
+    def __init__(
+        self,
+        coordinator: DuluthShipTrackerCoordinator,
+        entry_id: str,
+        async_add_entities: AddEntitiesCallback,
+        limit: int = DEFAULT_MAX_SHIP_DEVICES,
+    ) -> None:
+        """Initialize the manager."""
+        self.coordinator = coordinator
+        self.entry_id = entry_id
+        self.limit = limit
+        self._async_add_entities = async_add_entities
+        # ship key -> sensors, least recently changed first
+        self._ships: OrderedDict[str, list[DuluthVesselSensor]] = OrderedDict()
+        self._generation: int | None = None
+
+    @callback
+    def async_update(self) -> None:
+        """Sync the ship devices with the coordinator's latest snapshot."""
+        data = self.coordinator.data
+        if data is None or data.generation == self._generation:
+            return
+        first = self._generation is None
+        self._generation = data.generation
+
+        if first:
+            # Start with the ships reported most recently, oldest first
+            active = heapq.nlargest(
+                self.limit,
+                data.ships.items(),
+                key=lambda item: item[1].last_update or datetime.min,
+            )
+            touched = [key for key, _ship in reversed(active)]
+            async_remove_ship_devices(self.coordinator.hass, self.entry_id, touched)
+        else:
+            diff = self.coordinator.last_diff
+            for ship in diff.removed:
+                self._async_drop(ship_key(ship))
+            touched = [ship_key(ship) for ship in diff.added]
+            touched.extend(change.key for change in diff.changed)
+
+        new: list[DuluthVesselSensor] = []
+        for key in touched:
+            ship = data.ships[key]
+            if (sensors := self._ships.get(key)) is None:
+                self._ships[key] = sensors = [
+                    DuluthVesselSensor(self.entry_id, ship, *description)
+                    for description in VESSEL_SENSORS
+                ]
+                new.extend(sensors)
+            else:
+                self._ships.move_to_end(key)
+                for sensor in sensors:
+                    sensor.async_set_ship(ship)
+
+        while len(self._ships) > self.limit:
+            self._async_drop(next(iter(self._ships)))
+
+        if new := [sensor for sensor in new if sensor.ship_key in self._ships]:
+            self._async_add_entities(new)
+
+    @callback
+    def _async_drop(self, key: str) -> None:
+        """Remove a ship's device and sensors."""
+        if self._ships.pop(key, None) is None:
+            return
+        registry = dr.async_get(self.coordinator.hass)
+        identifiers = {(DOMAIN, ship_device_key(self.entry_id, key))}
+        if (device := registry.async_get_device(identifiers=identifiers)) is not None:
+            registry.async_update_device(device.id, remove_config_entry_id=self.entry_id)
+
+
+class DuluthVesselSensor(SensorEntity):
+    """One value of a ship, on the ship's own device."""
+
+    _attr_should_poll = False
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        entry_id: str,
+        ship: Ship,
+        key: str,
+        name: str,
+        value: Callable[[Ship], tuple[Any, dict[str, Any]]],
+        unit: str | None,
+        device_class: SensorDeviceClass | None,
+        icon: str,
+    ) -> None:
+        """Initialize the sensor."""
+        self.ship_key = ship_key(ship)
+        self.device_key = ship_device_key(entry_id, self.ship_key)
+        self._value = value
+        self._attr_name = name
+        self._attr_unique_id = f"{self.device_key}_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_icon = icon
+        self._attr_extra_state_attributes: dict[str, Any] = {}
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self.device_key)},
+            name=ship.ship_name,
+            model=ship.ship_type,
+        )
+        self._set_ship(ship)
+
+    def _set_ship(self, ship: Ship) -> bool:
+        """Take over the ship's value; return True if it changed."""
+        value, attributes = self._value(ship)
+        attributes = {k: v for k, v in attributes.items() if v is not None}
+        if value == self._attr_native_value and attributes == self._attr_extra_state_attributes:
+            return False
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = attributes
+        return True
+
+    @callback
+    def async_set_ship(self, ship: Ship) -> None:
+        """Update the sensor after the ship changed, writing only a new value."""
+        if self._set_ship(ship) and self.hass is not None:
+            self.async_write_ha_state()
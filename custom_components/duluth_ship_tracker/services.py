@@ -0,0 +1,143 @@
+"""Services for Duluth Ship Tracker."""
+from __future__ import annotations
+
+from datetime import datetime
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .const import (
+    DATA_HUB,
+    DEFAULT_TRACK_TOLERANCE,
+    DOMAIN,
+    SERVICE_DWELL_TIMES,
+    SERVICE_SHIP_TRACKS,
+    SERVICE_SHIP_VISITS,
+)
+from .coordinator import DuluthShipTrackerCoordinator
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_SINCE = "since"
+ATTR_UNTIL = "until"
+ATTR_TOLERANCE = "tolerance"
+
+_BASE_SCHEMA = {
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_SINCE): cv.datetime,
+}
+
+SHIP_VISITS_SCHEMA = vol.Schema(
+    {vol.Required("ship_name"): cv.string, **_BASE_SCHEMA}
+)
+DWELL_TIMES_SCHEMA = vol.Schema(_BASE_SCHEMA)
+SHIP_TRACKS_SCHEMA = vol.Schema(
+    {
+        vol.Optional("ship_name"): cv.string,
+        vol.Optional(ATTR_UNTIL): cv.datetime,
+        vol.Optional(ATTR_TOLERANCE, default=DEFAULT_TRACK_TOLERANCE): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        **_BASE_SCHEMA,
+    }
+)
+
+
+def _coordinators(hass: HomeAssistant) -> dict[str, DuluthShipTrackerCoordinator]:
+    """Return the coordinators of the loaded entries by entry id."""
+    return {
+        entry_id: coordinator
+        for entry_id, coordinator in hass.data.get(DOMAIN, {}).items()
+        if entry_id != DATA_HUB
+    }
+
+
+def _get_coordinator(hass: HomeAssistant, call: ServiceCall) -> DuluthShipTrackerCoordinator:
+    """Return the coordinator a service call targets."""
+    coordinators = _coordinators(hass)
+    if entry_id := call.data.get(ATTR_CONFIG_ENTRY_ID):
+        if entry_id not in coordinators:
+            raise HomeAssistantError(f"Unknown config entry: {entry_id}")
+        return coordinators[entry_id]
+    if not coordinators:
+        raise HomeAssistantError("Duluth Ship Tracker is not loaded")
+    return next(iter(coordinators.values()))
+
+
+def _local(value: datetime | None) -> datetime | None:
+    """Return a service time as a naive local time, like the feed's."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _since(call: ServiceCall) -> datetime:
+    """Return the start of the query window, defaulting to this season (Jan 1)."""
+    if (since := _local(call.data.get(ATTR_SINCE))) is None:
+        return datetime(datetime.now().year, 1, 1)
+    return since
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+    if hass.services.has_service(DOMAIN, SERVICE_SHIP_VISITS):
+        return
+
+    async def async_ship_visits(call: ServiceCall) -> ServiceResponse:
+        """Return the recorded visits of a ship."""
+        coordinator = _get_coordinator(hass, call)
+        visits = await coordinator.history.async_visits(call.data["ship_name"], _since(call))
+        return {"visits": visits, "count": len(visits)}
+
+    async def async_dwell_times(call: ServiceCall) -> ServiceResponse:
+        """Return average port dwell time by cargo."""
+        coordinator = _get_coordinator(hass, call)
+        return {"cargo": await coordinator.history.async_dwell_times(_since(call))}
+
+    async def async_ship_tracks(call: ServiceCall) -> ServiceResponse:
+        """Return recent ship tracks as GeoJSON, simplified for a map."""
+        coordinator = _get_coordinator(hass, call)
+        return coordinator.tracks.as_geojson(
+            _local(call.data.get(ATTR_SINCE)),
+            _local(call.data.get(ATTR_UNTIL)),
+            call.data[ATTR_TOLERANCE],
+            call.data.get("ship_name"),
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SHIP_VISITS,
+        async_ship_visits,
+        schema=SHIP_VISITS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DWELL_TIMES,
+        async_dwell_times,
+        schema=DWELL_TIMES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SHIP_TRACKS,
+        async_ship_tracks,
+        schema=SHIP_TRACKS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the services once the last entry is unloaded."""
+    if _coordinators(hass):
+        return
+    hass.services.async_remove(DOMAIN, SERVICE_SHIP_VISITS)
+    hass.services.async_remove(DOMAIN, SERVICE_DWELL_TIMES)
+    hass.services.async_remove(DOMAIN, SERVICE_SHIP_TRACKS)
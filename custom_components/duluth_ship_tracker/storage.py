@@ -0,0 +1,98 @@
+"""Persistent snapshot cache for Duluth Ship Tracker."""
+from __future__ import annotations
+
+from datetime import datetime
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .api import SHIP_FIELDS, Ship, ShipSnapshot, build_snapshot
+from .const import DOMAIN, STORAGE_SAVE_DELAY, STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+_DATETIME_FIELDS = frozenset(
+    {"eta", "etd", "arrival_time", "departure_time", "last_update", "predicted_eta"}
+)
+_DATETIME_INDEXES = tuple(
+    index for index, name in enumerate(SHIP_FIELDS) if name in _DATETIME_FIELDS
+)
+
+
+def _encode_ship(ship: Ship) -> list[Any]:
+    """Encode a ship as a positional list in SHIP_FIELDS order."""
+    row: list[Any] = [getattr(ship, name) for name in SHIP_FIELDS]
+    for index in _DATETIME_INDEXES:
+        if row[index] is not None:
+            row[index] = row[index].isoformat()
+    return row
+
+
+def _decode_ship(row: list[Any]) -> Ship:
+    """Decode a positional list back into a ship."""
+    for index in _DATETIME_INDEXES:
+        if row[index] is not None:
+            row[index] = datetime.fromisoformat(row[index])
+    return Ship(*row)
+
+
+class SnapshotStore:
+    """Keep the last good snapshot on disk so startup does not wait on the API."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+
+    async def async_load(self) -> ShipSnapshot | None:
+        """Load the cached snapshot, reclassified against the current time."""
+        try:
+            data = await self._store.async_load()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Ignoring unreadable ship cache: %s", err)
+            return None
+
+        if not data or data.get("fields") != list(SHIP_FIELDS):
+            # Nothing cached yet, or written by an incompatible version
+            return None
+
+        try:
+            # Decoding and classifying a large cache is too slow for the event loop
+            snapshot = await self.hass.async_add_executor_job(_decode, data)
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid ship cache: %s", err)
+            return None
+
+        _LOGGER.debug(
+            "Loaded %d cached ships from %s", len(snapshot.ships), data.get("saved_at")
+        )
+        return snapshot
+
+    @callback
+    def async_save(self, snapshot: ShipSnapshot) -> None:
+        """Schedule writing a snapshot to disk."""
+        self._store.async_delay_save(lambda: _encode(snapshot), STORAGE_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Delete the cache file."""
+        await self._store.async_remove()
+
+
+def _decode(data: dict[str, Any]) -> ShipSnapshot:
+    """Rebuild a snapshot from its stored form (executor)."""
+    ships = [_decode_ship(row) for row in data["ships"]]
+    return build_snapshot(ships, data.get("total_count"))
+
+
+def _encode(snapshot: ShipSnapshot) -> dict[str, Any]:
+    """Return the JSON-serializable form of a snapshot."""
+    return {
+        "saved_at": datetime.now().isoformat(),
+        "total_count": snapshot.total_count,
+        "fields": list(SHIP_FIELDS),
+        "ships": [_encode_ship(ship) for ship in snapshot.ships.values()],
+    }
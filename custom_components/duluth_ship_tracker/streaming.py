@@ -0,0 +1,130 @@
+"""Incremental decoding of the Harbor Lookout ship feed."""
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any
+
+# Decoder states
+_START, _KEY, _COLON, _VALUE, _ARRAY, _DONE = range(6)
+_INCOMPLETE = object()
+
+
+class UnexpectedFormatError(ValueError):
+    """The feed is valid JSON but not a ship list."""
+
+
+class ShipStreamDecoder:
+    """Incremental decoder for a bare or `{"ships": [...]}` ship feed.
+
+    Feed it the raw response chunks; each call returns the ship objects that
+    were completed by that chunk.  At most one unfinished object is buffered,
+    and every complete one is decoded by json's C scanner via raw_decode.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the decoder."""
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._state = _START
+        self._wrapped = False
+        self._found = False
+        self._key: str | None = None
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """Parse a chunk and return the ships it completed."""
+        self._buffer += self._text.decode(chunk)
+        return self._parse(final=False)
+
+    def close(self) -> list[Any]:
+        """Finish parsing and return any remaining ships."""
+        self._buffer += self._text.decode(b"", final=True)
+        ships = self._parse(final=True)
+        if self._state != _DONE:
+            raise json.JSONDecodeError("Unexpected end of data", self._buffer, 0)
+        if not self._found:
+            raise UnexpectedFormatError("No ship list in API response")
+        return ships
+
+    def _decode(self, pos: int, final: bool) -> tuple[Any, int]:
+        """Decode one value at `pos`, or return _INCOMPLETE if it may be cut off."""
+        try:
+            value, end = self._json.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return _INCOMPLETE, pos
+        if end == len(self._buffer) and not final:
+            # A number at the end of the buffer may continue in the next chunk
+            return _INCOMPLETE, pos
+        return value, end
+
+    def _parse(self, final: bool) -> list[Any]:
+        """Consume as much of the buffer as possible."""
+        ships: list[Any] = []
+        buffer = self._buffer
+        pos = 0
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            state = self._state
+
+            if state == _START:
+                if char == "[":
+                    self._state, self._found = _ARRAY, True
+                elif char == "{":
+                    self._state, self._wrapped = _KEY, True
+                else:
+                    raise UnexpectedFormatError("Unexpected API response format")
+                pos += 1
+            elif state == _ARRAY:
+                if char == ",":
+                    pos += 1
+                elif char == "]":
+                    self._state = _KEY if self._wrapped else _DONE
+                    pos += 1
+                else:
+                    value, pos_after = self._decode(pos, final)
+                    if value is _INCOMPLETE:
+                        break
+                    ships.append(value)
+                    pos = pos_after
+            elif state == _KEY:
+                if char == ",":
+                    pos += 1
+                elif char == "}":
+                    self._state = _DONE
+                    pos += 1
+                else:
+                    key, pos_after = self._decode(pos, final)
+                    if key is _INCOMPLETE:
+                        break
+                    if not isinstance(key, str):
+                        raise json.JSONDecodeError("Expecting property name", buffer, pos)
+                    self._key, self._state, pos = key, _COLON, pos_after
+            elif state == _COLON:
+                if char != ":":
+                    raise json.JSONDecodeError("Expecting ':' delimiter", buffer, pos)
+                self._state = _VALUE
+                pos += 1
+            elif state == _VALUE:
+                if self._key == "ships" and char == "[":
+                    self._state, self._found = _ARRAY, True
+                    pos += 1
+                else:
+                    # Other top-level fields (lastUpdate, count, ...) are skipped
+                    value, pos_after = self._decode(pos, final)
+                    if value is _INCOMPLETE:
+                        break
+                    self._state, pos = _KEY, pos_after
+            else:
+                raise json.JSONDecodeError("Extra data", buffer, pos)
+
+        self._buffer = buffer[pos:] if pos else buffer
+        return ships
+
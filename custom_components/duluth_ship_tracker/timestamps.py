@@ -0,0 +1,135 @@
+"""Timestamp parsing for Harbor Lookout data."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime
+from functools import lru_cache
+import re
+from typing import Any
+
+# Numbers above this are treated as epoch milliseconds rather than seconds
+EPOCH_MS_THRESHOLD = 100_000_000_000
+
+_EPOCH_RE = re.compile(r"^-?\d{9,14}(?:\.\d+)?$")
+
+# Formats tried when the faster parsers do not recognise a string
+_STRPTIME_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S.%fZ",
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %H:%M",
+)
+
+
+def _to_local_naive(value: datetime) -> datetime:
+    """Convert an aware datetime to naive local time, like the rest of the API."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+def _from_epoch(value: float) -> datetime | None:
+    """Convert epoch seconds or milliseconds to a naive local datetime."""
+    if abs(value) >= EPOCH_MS_THRESHOLD:
+        value = value / 1000
+    try:
+        return datetime.fromtimestamp(value)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _parse_iso(value: str) -> datetime | None:
+    """Parse ISO 8601, including fractional seconds, Z and UTC offsets."""
+    try:
+        return _to_local_naive(datetime.fromisoformat(value))
+    except ValueError:
+        return None
+
+
+def _parse_epoch_string(value: str) -> datetime | None:
+    """Parse a string holding epoch seconds or milliseconds."""
+    if not _EPOCH_RE.match(value):
+        return None
+    return _from_epoch(float(value))
+
+
+def _parse_strptime(value: str) -> datetime | None:
+    """Parse the less common formats with strptime."""
+    for fmt in _STRPTIME_FORMATS:
+        try:
+            return _to_local_naive(datetime.strptime(value, fmt))
+        except ValueError:
+            continue
+    return None
+
+
+_PARSERS: tuple[Callable[[str], datetime | None], ...] = (
+    _parse_epoch_string,
+    _parse_iso,
+    _parse_strptime,
+)
+
+
+class TimestampParser:
+    """Parse timestamps, remembering the format that works for each field.
+
+    The first string seen for a field is sniffed against every known parser
+    and the winner is reused for later values of that field.  Results for
+    identical strings are memoized in a bounded LRU cache, since ETAs rarely
+    change between polls.
+    """
+
+    def __init__(self, cache_size: int = 4096) -> None:
+        """Initialize the parser."""
+        self._field_parsers: dict[str | None, Callable[[str], datetime | None]] = {}
+        self._parse_cached = lru_cache(maxsize=cache_size)(self._parse_string)
+
+    def parse(self, timestamp: Any, field: str | None = None) -> datetime | None:
+        """Parse a timestamp value from the given source field."""
+        if not timestamp:
+            return None
+
+        if isinstance(timestamp, datetime):
+            return timestamp
+
+        if isinstance(timestamp, bool):
+            return None
+
+        if isinstance(timestamp, (int, float)):
+            return _from_epoch(timestamp)
+
+        if isinstance(timestamp, str):
+            return self._parse_cached(timestamp, field)
+
+        return None
+
+    def cache_info(self) -> Any:
+        """Return hit/miss statistics of the string cache."""
+        return self._parse_cached.cache_info()
+
+    def clear(self) -> None:
+        """Forget cached results and sniffed formats."""
+        self._parse_cached.cache_clear()
+        self._field_parsers.clear()
+
+    def _parse_string(self, value: str, field: str | None) -> datetime | None:
+        """Parse a string, using the parser that last worked for its field."""
+        value = value.strip()
+        if not value:
+            return None
+
+        if (parser := self._field_parsers.get(field)) is not None:
+            if (result := parser(value)) is not None:
+                return result
+
+        for candidate in _PARSERS:
+            if candidate is parser:
+                continue
+            if (result := candidate(value)) is not None:
+                self._field_parsers[field] = candidate
+                return result
+
+        return None
@@ -0,0 +1,229 @@
+"""Recent position tracks of ships for Duluth Ship Tracker."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+import math
+from typing import TYPE_CHECKING, Any
+
+from .const import TRACK_MAX_POINTS, TRACK_RETENTION_HOURS
+from .diff import ship_key
+from .geo import ship_position
+
+if TYPE_CHECKING:
+    from .api import Ship, ShipSnapshot
+    from .diff import SnapshotDiff
+
+# (latitude, longitude, POSIX time)
+TrackPoint = tuple[float, float, float]
+
+_POSITION_FIELDS = frozenset({"latitude", "longitude"})
+
+
+class ShipTrack:
+    """Ring buffer of a ship's last positions.
+
+    Points are stored flat as latitude, longitude, time in one array('d'),
+    24 bytes each; once `capacity` points are held the oldest is overwritten.
+    """
+
+    __slots__ = ("capacity", "_points", "_start")
+
+    def __init__(self, capacity: int = TRACK_MAX_POINTS) -> None:
+        """Initialize an empty track."""
+        self.capacity = capacity
+        self._points = array("d")
+        self._start = 0
+
+    def __len__(self) -> int:
+        """Return the number of points held."""
+        return len(self._points) // 3
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the point buffer."""
+        return self._points.buffer_info()[1] * self._points.itemsize
+
+    @property
+    def last(self) -> TrackPoint | None:
+        """Return the newest point."""
+        if not self._points:
+            return None
+        index = (self._start - 1) % len(self) * 3
+        lat, lon, when = self._points[index : index + 3]
+        return lat, lon, when
+
+    def append(self, lat: float, lon: float, when: float) -> bool:
+        """Add a position fix; return False if it is not newer or did not move."""
+        if (last := self.last) is not None and (
+            when <= last[2] or (lat, lon) == (last[0], last[1])
+        ):
+            return False
+        if len(self) < self.capacity:
+            self._points.extend((lat, lon, when))
+        else:
+            index = self._start * 3
+            self._points[index : index + 3] = array("d", (lat, lon, when))
+            self._start = (self._start + 1) % self.capacity
+        return True
+
+    def points(
+        self, start: float | None = None, end: float | None = None
+    ) -> list[TrackPoint]:
+        """Return the points between two POSIX times, oldest first."""
+        count = len(self)
+        values = self._points
+        found = []
+        for offset in range(count):
+            index = (self._start + offset) % count * 3
+            when = values[index + 2]
+            if (start is None or when >= start) and (end is None or when <= end):
+                found.append((values[index], values[index + 1], when))
+        return found
+
+
+def simplify(points: Sequence[TrackPoint], tolerance_nm: float) -> list[TrackPoint]:
+    """Drop points closer than a tolerance to the line (Douglas–Peucker).
+
+    Positions are projected onto a flat plane in nautical miles, which is
+    accurate enough over the few tens of miles a track covers.
+    """
+    count = len(points)
+    if count < 3 or tolerance_nm <= 0:
+        return list(points)
+
+    scale = 60 * math.cos(math.radians(points[0][0]))
+    xy = [(lon * scale, lat * 60) for lat, lon, _ in points]
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = xy[first], xy[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+        worst, worst_index = 0.0, first
+        for index in range(first + 1, last):
+            x, y = xy[index]
+            if length:
+                distance = abs(dy * (x - x1) - dx * (y - y1)) / length
+            else:
+                # Returned to where it started; measure from that point
+                distance = math.hypot(x - x1, y - y1)
+            if distance > worst:
+                worst, worst_index = distance, index
+        if worst > tolerance_nm:
+            keep[worst_index] = True
+            stack.append((first, worst_index))
+            stack.append((worst_index, last))
+
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+class ShipTracks:
+    """Keep a bounded track of every ship that reports a position.
+
+    Tracks of ships that left the feed are kept until their last fix is older
+    than the retention period, so recent departures can still be drawn.
+    """
+
+    def __init__(
+        self,
+        capacity: int = TRACK_MAX_POINTS,
+        retention: timedelta = timedelta(hours=TRACK_RETENTION_HOURS),
+    ) -> None:
+        """Initialize the tracks."""
+        self.capacity = capacity
+        self.retention = retention
+        self.tracks: dict[str, ShipTrack] = {}
+        self.ships: dict[str, Ship] = {}
+
+    def update(self, snapshot: ShipSnapshot, diff: SnapshotDiff | None = None) -> None:
+        """Record the positions of a new snapshot.
+
+        Without a diff every ship is recorded; with one only the added ships
+        and those whose position changed.
+        """
+        fallback = snapshot.generated_at
+        if diff is None:
+            for key, ship in snapshot.ships.items():
+                self._record(key, ship, fallback)
+        else:
+            for ship in diff.added:
+                self._record(ship_key(ship), ship, fallback)
+            for change in diff.changed:
+                if _POSITION_FIELDS.intersection(change.changes):
+                    self._record(change.key, change.ship, fallback)
+                elif change.key in self.ships:
+                    self.ships[change.key] = change.ship
+
+        cutoff = (fallback - self.retention).timestamp()
+        for key in [
+            key
+            for key, track in self.tracks.items()
+            if key not in snapshot.ships and track.last[2] < cutoff
+        ]:
+            del self.tracks[key]
+            del self.ships[key]
+
+    def _record(self, key: str, ship: Ship, fallback: datetime) -> None:
+        """Append one ship's position fix, timed by its last report."""
+        if (position := ship_position(ship)) is None:
+            return
+        if (track := self.tracks.get(key)) is None:
+            track = self.tracks[key] = ShipTrack(self.capacity)
+        track.append(*position, (ship.last_update or fallback).timestamp())
+        self.ships[key] = ship
+
+    def as_geojson(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        tolerance_nm: float = 0.0,
+        ship_name: str | None = None,
+    ) -> dict[str, Any]:
+        """Return the tracks in a time window as a GeoJSON FeatureCollection.
+
+        Each ship is one LineString feature (a Point if it has a single fix);
+        the time of every kept vertex is in the `times` property.
+        """
+        first = start.timestamp() if start else None
+        last = end.timestamp() if end else None
+        needle = ship_name.lower() if ship_name else None
+
+        features = []
+        for key, track in self.tracks.items():
+            ship = self.ships[key]
+            if needle is not None and needle not in str(ship.ship_name).lower():
+                continue
+            if not (points := simplify(track.points(first, last), tolerance_nm)):
+                continue
+            coordinates = [[lon, lat] for lat, lon, _ in points]
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "LineString" if len(points) > 1 else "Point",
+                        "coordinates": coordinates if len(points) > 1 else coordinates[0],
+                    },
+                    "properties": {
+                        "ship_name": ship.ship_name,
+                        "mmsi": ship.mmsi,
+                        "imo": ship.imo,
+                        "times": [
+                            datetime.fromtimestamp(when).isoformat()
+                            for _, _, when in points
+                        ],
+                    },
+                }
+            )
+        return {"type": "FeatureCollection", "features": features}
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return buffer statistics for diagnostics."""
+        return {
+            "ships": len(self.tracks),
+            "points": sum(len(track) for track in self.tracks.values()),
+            "bytes": sum(track.nbytes for track in self.tracks.values()),
+        }
@@ -0,0 +1,50 @@
+"""Tests for the Duluth Ship Tracker integration."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+from typing import Any
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.duluth_ship_tracker.const import CONF_ENDPOINTS, DOMAIN
+
+# The benchmarks' stub server stands in for the Harbor Lookout API
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+from stub_server import StubServer  # noqa: E402
+
+
+def at(**delta: float) -> str:
+    """Return a naive local time relative to now, as the feed sends it."""
+    return (datetime.now() + timedelta(**delta)).isoformat(timespec="seconds")
+
+
+def ship(name: str, mmsi: int, **fields: Any) -> dict[str, Any]:
+    """Return one feed record."""
+    return {
+        "name": name,
+        "mmsi": mmsi,
+        "type": "Bulk Carrier",
+        "cargo": "Iron Ore",
+        "status": "Expected",
+        **fields,
+    }
+
+
+async def setup_entry(
+    hass: HomeAssistant, stub: StubServer, **options: Any
+) -> MockConfigEntry:
+    """Add and set up an entry polling the stub server."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={},
+        options={CONF_ENDPOINTS: [stub.url], **options},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
@@ -0,0 +1,22 @@
+"""Fixtures for Duluth Ship Tracker tests."""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+import pytest
+
+from . import StubServer
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    """Load the integration from custom_components."""
+
+
+@pytest.fixture
+async def stub(socket_enabled: None) -> AsyncIterator[StubServer]:
+    """Serve ship payloads on a local port."""
+    server = StubServer([])
+    await server.start()
+    yield server
+    await server.stop()
@@ -0,0 +1,179 @@
+"""Tests for the Harbor Lookout client."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from custom_components.duluth_ship_tracker import api as api_module
+from custom_components.duluth_ship_tracker.api import HarborLookoutApi, Ship, ShipParser
+from custom_components.duluth_ship_tracker.const import STREAM_THRESHOLD_BYTES
+from custom_components.duluth_ship_tracker.offload import PipelineExecutor
+
+from . import StubServer, at, ship
+
+
+async def test_conditional_get(
+    hass: HomeAssistant, stub: StubServer, caplog: pytest.LogCaptureFixture
+) -> None:
+    """An unchanged feed is answered with 304 and not parsed again."""
+    caplog.set_level(logging.DEBUG, logger=api_module.__name__)
+    stub.set_ships([ship("Alpha", 1, eta=at(hours=2))])
+    client = HarborLookoutApi(async_get_clientsession(hass), stub.url)
+
+    snapshot = await client.get_snapshot_if_changed()
+    assert [entry.ship_name for entry in snapshot.arriving] == ["Alpha"]
+
+    assert await client.get_snapshot_if_changed() is None
+    assert "Ship data not modified" in caplog.text
+    assert stub.requests == 2
+
+    stub.set_ships([ship("Alpha", 1, eta=at(hours=2)), ship("Bravo", 2, eta=at(hours=3))])
+    snapshot = await client.get_snapshot_if_changed()
+    assert [entry.ship_name for entry in snapshot.arriving] == ["Alpha", "Bravo"]
+
+
+async def test_unchanged_body_without_validators(
+    hass: HomeAssistant, socket_enabled: None, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Without an ETag, an identical body is recognized by its hash."""
+    caplog.set_level(logging.DEBUG, logger=api_module.__name__)
+    server = StubServer([ship("Alpha", 1, eta=at(hours=2))], etag=False)
+    await server.start()
+    try:
+        client = HarborLookoutApi(async_get_clientsession(hass), server.url)
+        assert await client.get_snapshot_if_changed() is not None
+        assert await client.get_snapshot_if_changed() is None
+        assert "Ship data unchanged" in caplog.text
+    finally:
+        await server.stop()
+
+
+@pytest.mark.parametrize("wrapped", [False, True])
+async def test_streamed_matches_buffered(
+    hass: HomeAssistant,
+    stub: StubServer,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    wrapped: bool,
+) -> None:
+    """Streaming and whole-body parsing give the same snapshot."""
+    caplog.set_level(logging.DEBUG, logger=api_module.__name__)
+    ships = [
+        ship(f"Vessel {index}", index, eta=at(hours=index), etd=at(hours=index + 6))
+        for index in range(1, 40)
+    ]
+    stub.set_ships({"ships": ships} if wrapped else ships)
+    session = async_get_clientsession(hass)
+    executor = PipelineExecutor(hass.async_add_executor_job)
+
+    buffered = await HarborLookoutApi(
+        session, stub.url, executor=executor
+    ).get_snapshot_if_changed()
+    assert "Streamed" not in caplog.text
+
+    monkeypatch.setattr(api_module, "STREAM_THRESHOLD_BYTES", 0)
+    streamed = await HarborLookoutApi(
+        session, stub.url, executor=executor
+    ).get_snapshot_if_changed()
+    assert "Streamed 39 ships from API" in caplog.text
+
+    assert streamed.ships == buffered.ships
+    assert streamed.arriving == buffered.arriving
+    assert streamed.departing == buffered.departing
+    assert streamed.total_count == buffered.total_count == 39
+
+
+async def test_malformed_records_are_skipped(hass: HomeAssistant, stub: StubServer) -> None:
+    """A bad record does not fail the rest of the payload."""
+    stub.set_ships([ship("Alpha", 1, eta=at(hours=2)), "not a ship", 42])
+    client = HarborLookoutApi(async_get_clientsession(hass), stub.url)
+
+    snapshot = await client.get_snapshot_if_changed()
+    assert list(snapshot.ships) == ["mmsi:1"]
+    assert snapshot.total_count == 3
+
+
+
+@pytest.fixture
+def parsed(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    """Record the batch sizes passed to ShipParser.parse_each."""
+    batches: list[int] = []
+    parse_each = ShipParser.parse_each
+
+    def counting(self: ShipParser, ships: list[Any]) -> list[Ship]:
+        batches.append(len(ships))
+        return parse_each(self, ships)
+
+    monkeypatch.setattr(ShipParser, "parse_each", counting)
+    return batches
+
+
+async def _fetch_twice(
+    hass: HomeAssistant, server: StubServer, parsed: list[int], count: int
+) -> None:
+    """Fetch a changed body, then the same body again without parsing it."""
+    await server.start()
+    try:
+        client = HarborLookoutApi(async_get_clientsession(hass), server.url)
+        snapshot = await client.get_snapshot_if_changed()
+        assert snapshot.total_count == sum(parsed) == count
+
+        parsed.clear()
+        assert await client.get_snapshot_if_changed() is None
+        assert parsed == []
+        assert server.requests == 2
+    finally:
+        await server.stop()
+
+
+async def test_unchanged_streamed_body_is_not_decoded(
+    hass: HomeAssistant,
+    socket_enabled: None,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    parsed: list[int],
+) -> None:
+    """A streamed body is hashed before any of it is decoded or parsed."""
+    caplog.set_level(logging.DEBUG, logger=api_module.__name__)
+    monkeypatch.setattr(api_module, "STREAM_THRESHOLD_BYTES", 0)
+    server = StubServer([ship("Alpha", 1, eta=at(hours=2))], etag=False)
+    await _fetch_twice(hass, server, parsed, 1)
+    assert caplog.text.count("Streamed 1 ships from API") == 1
+
+
+async def test_chunked_body_without_content_length(
+    hass: HomeAssistant,
+    socket_enabled: None,
+    caplog: pytest.LogCaptureFixture,
+    parsed: list[int],
+) -> None:
+    """A chunked response has no Content-Length and is always streamed."""
+    caplog.set_level(logging.DEBUG, logger=api_module.__name__)
+    ships = [ship(f"Vessel {index}", index, eta=at(hours=index)) for index in range(1, 60)]
+    server = StubServer(ships, etag=False, chunked=True, chunk_size=512)
+    await _fetch_twice(hass, server, parsed, 59)
+    assert caplog.text.count("Streamed 59 ships from API") == 1
+
+
+async def test_body_over_stream_threshold(
+    hass: HomeAssistant,
+    socket_enabled: None,
+    caplog: pytest.LogCaptureFixture,
+    parsed: list[int],
+) -> None:
+    """A body over the threshold is streamed even with a Content-Length."""
+    caplog.set_level(logging.DEBUG, logger=api_module.__name__)
+    padding = "x" * 1024
+    ships = [
+        ship(f"Vessel {index}", index, eta=at(hours=index % 48), remarks=padding)
+        for index in range(1, 1200)
+    ]
+    server = StubServer(ships, etag=False)
+    assert len(server.body) > STREAM_THRESHOLD_BYTES
+    await _fetch_twice(hass, server, parsed, 1199)
+    assert caplog.text.count("Streamed 1199 ships from API") == 1
@@ -0,0 +1,88 @@
+"""Tests for snapshot diffs and the change feed."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.duluth_ship_tracker.api import Ship, ShipSnapshot
+from custom_components.duluth_ship_tracker.const import CHANGES_LISTED, DOMAIN
+from custom_components.duluth_ship_tracker.coordinator import (
+    DuluthShipTrackerCoordinator,
+)
+from custom_components.duluth_ship_tracker.diff import (
+    compact_changes,
+    diff_snapshots,
+    ship_key,
+)
+
+from . import StubServer, at, setup_entry, ship
+
+ETA = datetime(2024, 5, 1, 12, 0)
+
+
+def snapshot(*ships: Ship) -> ShipSnapshot:
+    """Return a snapshot holding the given ships."""
+    return ShipSnapshot(ships={ship_key(ship): ship for ship in ships}, total_count=len(ships))
+
+
+def test_compact_changes() -> None:
+    """Added ships come first, then changed fields, then removed ships."""
+    old = snapshot(
+        Ship("Alpha", 1, status="Expected", eta=ETA),
+        Ship("Bravo", 2, status="Moored", destination="Duluth"),
+        Ship("Charlie", 3, latitude=46.7, longitude=-92.0),
+        Ship("Delta", 4),
+    )
+    new = snapshot(
+        Ship("Echo", 5, status="Expected", eta=ETA),
+        Ship("Alpha", 1, status="Arrived", eta=ETA),
+        Ship("Bravo", 2, status="Moored", destination=None),
+        # Only moved: not part of the change feed
+        Ship("Charlie", 3, latitude=46.8, longitude=-92.0),
+    )
+
+    assert compact_changes(diff_snapshots(old, new)) == [
+        {
+            "key": "mmsi:5",
+            "name": "Echo",
+            "status": "Expected",
+            "arrival": int(ETA.timestamp()),
+        },
+        {"key": "mmsi:1", "status": "Arrived"},
+        {"key": "mmsi:2", "destination": None},
+        {"key": "mmsi:4", "removed": True},
+    ]
+
+
+async def test_changes_sensor_lists_first_deltas(
+    hass: HomeAssistant, stub: StubServer
+) -> None:
+    """A large poll is counted in full but lists only CHANGES_LISTED deltas."""
+    stub.set_ships([ship(f"Old {index}", index, eta=at(hours=index)) for index in range(1, 11)])
+    entry = await setup_entry(hass, stub)
+    coordinator: DuluthShipTrackerCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    # 20 added, 5 changed and 5 removed
+    stub.set_ships(
+        [ship(f"New {index}", index, eta=at(hours=index)) for index in range(101, 121)]
+        + [ship(f"Old {index}", index, status="Arrived") for index in range(1, 6)]
+    )
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.duluth_ship_changes")
+    assert state.state == "30"
+    assert state.attributes["added"] == 20
+    assert state.attributes["changed"] == 5
+    assert state.attributes["removed"] == 5
+    changes = state.attributes["changes"]
+    assert len(changes) == CHANGES_LISTED == 25
+    assert [change["key"] for change in changes] == [
+        *(f"mmsi:{index}" for index in range(101, 121)),
+        *(f"mmsi:{index}" for index in range(1, 6)),
+    ]
+    assert all(change["status"] == "Arrived" for change in changes[20:])
+    assert not any(change.get("removed") for change in changes)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
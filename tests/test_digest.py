@@ -0,0 +1,151 @@
+"""Tests for the daily digest and announcement."""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+import logging
+
+from freezegun.api import FrozenDateTimeFactory
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+import pytest
+
+from homeassistant.core import Event, HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.duluth_ship_tracker import digest as digest_module
+from custom_components.duluth_ship_tracker.api import Ship, build_snapshot
+from custom_components.duluth_ship_tracker.const import EVENT_DAILY_ANNOUNCEMENT
+from custom_components.duluth_ship_tracker.digest import (
+    DailyAnnouncer,
+    DailyDigest,
+    build_digest,
+    day_bounds,
+)
+
+DAY = date(2024, 5, 1)
+
+
+async def test_only_ships_of_today_across_midnight(hass: HomeAssistant) -> None:
+    """Movements just before and after local midnight belong to other days."""
+    start, end = day_bounds(DAY)
+    now = start + timedelta(hours=10)
+    minute = timedelta(minutes=1)
+    ships = [
+        Ship("Yesterday", 1, eta=start - minute),
+        Ship("Midnight", 2, eta=start),
+        Ship("Late", 3, eta=end - minute),
+        Ship("Tomorrow", 4, eta=end),
+        Ship("Overnight", 5, status="Moored", etd=end + minute),
+    ]
+
+    digest = build_digest(build_snapshot(ships, now=now, predict=False), now)
+
+    assert digest.day == DAY
+    assert [entry["name"] for entry in digest.arrivals] == ["Midnight", "Late"]
+    assert digest.departures == ()
+    assert digest.next_movement == end - minute
+
+
+async def test_passed_movements(hass: HomeAssistant) -> None:
+    """Movements already made are flagged and summarized separately."""
+    start, _ = day_bounds(DAY)
+    now = start + timedelta(hours=12)
+    ships = [
+        Ship("Early", 1, status="Arrived", arrival_time=now - timedelta(hours=3)),
+        Ship("Exactly Now", 2, eta=now),
+        Ship("Evening", 3, eta=now + timedelta(hours=6)),
+        Ship("Gone", 4, status="Departed", departure_time=now - timedelta(hours=1)),
+    ]
+
+    digest = build_digest(build_snapshot(ships, now=now, predict=False), now)
+
+    assert [(entry["name"], entry["passed"]) for entry in digest.arrivals] == [
+        ("Early", True),
+        ("Exactly Now", True),
+        ("Evening", False),
+    ]
+    assert [(entry["name"], entry["passed"]) for entry in digest.departures] == [
+        ("Gone", True)
+    ]
+    data = digest.as_dict()
+    assert data["arriving_count"] == 3
+    assert data["arrived_count"] == 2
+    assert data["departing_count"] == 1
+    assert data["departed_count"] == 1
+    assert digest.summary.startswith(
+        "2 ships arrived earlier today. 1 ship arriving today: Evening at "
+    )
+    assert digest.summary.endswith(" 1 ship departed earlier today.")
+    assert digest.next_movement == now + timedelta(hours=6)
+
+
+async def test_no_traffic(hass: HomeAssistant) -> None:
+    """A day without movements says so, after the ships in harbor."""
+    start, _ = day_bounds(DAY)
+    now = start + timedelta(hours=8)
+
+    empty = build_digest(build_snapshot([], now=now), now)
+    assert empty.summary == "No ships scheduled for arrival or departure today."
+    assert empty.movements == 0
+    assert empty.next_movement is None
+
+    moored = build_digest(
+        build_snapshot([Ship("Docked", 1, status="Moored")], now=now), now
+    )
+    assert moored.summary == (
+        "1 ship currently in harbor. No ships scheduled for arrival or departure today."
+    )
+
+
+async def test_daily_announcement(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """The event fires at the configured local time with the digest's counts."""
+    caplog.set_level(logging.DEBUG, logger=digest_module.__name__)
+    start, _ = day_bounds(DAY)
+    now = start + timedelta(hours=6)
+    digest: DailyDigest | None = None
+    events: list[Event] = []
+    hass.bus.async_listen(EVENT_DAILY_ANNOUNCEMENT, events.append)
+
+    announcer = DailyAnnouncer(hass, lambda: digest, "07:30")
+    before = datetime(2024, 5, 1, 7, 29, 59, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    freezer.move_to(before)
+    announcer.async_start()
+
+    # Without data yet there is nothing to announce
+    freezer.move_to(before + timedelta(seconds=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert "skipping the daily announcement" in caplog.text
+    assert events == []
+
+    digest = build_digest(
+        build_snapshot(
+            [
+                Ship("Alpha", 1, eta=now + timedelta(hours=2)),
+                Ship("Bravo", 2, eta=now + timedelta(hours=3)),
+                Ship("Charlie", 3, status="Moored", etd=now + timedelta(hours=4)),
+            ],
+            now=now,
+            predict=False,
+        ),
+        now,
+    )
+    freezer.move_to(before + timedelta(days=1, seconds=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+    assert len(events) == 1
+    data = events[0].data
+    assert data["arriving_count"] == 2
+    assert data["departing_count"] == 1
+    assert data["in_harbor_count"] == 1
+    assert data == digest.as_dict()
+
+    announcer.async_stop()
+    freezer.move_to(before + timedelta(days=2, seconds=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert len(events) == 1
@@ -0,0 +1,123 @@
+"""Tests for zones and the spatial index."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.duluth_ship_tracker.api import Ship, ShipSnapshot
+from custom_components.duluth_ship_tracker.diff import diff_snapshots, ship_key
+from custom_components.duluth_ship_tracker.geo import (
+    GeoTracker,
+    Position,
+    Zone,
+    zones_from_config,
+)
+
+
+def square(name: str, south: float, west: float, size: float = 1.0) -> Zone:
+    """Return a square zone with its south-west corner at (south, west)."""
+    north, east = south + size, west + size
+    return Zone(name, ((south, west), (south, east), (north, east), (north, west)))
+
+
+def snapshot(*ships: Ship) -> ShipSnapshot:
+    """Return a snapshot holding the given ships."""
+    return ShipSnapshot(ships={ship_key(ship): ship for ship in ships}, total_count=len(ships))
+
+
+def at(name: str, mmsi: int, position: Position | None) -> Ship:
+    """Return a ship at a position, or without one."""
+    lat, lon = position if position is not None else (None, None)
+    return Ship(name, mmsi, latitude=lat, longitude=lon)
+
+
+def test_contains_interior_and_outside() -> None:
+    """Points inside the polygon are contained, others are not."""
+    zone = square("Harbor", 46.0, -92.0)
+    assert zone.contains((46.5, -91.5))
+    assert not zone.contains((47.5, -91.5))
+    assert not zone.contains((46.5, -90.5))
+
+
+def test_concave_polygon() -> None:
+    """The notch of an L-shaped zone is outside it, even within the bounds."""
+    zone = Zone("L", ((0, 0), (0, 2), (1, 2), (1, 1), (2, 1), (2, 0)))
+    assert zone.contains((0.5, 1.5))
+    assert zone.contains((1.5, 0.5))
+    assert not zone.contains((1.5, 1.5))
+
+
+@pytest.mark.parametrize(
+    "position",
+    [
+        # Shared edges
+        (1.0, 0.5),
+        (1.0, 1.5),
+        (0.5, 1.0),
+        (1.5, 1.0),
+        # The vertex all four share
+        (1.0, 1.0),
+    ],
+)
+def test_shared_edges_and_vertices_belong_to_one_zone(position: Position) -> None:
+    """A point on a border between tiled zones is inside exactly one of them."""
+    zones = [square(f"{lat},{lon}", lat, lon) for lat in (0.0, 1.0) for lon in (0.0, 1.0)]
+    assert sum(zone.contains(position) for zone in zones) == 1
+
+
+def test_outer_vertices() -> None:
+    """Only the south-west corner of a lone square counts as inside."""
+    zone = square("Harbor", 0.0, 0.0)
+    assert zone.contains((0.0, 0.0))
+    assert not zone.contains((0.0, 1.0))
+    assert not zone.contains((1.0, 1.0))
+    assert not zone.contains((1.0, 0.0))
+
+
+def test_zones_from_config() -> None:
+    """Zones are built from lists of points and need three of them."""
+    (zone,) = zones_from_config({"Canal": [["46.0", -92], [46, -91], [47, -91]]})
+    assert zone.name == "Canal"
+    assert zone.polygon == ((46.0, -92.0), (46.0, -91.0), (47.0, -91.0))
+    assert zone.bounds == (46.0, -92.0, 47.0, -91.0)
+    with pytest.raises(ValueError):
+        zones_from_config({"Line": [[46, -92], [47, -91]]})
+
+
+def test_entering_and_leaving() -> None:
+    """Entries and exits are reported once, as ships move, vanish or lose position."""
+    tracker = GeoTracker([square("Harbor", 0.0, 0.0, 2.0)])
+
+    def update(previous: ShipSnapshot, current: ShipSnapshot) -> list[tuple[str, bool]]:
+        return [
+            (change.ship.ship_name, change.entered)
+            for change in tracker.update(current, diff_snapshots(previous, current))
+        ]
+
+    first = snapshot(at("Alpha", 1, (1.0, 1.0)), at("Bravo", 2, (5.0, 5.0)))
+    assert [(c.zone.name, c.ship.ship_name, c.entered) for c in tracker.update(first)] == [
+        ("Harbor", "Alpha", True)
+    ]
+
+    moved = snapshot(at("Alpha", 1, (1.5, 1.5)), at("Bravo", 2, (0.5, 0.5)))
+    assert update(first, moved) == [("Bravo", True)]
+    assert [ship.ship_name for ship in tracker.ships_in("Harbor")] == ["Alpha", "Bravo"]
+
+    left = snapshot(at("Alpha", 1, (3.0, 3.0)), at("Bravo", 2, (0.5, 0.5)))
+    assert update(moved, left) == [("Alpha", False)]
+
+    lost = snapshot(at("Alpha", 1, (3.0, 3.0)), at("Bravo", 2, None))
+    assert update(left, lost) == [("Bravo", False)]
+
+    back = snapshot(at("Alpha", 1, (1.0, 1.0)), at("Bravo", 2, None))
+    assert update(lost, back) == [("Alpha", True)]
+
+    # A ship dropped from the feed leaves, reported with its last known state
+    gone = snapshot(at("Bravo", 2, None))
+    changes = tracker.update(gone, diff_snapshots(back, gone))
+    assert [(change.ship.ship_name, change.entered) for change in changes] == [("Alpha", False)]
+    assert changes[0].ship.latitude == 1.0
+    assert tracker.ships_in("Harbor") == []
+
+    # Without a diff everything is placed again, reporting only real changes
+    assert tracker.update(gone) == []
+    assert [(c.ship.ship_name, c.entered) for c in tracker.update(back)] == [("Alpha", True)]
@@ -0,0 +1,155 @@
+"""Tests for the voyage history store."""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
+from pathlib import Path
+import sqlite3
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.duluth_ship_tracker.history import (
+    EVENT_ARRIVAL,
+    EVENT_DEPARTURE,
+    EVENT_STATUS,
+    Transition,
+    VoyageHistory,
+)
+
+BASE = (datetime.now() - timedelta(days=2)).timestamp()
+
+
+def row(
+    key: str, name: str, event: str, hours: float, cargo: str = "Iron Ore"
+) -> Transition:
+    """Return one transition `hours` after BASE."""
+    return (key, name, "Bulk Carrier", event, BASE + hours * 3600, "Moored", None, cargo)
+
+
+@pytest.fixture
+async def history(hass: HomeAssistant, tmp_path: Path) -> AsyncIterator[VoyageHistory]:
+    """Return a store in a temporary directory."""
+    history = VoyageHistory(hass, str(tmp_path / "history" / "voyages.db"))
+    yield history
+    await history.async_close()
+
+
+async def test_schema(
+    hass: HomeAssistant, history: VoyageHistory, tmp_path: Path
+) -> None:
+    """The first write creates the tables and indexes."""
+    history.async_record([row("mmsi:1", "Alpha", EVENT_ARRIVAL, 0)])
+    await hass.async_block_till_done()
+    await history.async_close()
+
+    conn = sqlite3.connect(tmp_path / "history" / "voyages.db")
+    try:
+        names = {
+            name
+            for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'index')"
+                " AND name NOT LIKE 'sqlite_%'"
+            )
+        }
+        columns = [column[1] for column in conn.execute("PRAGMA table_info(transitions)")]
+        ships = conn.execute("SELECT * FROM ships").fetchall()
+    finally:
+        conn.close()
+
+    assert names == {
+        "ships",
+        "transitions",
+        "idx_ships_name",
+        "idx_transitions_ship_time",
+        "idx_transitions_time",
+    }
+    assert columns == [
+        "id", "ship_key", "event", "time", "status", "previous_status", "cargo"
+    ]
+    assert ships == [("mmsi:1", "Alpha", "Bulk Carrier")]
+
+
+async def test_visits_match_name_literally(
+    hass: HomeAssistant, history: VoyageHistory
+) -> None:
+    """Wildcards in the searched name match only themselves."""
+    history.async_record(
+        [
+            row("mmsi:1", "Edwin H. Gott", EVENT_ARRIVAL, 0),
+            row("mmsi:2", "100% Pure", EVENT_ARRIVAL, 1),
+            row("mmsi:3", "1000 Islands", EVENT_ARRIVAL, 2),
+            row("mmsi:4", "Arthur_M", EVENT_ARRIVAL, 3),
+            row("mmsi:5", "ArthurXM", EVENT_ARRIVAL, 4),
+            row("mmsi:6", "Back\\Slash", EVENT_ARRIVAL, 5),
+            row("mmsi:1", "Edwin H. Gott", EVENT_DEPARTURE, 6),
+        ]
+    )
+    await hass.async_block_till_done()
+
+    async def names(query: str) -> list[str]:
+        return [visit["ship_name"] for visit in await history.async_visits(query)]
+
+    assert await names("gott") == ["Edwin H. Gott"]
+    assert await names("100%") == ["100% Pure"]
+    assert await names("%") == ["100% Pure"]
+    assert await names("r_M") == ["Arthur_M"]
+    assert await names("_") == ["Arthur_M"]
+    assert await names("k\\S") == ["Back\\Slash"]
+    assert await names("") == [
+        "Edwin H. Gott", "100% Pure", "1000 Islands", "Arthur_M", "ArthurXM", "Back\\Slash"
+    ]
+
+
+async def test_dwell_times(hass: HomeAssistant, history: VoyageHistory) -> None:
+    """Dwell is the gap from each arrival to the same ship's next departure."""
+    history.async_record(
+        [
+            row("mmsi:1", "Alpha", EVENT_ARRIVAL, 0),
+            row("mmsi:1", "Alpha", EVENT_STATUS, 1),
+            row("mmsi:1", "Alpha", EVENT_DEPARTURE, 4),
+            row("mmsi:2", "Bravo", EVENT_ARRIVAL, 2),
+            row("mmsi:2", "Bravo", EVENT_DEPARTURE, 4),
+            row("mmsi:1", "Alpha", EVENT_ARRIVAL, 10),
+            row("mmsi:1", "Alpha", EVENT_DEPARTURE, 16),
+            row("mmsi:3", "Charlie", EVENT_ARRIVAL, 3, cargo="Grain"),
+            row("mmsi:3", "Charlie", EVENT_DEPARTURE, 12, cargo="Grain"),
+            # Still in port: no departure to pair with
+            row("mmsi:4", "Delta", EVENT_ARRIVAL, 5, cargo="Coal"),
+        ]
+    )
+    await hass.async_block_till_done()
+
+    assert await history.async_dwell_times() == {
+        "Grain": {"average_hours": 9.0, "visits": 1},
+        "Iron Ore": {"average_hours": 4.0, "visits": 3},
+    }
+    since = datetime.fromtimestamp(BASE + 5 * 3600)
+    assert await history.async_dwell_times(since) == {
+        "Iron Ore": {"average_hours": 6.0, "visits": 1},
+    }
+
+
+async def test_close_drains_pending_writes(
+    hass: HomeAssistant, history: VoyageHistory, tmp_path: Path
+) -> None:
+    """Writes queued before closing are committed; later ones are dropped."""
+    for hours in range(5):
+        history.async_record([row("mmsi:1", "Alpha", EVENT_ARRIVAL, hours)])
+    assert history._writes
+
+    await history.async_close()
+    assert not history._writes
+    history.async_record([row("mmsi:1", "Alpha", EVENT_ARRIVAL, 6)])
+    assert not history._writes
+
+    conn = sqlite3.connect(tmp_path / "history" / "voyages.db")
+    try:
+        (count,) = conn.execute("SELECT COUNT(*) FROM transitions").fetchone()
+    finally:
+        conn.close()
+    assert count == 5
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        await history.async_visits("Alpha")
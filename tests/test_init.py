@@ -0,0 +1,172 @@
+"""Tests for setting up Duluth Ship Tracker and polling the feed."""
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import Event, EventOrigin, HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.duluth_ship_tracker.const import (
+    ATTR_ARRIVAL_TIME,
+    ATTR_DEPARTURE_TIME,
+    CONF_ENDPOINTS,
+    CONF_LIST_LIMIT,
+    DOMAIN,
+    EVENT_SHIP_ARRIVING,
+    EVENT_SHIP_DEPARTING,
+)
+from custom_components.duluth_ship_tracker.coordinator import (
+    DuluthShipTrackerCoordinator,
+)
+
+from . import StubServer, at, setup_entry, ship
+
+EVENT_FIELDS = {"ship_name", "mmsi", "imo", "ship_type", "cargo", "destination"}
+
+
+def _events(hass: HomeAssistant, event_type: str) -> list[Event]:
+    """Collect the events of one type."""
+    events: list[Event] = []
+    hass.bus.async_listen(event_type, events.append)
+    return events
+
+
+async def test_setup(hass: HomeAssistant, stub: StubServer) -> None:
+    """Sensors are created from the first poll."""
+    stub.set_ships(
+        [
+            ship("Alpha", 1, eta=at(hours=2)),
+            ship("Bravo", 2, status="Moored", etd=at(hours=3)),
+        ]
+    )
+    entry = await setup_entry(hass, stub)
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert hass.states.get("sensor.duluth_next_arriving_ship").state == "Alpha"
+    assert hass.states.get("sensor.duluth_next_departing_ship").state == "Bravo"
+    assert hass.states.get("sensor.duluth_ships_in_harbor").state == "1"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_changes_fire_events(hass: HomeAssistant, stub: StubServer) -> None:
+    """Only new arrivals and changed departures fire events, with ship details."""
+    stub.set_ships(
+        [
+            ship("Alpha", 1, eta=at(hours=2)),
+            ship("Bravo", 2, status="Moored", etd=at(hours=3)),
+        ]
+    )
+    arriving = _events(hass, EVENT_SHIP_ARRIVING)
+    departing = _events(hass, EVENT_SHIP_DEPARTING)
+    entry = await setup_entry(hass, stub)
+    coordinator: DuluthShipTrackerCoordinator = hass.data[DOMAIN][entry.entry_id]
+    # No event storm for the ships already there at startup
+    assert not arriving and not departing
+
+    later = at(hours=5)
+    stub.set_ships(
+        [
+            ship("Alpha", 1, eta=at(hours=2)),
+            ship("Bravo", 2, status="Moored", etd=later),
+            ship("Charlie", 3, eta=at(hours=1)),
+        ]
+    )
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert [event.data["ship_name"] for event in arriving] == ["Charlie"]
+    assert set(arriving[0].data) == EVENT_FIELDS | {ATTR_ARRIVAL_TIME}
+    assert [event.data["ship_name"] for event in departing] == ["Bravo"]
+    assert departing[0].data == {
+        "ship_name": "Bravo",
+        "mmsi": 2,
+        "imo": None,
+        "ship_type": "Bulk Carrier",
+        "cargo": "Iron Ore",
+        "destination": None,
+        ATTR_DEPARTURE_TIME: later,
+    }
+    assert departing[0].origin is EventOrigin.local
+
+    changes = hass.states.get("sensor.duluth_ship_changes")
+    assert changes.state == "2"
+    assert (changes.attributes["added"], changes.attributes["changed"]) == (1, 1)
+
+    # An unchanged feed is a 304: no diff and no further events
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert not coordinator.last_diff
+    assert len(arriving) == 1 and len(departing) == 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_outage_keeps_last_data(hass: HomeAssistant, stub: StubServer) -> None:
+    """While the API is down, the last good ships are kept without a diff."""
+    stub.set_ships([ship("Alpha", 1, eta=at(hours=2))])
+    entry = await setup_entry(hass, stub)
+    coordinator: DuluthShipTrackerCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    stub.set_ships([ship("Alpha", 1, eta=at(hours=2)), ship("Bravo", 2, eta=at(hours=1))])
+    await coordinator.async_refresh()
+    assert coordinator.last_diff
+
+    await stub.stop()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert coordinator.last_update_success
+    assert coordinator.polling.failures == 1
+    assert not coordinator.last_diff
+    assert hass.states.get("sensor.duluth_next_arriving_ship").state == "Bravo"
+    assert hass.states.get("sensor.duluth_arriving_ships").state == "2"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_options_reload(hass: HomeAssistant, stub: StubServer) -> None:
+    """Changing the options reloads the entry with the new settings."""
+    stub.set_ships([ship(f"Vessel {index}", index, eta=at(hours=index)) for index in range(1, 4)])
+    entry = await setup_entry(hass, stub)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert len(hass.states.get("sensor.duluth_arriving_ships_list").attributes["ships"]) == 3
+
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.options, CONF_LIST_LIMIT: 1}
+    )
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert hass.data[DOMAIN][entry.entry_id] is not coordinator
+    ships = hass.states.get("sensor.duluth_arriving_ships_list").attributes["ships"]
+    assert [listed["name"] for listed in ships] == ["Vessel 1"]
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_migrate_unique_ids(hass: HomeAssistant, stub: StubServer) -> None:
+    """Version 1 unique IDs are scoped to the entry, keeping the entity ID."""
+    stub.set_ships([ship("Alpha", 1, eta=at(hours=2))])
+    entry = MockConfigEntry(
+        domain=DOMAIN, version=1, data={}, options={CONF_ENDPOINTS: [stub.url]}
+    )
+    entry.add_to_hass(hass)
+    registry = er.async_get(hass)
+    registry.async_get_or_create(
+        "sensor",
+        DOMAIN,
+        f"{DOMAIN}_next_arrival",
+        config_entry=entry,
+        suggested_object_id="next_ship_in",
+    )
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.version == 2
+    migrated = registry.async_get("sensor.next_ship_in")
+    assert migrated.unique_id == f"{entry.entry_id}_next_arrival"
+    assert hass.states.get("sensor.next_ship_in").state == "Alpha"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,80 @@
+"""Tests for dead-reckoning arrival predictions."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import math
+import random
+
+import pytest
+
+from custom_components.duluth_ship_tracker import predict
+from custom_components.duluth_ship_tracker.api import Ship
+from custom_components.duluth_ship_tracker.const import HARBOR_ENTRIES
+from custom_components.duluth_ship_tracker.predict import predict_arrivals
+
+NOW = datetime(2024, 5, 1, 12, 0)
+
+
+def rows(count: int) -> list[tuple[float, float, float]]:
+    """Return (lat, lon, heading) spread over western Lake Superior."""
+    generator = random.Random(1)
+    spread = [
+        (generator.uniform(46.6, 47.8), generator.uniform(-92.1, -89.5), generator.uniform(0, 360))
+        for _ in range(count)
+    ]
+    # Right on an entry, pointing straight at one, and pointing away
+    entry = HARBOR_ENTRIES[0]
+    return [(entry[0], entry[1], 45.0), (47.5, -91.0, 225.0), (47.5, -91.0, 45.0), *spread]
+
+
+def test_numpy_and_scalar_projections_agree(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Both paths of _project give the same distance and alignment."""
+    assert predict.np is not None
+    inputs = rows(60)
+    assert len(inputs) >= predict._NUMPY_MIN_ROWS
+    vectorized = predict._project(inputs, HARBOR_ENTRIES)
+
+    monkeypatch.setattr(predict, "np", None)
+    scalar = predict._project(inputs, HARBOR_ENTRIES)
+
+    assert len(vectorized) == len(scalar) == len(inputs)
+    assert any(math.isinf(distance) for distance, _ in scalar)
+    assert any(math.isfinite(distance) for distance, _ in scalar)
+    for (distance, alignment), (expected_distance, expected_alignment) in zip(
+        vectorized, scalar
+    ):
+        if math.isinf(expected_distance):
+            assert math.isinf(distance)
+        else:
+            assert distance == pytest.approx(expected_distance, rel=1e-9, abs=1e-9)
+        assert alignment == pytest.approx(expected_alignment, rel=1e-9, abs=1e-12)
+
+
+def test_numpy_and_scalar_predictions_agree(monkeypatch: pytest.MonkeyPatch) -> None:
+    """predict_arrivals fills in the same ETAs with either path."""
+    ships = [
+        Ship(
+            f"Vessel {index}",
+            index,
+            status="Underway",
+            latitude=lat,
+            longitude=lon,
+            heading=heading,
+            speed=4 + index % 10,
+            last_update=NOW - timedelta(minutes=index),
+        )
+        for index, (lat, lon, heading) in enumerate(rows(40), start=1)
+    ]
+    vectorized = predict_arrivals(ships, NOW)
+
+    monkeypatch.setattr(predict, "_NUMPY_MIN_ROWS", len(ships) + 1)
+    scalar = predict_arrivals(ships, NOW)
+
+    assert any(ship.predicted_eta is not None for ship in scalar)
+    assert any(ship.predicted_eta is None for ship in scalar)
+    for ship, expected in zip(vectorized, scalar):
+        assert (ship.predicted_eta is None) == (expected.predicted_eta is None)
+        if expected.predicted_eta is not None:
+            # Both are truncated to the second, so float noise moves at most one
+            assert abs(ship.predicted_eta - expected.predicted_eta) <= timedelta(seconds=1)
+            assert ship.eta_confidence == pytest.approx(expected.eta_confidence, abs=0.1)
@@ -0,0 +1,53 @@
+"""Tests for the vessel registry."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import pickle
+
+import pytest
+
+from custom_components.duluth_ship_tracker import registry as registry_module
+from custom_components.duluth_ship_tracker.api import Ship
+from custom_components.duluth_ship_tracker.registry import VesselRegistry
+
+
+@pytest.fixture
+def registry() -> VesselRegistry:
+    """Return the bundled registry."""
+    registry = VesselRegistry()
+    registry.load()
+    return registry
+
+
+def test_shared_between_threads(
+    registry: VesselRegistry, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Lookups from several threads keep the memo consistent and bounded."""
+    monkeypatch.setattr(registry_module, "RESOLVED_CACHE_SIZE", 16)
+    ships = [Ship(f"Unknown Vessel {index}", index) for index in range(200)]
+    ships.append(Ship("Edwin H. Gott"))
+
+    def look_up(offset: int) -> int:
+        found = 0
+        for index in range(2000):
+            ship = ships[(index * 7 + offset) % len(ships)]
+            found += registry.lookup(ship) is not None
+        return found
+
+    with ThreadPoolExecutor(8) as pool:
+        assert all(found > 0 for found in pool.map(look_up, range(8)))
+
+    stats = registry.as_dict()
+    assert stats["matched_ships"] + stats["unmatched_ships"] == 16
+
+
+def test_pickle(registry: VesselRegistry) -> None:
+    """A registry sent to a worker process keeps its vessels and memo."""
+    gott = Ship("Edwin H. Gott")
+    assert registry.lookup(gott) is not None
+
+    copy = pickle.loads(pickle.dumps(registry))
+    assert len(copy) == len(registry)
+    assert copy.as_dict() == registry.as_dict()
+    assert copy.lookup(gott) == registry.lookup(gott)
+    assert copy.enrich(Ship("Edwin H Gott")).length == 1004
@@ -0,0 +1,146 @@
+"""Tests for the arrival/departure warning scheduler."""
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+import pytest
+
+from homeassistant.core import Event, HomeAssistant, callback
+
+from custom_components.duluth_ship_tracker.api import Ship, ShipSnapshot
+from custom_components.duluth_ship_tracker.const import (
+    ATTR_SHIP_NAME,
+    EVENT_SHIP_ARRIVAL_WARNING,
+    EVENT_SHIP_DEPARTURE_WARNING,
+)
+from custom_components.duluth_ship_tracker.diff import diff_snapshots, ship_key
+from custom_components.duluth_ship_tracker.scheduler import WarningScheduler
+
+START = datetime(2024, 5, 1, 12, 0)
+WARNING_MINUTES = 30
+
+
+def snapshot(*ships: Ship) -> ShipSnapshot:
+    """Return a snapshot holding the given ships."""
+    return ShipSnapshot(ships={ship_key(ship): ship for ship in ships}, total_count=len(ships))
+
+
+@pytest.fixture
+def warnings(hass: HomeAssistant) -> list[tuple[str, str]]:
+    """Record (event type, ship name) of every warning fired."""
+    fired: list[tuple[str, str]] = []
+
+    @callback
+    def record(event: Event) -> None:
+        fired.append((event.event_type, event.data[ATTR_SHIP_NAME]))
+
+    hass.bus.async_listen(EVENT_SHIP_ARRIVAL_WARNING, record)
+    hass.bus.async_listen(EVENT_SHIP_DEPARTURE_WARNING, record)
+    return fired
+
+
+@pytest.fixture
+def scheduler(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> Iterator[WarningScheduler]:
+    """Return a scheduler with the clock frozen at START."""
+    freezer.move_to(START.astimezone())
+    scheduler = WarningScheduler(hass, WARNING_MINUTES)
+    yield scheduler
+    scheduler.async_stop()
+
+
+async def advance(hass: HomeAssistant, freezer: FrozenDateTimeFactory, to: datetime) -> None:
+    """Move the clock and run the timers that came due."""
+    freezer.move_to(to.astimezone())
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+
+async def test_reschedules_ship_whose_eta_moved(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    scheduler: WarningScheduler,
+    warnings: list[tuple[str, str]],
+) -> None:
+    """A later ETA moves the warning; the old deadline passes silently."""
+    first = snapshot(Ship("Alpha", 1, eta=START + timedelta(hours=1)))
+    scheduler.async_update(first)
+    assert scheduler.next_deadline == START + timedelta(minutes=30)
+
+    later = snapshot(Ship("Alpha", 1, eta=START + timedelta(hours=2)))
+    scheduler.async_update(later, diff_snapshots(first, later))
+    assert scheduler.next_deadline == START + timedelta(minutes=90)
+
+    await advance(hass, freezer, START + timedelta(minutes=31))
+    assert warnings == []
+
+    await advance(hass, freezer, START + timedelta(minutes=91))
+    assert warnings == [(EVENT_SHIP_ARRIVAL_WARNING, "Alpha")]
+    assert scheduler.next_deadline is None
+
+
+async def test_drops_ship_that_left(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    scheduler: WarningScheduler,
+    warnings: list[tuple[str, str]],
+) -> None:
+    """A ship removed from the feed is never warned about."""
+    alpha = Ship("Alpha", 1, eta=START + timedelta(hours=1))
+    bravo = Ship("Bravo", 2, etd=START + timedelta(hours=2))
+    both = snapshot(alpha, bravo)
+    scheduler.async_update(both)
+
+    only_bravo = snapshot(bravo)
+    scheduler.async_update(only_bravo, diff_snapshots(both, only_bravo))
+    assert scheduler.next_deadline == START + timedelta(minutes=90)
+
+    await advance(hass, freezer, START + timedelta(minutes=91))
+    assert warnings == [(EVENT_SHIP_DEPARTURE_WARNING, "Bravo")]
+
+
+async def test_warnings_due_together(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    scheduler: WarningScheduler,
+    warnings: list[tuple[str, str]],
+) -> None:
+    """Warnings sharing a deadline all fire from the same timer."""
+    when = START + timedelta(hours=1)
+    scheduler.async_update(
+        snapshot(Ship("Alpha", 1, eta=when), Ship("Bravo", 2, eta=when))
+    )
+
+    await advance(hass, freezer, when - timedelta(minutes=WARNING_MINUTES))
+    assert sorted(warnings) == [
+        (EVENT_SHIP_ARRIVAL_WARNING, "Alpha"),
+        (EVENT_SHIP_ARRIVAL_WARNING, "Bravo"),
+    ]
+
+    # An unchanged time is not announced twice
+    scheduler.async_update(
+        snapshot(Ship("Alpha", 1, eta=when), Ship("Bravo", 2, eta=when))
+    )
+    await advance(hass, freezer, when - timedelta(minutes=5))
+    assert len(warnings) == 2
+
+
+async def test_past_due_etas_do_not_fire(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    scheduler: WarningScheduler,
+    warnings: list[tuple[str, str]],
+) -> None:
+    """ETAs already passed, at scheduling or by the time the timer runs, are skipped."""
+    scheduler.async_update(snapshot(Ship("Alpha", 1, eta=START - timedelta(minutes=5))))
+    assert scheduler.next_deadline is None
+
+    scheduler.async_update(snapshot(Ship("Bravo", 2, eta=START + timedelta(hours=1))))
+    # The timer runs late, after the ETA itself
+    await advance(hass, freezer, START + timedelta(hours=1, minutes=1))
+    assert warnings == []
+    assert scheduler.next_deadline is None
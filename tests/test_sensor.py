@@ -0,0 +1,82 @@
+"""Tests for the Duluth Ship Tracker sensors."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from custom_components.duluth_ship_tracker.const import (
+    CONF_MAX_SHIP_DEVICES,
+    CONF_SHIP_DEVICES,
+    DOMAIN,
+)
+from custom_components.duluth_ship_tracker.coordinator import (
+    DuluthShipTrackerCoordinator,
+)
+
+from . import StubServer, setup_entry, ship
+
+MMSI = {"Alpha": 1, "Bravo": 2, "Charlie": 3, "Delta": 4, "Echo": 5, "Foxtrot": 6}
+
+
+def feed(now: datetime, names: list[str], moved: str | None = None) -> list[dict[str, Any]]:
+    """Return underway ships, each reported a minute before the previous one."""
+    return [
+        ship(
+            name,
+            MMSI[name],
+            status="Underway",
+            latitude=46.8 + (0.01 if name == moved else 0),
+            longitude=-91.9,
+            lastUpdate=(now - timedelta(minutes=index)).isoformat(),
+        )
+        for index, name in enumerate(names)
+    ]
+
+
+def _registered(hass: HomeAssistant, entry_id: str) -> tuple[list[str], set[int]]:
+    """Return the ship devices and the MMSIs with vessel sensors of an entry."""
+    devices = dr.async_entries_for_config_entry(dr.async_get(hass), entry_id)
+    entities = er.async_entries_for_config_entry(er.async_get(hass), entry_id)
+    prefix = f"{entry_id}_mmsi:"
+    return sorted(device.name for device in devices), {
+        int(entity.unique_id.removeprefix(prefix).split("_", 1)[0])
+        for entity in entities
+        if entity.unique_id.startswith(prefix)
+    }
+
+
+async def test_ship_devices_evict_least_recently_changed(
+    hass: HomeAssistant, stub: StubServer
+) -> None:
+    """Past the cap, the ship that changed longest ago loses its device."""
+    now = datetime.now().replace(microsecond=0)
+    stub.set_ships(feed(now, ["Alpha", "Bravo", "Charlie", "Delta"]))
+    entry = await setup_entry(
+        hass, stub, **{CONF_SHIP_DEVICES: True, CONF_MAX_SHIP_DEVICES: 3}
+    )
+    coordinator: DuluthShipTrackerCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    # The most recently reported ships get devices at startup
+    assert _registered(hass, entry.entry_id) == (["Alpha", "Bravo", "Charlie"], {1, 2, 3})
+
+    async def poll(names: list[str], moved: str) -> None:
+        stub.set_ships(feed(now, names, moved))
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    # Echo is new and Bravo moved; Charlie has been idle longest
+    await poll(["Alpha", "Bravo", "Charlie", "Delta", "Echo"], "Bravo")
+    assert _registered(hass, entry.entry_id) == (["Alpha", "Bravo", "Echo"], {1, 2, 5})
+    assert hass.states.get("sensor.charlie_status") is None
+    assert hass.states.get("sensor.echo_status").state == "Underway"
+
+    # Foxtrot is new, Alpha moved and Bravo moved back: Echo is now idle longest
+    await poll(["Alpha", "Bravo", "Charlie", "Delta", "Echo", "Foxtrot"], "Alpha")
+    assert _registered(hass, entry.entry_id) == (["Alpha", "Bravo", "Foxtrot"], {1, 2, 6})
+    assert hass.states.get("sensor.echo_status") is None
+    assert hass.states.get("sensor.alpha_status").state == "Underway"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
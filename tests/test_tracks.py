@@ -0,0 +1,137 @@
+"""Tests for ship position tracks."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.duluth_ship_tracker.const import DOMAIN, SERVICE_SHIP_TRACKS
+from custom_components.duluth_ship_tracker.coordinator import (
+    DuluthShipTrackerCoordinator,
+)
+from custom_components.duluth_ship_tracker.tracks import ShipTrack, TrackPoint, simplify
+
+from . import StubServer, setup_entry, ship
+
+# A minute of latitude is one nautical mile
+NM = 1 / 60
+
+
+def test_ring_buffer_overflow() -> None:
+    """Once full, the oldest fixes are overwritten and order is kept."""
+    track = ShipTrack(capacity=4)
+    assert track.last is None
+    for index in range(10):
+        assert track.append(46.0 + index * NM, -92.0, 1000.0 + index)
+
+    assert len(track) == 4
+    assert track.nbytes == 4 * 24
+    assert [when for _, _, when in track.points()] == [1006, 1007, 1008, 1009]
+    assert [when for _, _, when in track.points(1007, 1008)] == [1007, 1008]
+    assert track.last == (46.0 + 9 * NM, -92.0, 1009.0)
+
+    # Older fixes and fixes that did not move are ignored
+    assert not track.append(47.0, -92.0, 1005.0)
+    assert not track.append(46.0 + 9 * NM, -92.0, 1010.0)
+
+    # Wrapping around again keeps oldest-first order
+    for index in range(10, 13):
+        track.append(46.0 + index * NM, -92.0, 1000.0 + index)
+    assert [when for _, _, when in track.points()] == [1009, 1010, 1011, 1012]
+
+
+def bumped(offset_nm: float) -> list[TrackPoint]:
+    """Return a straight eastward track with one point `offset_nm` off it."""
+    points = [(46.7, -92.0 + index * 0.01, float(index)) for index in range(11)]
+    points[5] = (46.7 + offset_nm * NM, points[5][1], points[5][2])
+    return points
+
+
+@pytest.mark.parametrize(
+    ("tolerance", "kept"),
+    [
+        # Straight runs collapse to their ends, the bump stays
+        (0.4, [0, 5, 10]),
+        (0.6, [0, 10]),
+        # No tolerance keeps every point
+        (0.0, list(range(11))),
+    ],
+)
+def test_simplify_tolerance(tolerance: float, kept: list[int]) -> None:
+    """Points farther than the tolerance from the line are kept."""
+    points = bumped(0.5)
+    assert simplify(points, tolerance) == [points[index] for index in kept]
+
+
+def test_simplify_short_and_closed_tracks() -> None:
+    """Two points are left alone; a loop keeps its farthest point."""
+    assert simplify([(46.7, -92.0, 0.0), (46.8, -92.0, 1.0)], 10.0) == [
+        (46.7, -92.0, 0.0),
+        (46.8, -92.0, 1.0),
+    ]
+    loop = [(46.7, -92.0, 0.0), (46.7 + 2 * NM, -92.0, 1.0), (46.7, -92.0, 2.0)]
+    assert simplify(loop, 1.0) == loop
+
+
+async def test_ship_tracks_service(hass: HomeAssistant, stub: StubServer) -> None:
+    """The service returns one GeoJSON feature per ship, simplified."""
+    start = datetime.now().replace(microsecond=0) - timedelta(hours=1)
+    fixed = ship("Anchored", 2, status="Moored", latitude=46.7793, longitude=-92.0929)
+
+    def feed(step: int) -> list[dict]:
+        return [
+            ship(
+                "Mover",
+                1,
+                imo=9000001,
+                latitude=46.75 + step * 0.01,
+                longitude=-92.05,
+                lastUpdate=(start + timedelta(minutes=step)).isoformat(),
+            ),
+            fixed,
+        ]
+
+    stub.set_ships(feed(0))
+    entry = await setup_entry(hass, stub)
+    coordinator: DuluthShipTrackerCoordinator = hass.data[DOMAIN][entry.entry_id]
+    for step in range(1, 5):
+        stub.set_ships(feed(step))
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    response = await hass.services.async_call(
+        DOMAIN, SERVICE_SHIP_TRACKS, {"tolerance": 0}, blocking=True, return_response=True
+    )
+    assert response["type"] == "FeatureCollection"
+    features = {feature["properties"]["ship_name"]: feature for feature in response["features"]}
+    assert set(features) == {"Mover", "Anchored"}
+
+    mover = features["Mover"]
+    assert mover["type"] == "Feature"
+    assert set(mover) == {"type", "geometry", "properties"}
+    assert set(mover["properties"]) == {"ship_name", "mmsi", "imo", "times"}
+    assert mover["properties"]["mmsi"] == 1
+    assert mover["properties"]["imo"] == 9000001
+    assert mover["geometry"]["type"] == "LineString"
+    # GeoJSON positions are [longitude, latitude]
+    assert mover["geometry"]["coordinates"] == [
+        [-92.05, pytest.approx(46.75 + step * 0.01)] for step in range(5)
+    ]
+    assert mover["properties"]["times"] == [
+        (start + timedelta(minutes=step)).isoformat() for step in range(5)
+    ]
+
+    anchored = features["Anchored"]
+    assert anchored["geometry"] == {"type": "Point", "coordinates": [-92.0929, 46.7793]}
+    assert len(anchored["properties"]["times"]) == 1
+
+    # The default tolerance reduces the straight run to its ends
+    response = await hass.services.async_call(
+        DOMAIN, SERVICE_SHIP_TRACKS, {"ship_name": "mov"}, blocking=True, return_response=True
+    )
+    (mover,) = response["features"]
+    assert len(mover["geometry"]["coordinates"]) == len(mover["properties"]["times"]) == 2
+
+    assert await hass.config_entries.async_unload(entry.entry_id)